@@ -1,48 +1,79 @@
-def buildTristrips(triangles):
+import time
+
+def buildTristrips(mesh):
     count = 0
-    stripless = triangles   #create temp for triangles that holds every triangle not on a strip
+    lastPrint = time.perf_counter()   #printing every strip was slow on large meshes, so print at most once a second
+    n = len(mesh)
+
+    adj = mesh.adj.tolist()   #adjacent triangle indices of each triangle, -1 for none
+    used = [False] * n   #whether each triangle is on a strip yet
+    adjs = [sum(1 for a in tris if a >= 0) for tris in adj]   #number of unused adjacents of each triangle, same as checkAdjs
+    nextTri = [-1] * n
+    prevTri = [-1] * n
+
+    buckets = [[] for _ in range(4)]   #unused triangles bucketed by their number of unused adjacents (0 to 3)
+    for i in reversed(range(n)):   #reversed so that the first ties come out in index order (triangles pushed again later come out first)
+        buckets[adjs[i]].append(i)
 
-    while len(stripless) > 0:   #as long as not empty
-        triangle = stripless[0]
+    state = (adj, used, adjs, buckets, nextTri, prevTri)
+    triangle = 0 if n > 0 else None   #first strip starts at the first triangle
+
+    while triangle is not None:
         count += 1 #increment counter of strips
-        stripless = list(set(stripless) - set(pseudoStrip(triangle))) #make list of triangles not in strips
-        stripless = sorted(stripless, key = checkAdjs) #order the list based on how many adjacents the triangle has so we use the triangles with the least amount first
+        pseudoStrip(triangle, state)
 
-        print('Generated %d tristrips' % count)
+        if time.perf_counter() - lastPrint >= 1.0:
+            print('Generated %d tristrips' % count)
+            lastPrint = time.perf_counter()
 
-def findAdjacent(triangle):
-    adjacents = []  #array for adjacent triangles
+        triangle = None   #next strip starts at the unused triangle with the least amount of adjacents
+        for adjCount, bucket in enumerate(buckets):
+            while bucket and triangle is None:
+                i = bucket.pop()
+                if not used[i] and adjs[i] == adjCount:   #skip stale entries whose count has since dropped
+                    triangle = i
+            if triangle is not None:
+                break
 
-    for tri in triangle.adjTris:
+    print('Generated %d tristrips' % count)
+    mesh.nextTri[:] = nextTri   #write the strips back into the mesh
+    mesh.prevTri[:] = prevTri
+    mesh.hasStrips = True   #so the cache and the strip editor know the links are set
 
-        if (tri.nextTri == None and tri.prevTri == None):   #only count it as adjacent if it also hasn't been used
-            adjacents.append(tri)
+def findAdjacent(triangle, state):
+    adj, used, adjs, buckets, nextTri, prevTri = state
+    adjacents = [tri for tri in adj[triangle] if tri >= 0 and not used[tri]]  #only count it as adjacent if it also hasn't been used
 
     if not adjacents:  #has no adjacents
-        return False
+        return None
     else:
-        ret = sorted(adjacents, key = checkAdjs)
-        return ret[0]
-
-def checkAdjs(triangle):
-    temp = 0
+        return min(adjacents, key = lambda tri: checkAdjs(tri, state))   #first of the ones with the least amount of adjacents
 
-    for tri in triangle.adjTris:
+def checkAdjs(triangle, state):
+    adj, used, adjs, buckets, nextTri, prevTri = state
+    return adjs[triangle]
 
-        if tri.nextTri == None and tri.prevTri == None:
-            temp += 1
+def useTriangle(triangle, state):
+    adj, used, adjs, buckets, nextTri, prevTri = state
+    used[triangle] = True
 
-    return temp
+    for tri in adj[triangle]:   #only the adjacents' counts change, so only they move bucket
+        if tri >= 0 and not used[tri]:
+            adjs[tri] -= 1
+            buckets[adjs[tri]].append(tri)
 
-def pseudoStrip(triangle):
+def pseudoStrip(triangle, state):
+    adj, used, adjs, buckets, nextTri, prevTri = state
     triStrip = [triangle]
-    freeAdjs = findAdjacent(triangle) #unused adjacents
+    useTriangle(triangle, state)
+    freeAdjs = findAdjacent(triangle, state) #unused adjacents
 
-    while freeAdjs:
-        triangle.nextTri = freeAdjs  #the triangles next triangle should be an unused adjacent triangle which has the least number of adjacents as well
-        freeAdjs.prevTri = triangle #Make the previous triangle the triangle just used
+    while freeAdjs is not None:
+        nextTri[triangle] = freeAdjs  #the triangles next triangle should be an unused adjacent triangle which has the least number of adjacents as well
+        prevTri[freeAdjs] = triangle #Make the previous triangle the triangle just used
         triStrip.append(freeAdjs)
         triangle = freeAdjs #the next triangle becomes the current triangle
-        freeAdjs = findAdjacent(triangle)
+        useTriangle(triangle, state)
+        freeAdjs = findAdjacent(triangle, state)
 
     return triStrip
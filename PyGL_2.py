@@ -1,27 +1,69 @@
 # Triangle strips
 #
-# Usage: python main.py file_of_triangles
+# Usage: python main.py [-n] [-P profile] file_of_triangles
+#
+# The parsed mesh and its strips are cached in 'file_of_triangles.cache'.
+# Use -n to ignore the cache.
+# With -P, the time spent reading, building strips and rendering is
+# written to the 'profile' file when the window is closed (see
+# profiler.py).
 #
 # You can press ESC in the window to exit.
 #
+# If the strips aren't cached, they are built in the background while
+# the window shows them as they are found, with a bar along the bottom
+# showing the fraction of triangles on strips so far.  ESC then
+# cancels the build, leaving the strips found so far on screen, and a
+# second ESC exits.
+#
 # You'll need Python 3 and must install these packages:
 #
-#   PyOpenGL, GLFW
+#   PyOpenGL, GLFW, NumPy
+#
+# The mesh, file reading and strip building are in tristrips.py,
+# which can also be run without a display.  OpenGL and GLFW are only
+# loaded by loadGL() when the window is opened.
+
+
+import sys, os, math, threading
+
+import numpy as np
+
+import profiler
+
+from tristrips import TriangleGrid, stripStrategies, loadMesh, writeMeshCache, fileHash
+
+
+
+# Load OpenGL and GLFW.  This is only done when the window is opened,
+# so that importing this module doesn't pay for PyOpenGL.  The GL
+# names are put in this module's globals, just as
+# 'from OpenGL.GL import *' would.
+
+def loadGL():
+
+  global glfw
+
+  try: # PyOpenGL
+    import OpenGL.GL
+  except:
+    print( 'Error: PyOpenGL has not been installed.' )
+    sys.exit(0)
+
+  try: # GLFW
+    import glfw
+  except:
+    print( 'Error: GLFW has not been installed.' )
+    sys.exit(0)
 
+  importStar( OpenGL.GL )
 
-import sys, os, math
 
-try: # PyOpenGL
-  from OpenGL.GL import *
-except:
-  print( 'Error: PyOpenGL has not been installed.' )
-  sys.exit(0)
+def importStar( module ):
 
-try: # GLFW
-  import glfw
-except:
-  print( 'Error: GLFW has not been installed.' )
-  sys.exit(0)
+  names = getattr( module, '__all__', None ) or [ name for name in dir(module) if not name.startswith('_') ]
+
+  globals().update( (name, getattr( module, name )) for name in names )
 
 
 
@@ -31,6 +73,7 @@ window = None
 
 windowWidth  = 1000 # window dimensions
 windowHeight = 1000
+windowTitle  = 'Assignment 2'
 
 minX = None # range of vertices
 maxX = None
@@ -39,275 +82,315 @@ maxY = None
 
 r  = 0.008 # point radius as fraction of window size
 
-allVerts = [] # all triangle vertices
+mesh = None # the TriangleMesh being shown
+grid = None # TriangleGrid of the mesh, for picking
 
 lastKey = None  # last key pressed
 
 showForwardLinks = True
 
+build = None # the BackgroundBuild of the mesh's strips, if they weren't cached
 
 
-# Triangle
+# Vertex arrays for drawing the mesh
+#
+# Drawing each triangle, arrow and dot with its own glBegin/glEnd is
+# far too slow for large meshes, so everything is built into a few
+# NumPy vertex arrays, each drawn with one glDrawArrays call.  The
+# arrays are kept in 'batches' and rebuilt only when what they show
+# changes:
 #
-# A Triangle stores its three vertices and pointers to any adjacent triangles.
+#   'outlines'    never (the triangles themselves don't change)
+#   'fills'       when highlights change   (see invalidate())
+#   'links'       when strips change or showForwardLinks is toggled
 #
-# For debugging, you can set the 'highlight1' and 'highlight2' flags
-# of a triangle.  This will cause the triangle to be highlighted when
-# it's drawn.
+# Only OpenGL 1.1 client-side vertex arrays are used, so this also
+# runs under Mesa's software renderer (e.g. LIBGL_ALWAYS_SOFTWARE=1)
+# on machines without a GPU.
 
+batches = {} # name -> list of (GL mode, (k,2) float32 vertices, colour)
 
-class Triangle(object):
+dotSegments = 24 # segments in the circle drawn on triangles with no links
 
-    nextID = 0
 
-    def __init__( self, verts ):
+# Mark batches as needing to be rebuilt
 
-      self.verts   = verts # 3 vertices.  Each is an index into the 'allVerts' global.
-      self.adjTris = [] # adjacent triangles
+def invalidate( *names ):
 
-      self.nextTri = None  # next triangle on strip
-      self.prevTri = None  # previous triangle on strip
+    for name in names:
+        batches.pop( name, None )
 
-      self.highlight1 = False # to cause drawing to highlight this triangle in colour 1
-      self.highlight2 = False # to cause drawing to highlight this triangle in colour 2
 
-      self.centroid = ( sum( [allVerts[i][0] for i in self.verts] ) / len(self.verts),
-                        sum( [allVerts[i][1] for i in self.verts] ) / len(self.verts) )
+# Draw all batches, building any that are missing.  Fills are drawn
+# before outlines, and links last so that the triangle drawing
+# doesn't overlay them.
 
-      self.id = Triangle.nextID
-      Triangle.nextID += 1
+def drawBatches( mesh ):
 
+    with profiler.phase( 'batches' ):
+        if 'outlines' not in batches:
+            batches['outlines'] = outlineBatches( mesh )
+        if 'fills' not in batches:
+            batches['fills'] = fillBatches( mesh )
+        if 'links' not in batches:
+            batches['links'] = linkBatches( mesh, None if build is None else np.flatnonzero( build.onStrip ) )
 
-    # String representation of this triangle
-    
-    def __repr__(self):
-        return 'tri-%d' % self.id
+    glEnableClientState( GL_VERTEX_ARRAY )
 
+    for name in [ 'fills', 'outlines', 'links' ]:
+        for mode, verts, colour in batches[name]:
+            if len(verts) > 0:
+                glColor3fv( colour )
+                glVertexPointer( 2, GL_FLOAT, 0, verts )
+                glDrawArrays( mode, 0, len(verts) )
 
-    # Draw this triangle
-    
-    def draw(self):
+    glDisableClientState( GL_VERTEX_ARRAY )
 
-        # Highlight with yellow fill
 
-        if self.highlight1 or self.highlight2:
+# Outline every triangle in black, as GL_LINES
 
-            if self.highlight1:
-                glColor3f( 0.9, 0.9, 0.4 ) # dark yellow
-            else:
-                glColor3f( 1, 1, 0.8 ) # light yellow
+def outlineBatches( mesh ):
 
-            glBegin( GL_POLYGON )
-            for i in self.verts:
-                glVertex2f( allVerts[i][0], allVerts[i][1] )
-            glEnd()
+    lines = mesh.verts[mesh.faces[:,[0,1,1,2,2,0]]].reshape( -1, 2 )
 
-        # Outline the triangle
+    return [ (GL_LINES, lines.astype( np.float32 ), (0,0,0)) ]
 
-        glColor3f( 0, 0, 0 )
-        glBegin( GL_LINE_LOOP )
-        for i in self.verts:
-            glVertex2f( allVerts[i][0], allVerts[i][1] )
-        glEnd()
 
+# Fill highlighted triangles with yellow, as GL_TRIANGLES
 
-    # Draw edges to next and previous triangle on the strip
+def fillBatches( mesh ):
 
-    def drawPointers(self):
+    dark  = mesh.highlight1
+    light = mesh.highlight2 & ~mesh.highlight1
 
-        if showForwardLinks and self.nextTri:
-            glColor3f( 0, 0, 1 )
-            drawArrow( self.centroid[0], self.centroid[1], 
-                       self.nextTri.centroid[0], self.nextTri.centroid[1] )
+    return [ (GL_TRIANGLES, mesh.verts[mesh.faces[dark]].reshape( -1, 2 ).astype( np.float32 ),  (0.9, 0.9, 0.4)), # dark yellow
+             (GL_TRIANGLES, mesh.verts[mesh.faces[light]].reshape( -1, 2 ).astype( np.float32 ), (1, 1, 0.8)) ]    # light yellow
 
-        if not showForwardLinks and self.prevTri:
-            glColor3f( 1, 0, 0 )
-            drawArrow( self.centroid[0], self.centroid[1], 
-                       self.prevTri.centroid[0], self.prevTri.centroid[1] )
 
-        if not self.nextTri and not self.prevTri: # no links.  Draw a dot.
-            if showForwardLinks:
-                glColor3f( 0, 0, 1 )
-            else:
-                glColor3f( 1, 0, 0 )
-            glBegin( GL_POLYGON )
-            for i in range(100):
-                theta = 3.14159 * i/50.0
-                glVertex2f( self.centroid[0] + 0.5 * r * math.cos(theta), self.centroid[1] + 0.5 * r * math.sin(theta) ) 
-            glEnd()
+# Arrows from each triangle to the next (or previous) triangle on its
+# strip, and dots on triangles with no links.  Only the triangles in
+# 'tris' are drawn, if it's given.
 
+def linkBatches( mesh, tris=None ):
 
-    # Determine whether this triangle contains a point
-    
-    def containsPoint( self, pt ):
+    if tris is None:
+        tris = np.arange( len(mesh) )
 
-        return (turn( allVerts[self.verts[0]], allVerts[self.verts[1]], pt ) == LEFT_TURN and
-                turn( allVerts[self.verts[1]], allVerts[self.verts[2]], pt ) == LEFT_TURN and
-                turn( allVerts[self.verts[2]], allVerts[self.verts[0]], pt ) == LEFT_TURN)
-      
+    if showForwardLinks:
+        links  = mesh.nextTri
+        colour = (0, 0, 1)
+    else:
+        links  = mesh.prevTri
+        colour = (1, 0, 0)
 
+    linked = tris[links[tris] >= 0]
+    arrows = arrowLines( centroids( mesh, linked ), centroids( mesh, links[linked] ) )
 
+    unlinked = tris[(mesh.nextTri[tris] < 0) & (mesh.prevTri[tris] < 0)]
+    dots     = dotTriangles( centroids( mesh, unlinked ), 0.5 * r )
 
-# Draw an arrow between two points.
+    return [ (GL_LINES, arrows.astype( np.float32 ), colour),
+             (GL_TRIANGLES, dots.astype( np.float32 ), colour) ]
 
-def drawArrow( x0,y0, x1,y1 ):
 
-    d = math.sqrt( (x1-x0)*(x1-x0) + (y1-y0)*(y1-y0) )
+def centroids( mesh, tris ):
 
-    vx = (x1-x0) / d      # unit direction (x0,y0) -> (x1,y1)
-    vy = (y1-y0) / d
+    return mesh.verts[mesh.faces[tris]].mean( axis=1 )
 
-    vpx = -vy             # unit direction perpendicular to (vx,vy)
-    vpy = vx
 
-    xa = x0 + 0.15*r*vx # arrow tail
-    ya = y0 + 0.15*r*vy
+# Join the batches of a list that have the same mode and colour, so
+# that each is drawn with one call
 
-    xb = x1 - 0.15*r*vx # arrow head
-    yb = y1 - 0.15*r*vy
+def mergeBatches( batchList ):
 
-    xc = xb - 2*r*vx + 0.5*r*vpx # arrow outside left
-    yc = yb - 2*r*vy + 0.5*r*vpy
+    merged = {}
+    for mode, verts, colour in batchList:
+        merged.setdefault( (mode, colour), [] ).append( verts )
 
-    xd = xb - 2*r*vx - 0.5*r*vpx # arrow outside right
-    yd = yb - 2*r*vy - 0.5*r*vpy
+    return [ (mode, np.concatenate( vertList ), colour) for (mode, colour), vertList in merged.items() ]
 
-    glBegin( GL_LINES )
-    glVertex2f( xa, ya )
-    glVertex2f( 0.5*(xc+xd), 0.5*(yc+yd) )
-    glEnd()
 
-    glBegin( GL_LINE_LOOP )
-    glVertex2f( xb, yb )
-    glVertex2f( xc, yc )
-    glVertex2f( xd, yd )
-    glEnd()
-      
-      
+# Bar along the bottom of the window, 'fraction' of the way across
 
-# Determine whether three points make a left or right turn
+def drawProgress( fraction ):
 
-LEFT_TURN  = 1
-RIGHT_TURN = 2
-COLLINEAR  = 3
+    x = -1.0 + 2.0 * fraction
+
+    bar = np.array( [ [-1,-1], [x,-1], [x,-0.98], [-1,-0.98] ], dtype=np.float32 )
+
+    glMatrixMode( GL_PROJECTION )
+    glLoadIdentity()
+
+    glEnableClientState( GL_VERTEX_ARRAY )
+    glColor3fv( (0.2, 0.7, 0.2) )
+    glVertexPointer( 2, GL_FLOAT, 0, bar )
+    glDrawArrays( GL_TRIANGLE_FAN, 0, 4 )
+    glDisableClientState( GL_VERTEX_ARRAY )
+
+
+# Arrows between pairs of points p0[i] -> p1[i], as GL_LINES
+# vertices: a shaft and the three sides of the head for each arrow.
+
+def arrowLines( p0, p1 ):
+
+    with np.errstate( divide='ignore', invalid='ignore' ):
+        v = (p1-p0) / np.sqrt( ((p1-p0)**2).sum( axis=1 ) )[:,None] # unit direction p0 -> p1
+
+    vp = np.stack( [ -v[:,1], v[:,0] ], axis=1 ) # unit direction perpendicular to v
+
+    a = p0 + 0.15*r*v              # arrow tail
+    b = p1 - 0.15*r*v              # arrow head
+    c = b - 2*r*v + 0.5*r*vp       # arrow outside left
+    d = b - 2*r*v - 0.5*r*vp       # arrow outside right
+
+    return np.stack( [ a, 0.5*(c+d),  b, c,  c, d,  d, b ], axis=1 ).reshape( -1, 2 )
+
+
+# Filled circles of the given radius around points, as GL_TRIANGLES vertices
+
+def dotTriangles( centres, radius ):
+
+    theta  = 2 * math.pi * np.arange( dotSegments+1 ) / dotSegments
+    circle = radius * np.stack( [ np.cos(theta), np.sin(theta) ], axis=1 )
+
+    fan = np.empty( (dotSegments,3,2) )
+    fan[:,0] = 0
+    fan[:,1] = circle[:-1]
+    fan[:,2] = circle[1:]
+
+    return (centres[:,None,None,:] + fan[None]).reshape( -1, 2 )
+
+
+
+# Background strip building
+#
+# Building the strips of a large mesh can take minutes, so it's done
+# in a worker thread while the window keeps handling events and
+# drawing.  The worker hands each strip it finishes to newStrip(),
+# which queues it, and each redraw calls collect() to move the queued
+# strips into the mesh's links and add their arrows to the 'links'
+# batch, so that strips appear as they are found without redrawing
+# the ones already shown.  The added batches are merged whenever
+# there are more than maxLinkBatches of them, and the 'links' batch is
+# rebuilt whole when the build is done, so the number of draw calls
+# stays small.
+#
+# cancel() asks the worker to stop, which it does at the end of its
+# current strip by raising BuildCancelled from the progress callback.
+# The strips of a cancelled build aren't cached.
+
+maxLinkBatches = 64
+
+class BuildCancelled(Exception):
+    pass
+
+
+class BackgroundBuild(object):
+
+    def __init__( self, mesh, strategy='greedy', cachePath=None, cacheKey=None ):
+
+        self.mesh      = mesh
+        self.cachePath = cachePath # where to cache the strips when done, if anywhere
+        self.cacheKey  = cacheKey
+
+        self.pending   = [] # strips found by the worker and not yet collected
+        self.lock      = threading.Lock()
+        self.cancelled = False
+        self.stopped   = False # the worker has finished or been cancelled
+        self.done      = False # every strip has been collected
+
+        self.onStrip    = np.zeros( len(mesh), dtype=bool ) # collected triangles
+        self.numOnStrip = 0
+        self.numStrips  = 0
+
+        self.thread = threading.Thread( target=self.run, args=(strategy,), daemon=True )
+        self.thread.start()
+
+
+    def run( self, strategy ):
+
+        try:
+            with profiler.phase( 'strips' ):
+                stripStrategies[strategy]( self.mesh.adj, self.progress, newStrip=self.newStrip )
+        except BuildCancelled:
+            pass
+        finally:
+            self.stopped = True
+
+
+    def newStrip( self, strip ):
+
+        with self.lock:
+            self.pending.append( strip )
+
+
+    def progress( self, cnt ):
+
+        if self.cancelled:
+            raise BuildCancelled()
+
+
+    def cancel( self ):
+
+        self.cancelled = True
+        self.thread.join()
+
+
+    # Move the strips found since the last call into the mesh, and add
+    # them to the 'links' batch if it's built.  Once the worker has
+    # stopped and every strip is collected, marks the mesh as having
+    # strips, caches them and has the 'links' batch rebuilt.
+
+    def collect( self ):
+
+        if self.done:
+            return
+
+        stopped = self.stopped # read before taking the strips, so none come after it
+
+        with self.lock:
+            strips, self.pending = self.pending, []
+
+        if strips:
+
+            tris  = np.array( [ t for strip in strips for t in strip ], dtype=np.int64 )
+            first = np.array( [ t for strip in strips for t in strip[:-1] ], dtype=np.int64 )
+            last  = np.array( [ t for strip in strips for t in strip[1:] ], dtype=np.int64 )
+
+            self.mesh.nextTri[first] = last
+            self.mesh.prevTri[last]  = first
+            self.onStrip[tris]       = True
+
+            self.numOnStrip += len(tris)
+            self.numStrips  += len(strips)
+
+            if 'links' in batches:
+                batches['links'] += linkBatches( self.mesh, tris )
+                if len(batches['links']) > maxLinkBatches:
+                    batches['links'] = mergeBatches( batches['links'] )
+
+        if stopped and not self.pending:
+
+            self.done = True
+            print( 'Generated %d tristrips%s' % (self.numStrips, ' (cancelled)' if self.cancelled else '') )
+
+            invalidate( 'links' ) # rebuilt as one batch of arrows and one of dots
+
+            if not self.cancelled:
+                self.mesh.hasStrips = True
+                if self.cachePath is not None:
+                    try:
+                        writeMeshCache( self.mesh, self.cachePath, self.cacheKey )
+                    except OSError as e:
+                        print( 'Warning: could not write cache: %s' % e )
+
+
+    def fraction( self ):
+
+        return self.numOnStrip / float( max( len(self.mesh), 1 ) )
 
-def turn( a, b, c ):
 
-    det = (a[0]-c[0]) * (b[1]-c[1]) - (b[0]-c[0]) * (a[1]-c[1])
 
-    if det > 0:
-        return LEFT_TURN
-    elif det < 0:
-        return RIGHT_TURN
-    else:
-        return COLLINEAR
-
-# ================================================================
-
-#   BELOW ARE A SET OF FUNCTIONS TO CONSTRUCT THE LARGEST SET OF
-#   TRIANGLE STRIPS WITH EACH TRIANGLE ON A STRIP WITHIN THE MESH
-#   THIS WAS ACCOMPLISHED THROUGH DEFINING FUNCTIONS SUCH AS:
-#   1. compareAdjTri
-#   2. buildTristrip
-#   3. searchAdjTri
-
-   # After no adjacent triangle can be added, start with another
-   # triangle that is not a strip yet, and build a strip from there.
-
-# ================================================================
-# compareAdjTri function
-# ================================================================
-def compareAdjTri(triangle): # compareAdjTri function with parameter triangle
-    compare_val = 0 # set as 0 for initialization, used for sorting
-    # below is for loop and if statement to check if best option 
-    for current_Tri in triangle.adjTris:    # for loop, checks if in. used when called from build to compare
-        if current_Tri.prevTri == None:     # triangle passed in in relation to array defined after
-            if current_Tri.nextTri == None: # increment if nextTri not None, what we want
-                compare_val = (compare_val + 1) # increments
-            if current_Tri.nextTri != None: 
-                compare_val # does not increment if nextTri not None
-    return compare_val  # needed to satisfy call from build
-
-# ================================================================
-# buildTristrips function
-# ================================================================
-def buildTristrips(triangles):  # buildTristrips function with parameter triangles
-    not_stripTri = triangles  
-    cnt = 0   #initialize cnt as 0
-    if len(not_stripTri) <= 0:  # error check, length of non_stripTri should be > 0
-        print('Error' % cnt)
-
-    while len(not_stripTri) > 0:   # should be true, executes build function
-        triangle = not_stripTri[0] 
-        compare_val_set1 = 0;
-        compare_val_set2 = 0;
-        compare_val_set1 = (set(not_stripTri)) # temporary set stored of not_stripTri
-
-         # find an adjacent triangle that is not yet on
-         # a strip and add it to the strip of the current triangle by setting
-         # the 'nextTri' and 'prevTri' pointers appropriately.
-        unused_adjTri = (searchAdjTri(triangle)) #
-        triangle_onStrip = [triangle]
-
-        # triangle strips built by setting the 'nextTri' and 'prevTri'
-        # pointers of each triangle, forming doubly-linked list of the
-        # triangles on each strip.
-
-        while unused_adjTri != 0: # nested while for while unused adjacent tri's aren't 0, set pos
-
-        # the triangles next triangle is an unused adjacent triangle which has the least number of adjTri
-        # then it moves to that adjacent triangle and repeats
-            temp_var = triangle
-            temp_var.nextTri = (unused_adjTri)  
-            # First Step - prev tri assigned to current
-            (unused_adjTri).prevTri = temp_var 
-
-            # Second Step - next tri assigned to current
-            temp_var = (unused_adjTri)
-            triangle = temp_var
-            triangle_onStrip.append(unused_adjTri) # add to list
-            unused_adjTri = searchAdjTri(triangle) # call searchAdjTri to find adj's value
-            # END OF WHILE
-        # First while still in process
-        compare_val_set2 = (set(triangle_onStrip)) 
-        not_stripTri = (compare_val_set1 - compare_val_set2); # final set calculated
-        not_stripTri = list(not_stripTri) # makes list from set and assigns to not_stripTri
-
-        # key parameter to specify the function compareAdjTri to be called on each list element prior to making comparisons
-        not_stripTri = sorted(not_stripTri, # sorts list to determine smallest value since Tri with fewer than three adjacent
-        key = compareAdjTri) # non-strip triangles are in a corner (1 adjacent) or an edge (2 adjacent) and are likely to become the end triangle in some strip.
-        cnt = (cnt + 1);  # increment 'cnt' every time new triStrip.
-
-        print('Generated %d tristrips' % (cnt+1)) # print to trml, count was incremented
-
-# ================================================================
-# searchAdjTri function
-# ================================================================
-def searchAdjTri(triangle): # searchAdjTri function with parameter triangles
-    adjTri = []  # arr storing adjTri
-    # same as compare for loop
-    for current_Tri in triangle.adjTris:    # for loop used when called from build to search
-        if current_Tri.nextTri == None:     # if both equal none:
-            if current_Tri.prevTri == None:   # adds to list stated above if prevTri, nextTri = None.
-                adjTri.append(current_Tri)    
-    if not adjTri:  
-        if current_Tri.prevTri != None: # checks if not a Tri with adjacents
-            if current_Tri.nextTri != None: # double checks prevTri and nextTri != None
-                return False
-    else:   # if not a Tri with adjacents or a current_Tri in triangle.adjTris,
-        temp_Adj = sorted(adjTri,    # assigns sorted elements to temp variable
-        key = compareAdjTri)
-        sortedAdj = temp_Adj    # same as buildTri function
-        return (sortedAdj[0])   # returns ret[0] from adj being sorted by funcion compareAdjTri
-
-# ================================================================
-#def searchAdjTri2(triangle): # searchAdjTri function with parameter triangles
-
-    #    temp_Adj = sorted(adjTri,    # assigns sorted elements to temp variable
-    #    key = compareAdjTri)
-    #    sortedAdj = temp_Adj    # same as buildTri function
-    #    return (sortedAdj[0])   # returns ret[0] from adj being sorted by funcion compareAdjTri
-        
 # Set up the display and draw the current image
 
 windowLeft   = None
@@ -319,10 +402,16 @@ def display( wait=False ):
 
     global lastKey, windowLeft, windowRight, windowBottom, windowTop
     
-    # Handle any events that have occurred
+    # Handle any events that have occurred, and show any strips built
+    # since the last redraw
 
     glfw.poll_events()
 
+    if build is not None and not build.done:
+        build.collect()
+        glfw.set_window_title( window, windowTitle if build.done else
+                               '%s - building strips: %d%%' % (windowTitle, 100 * build.fraction()) )
+
     # Set up window
 
     glClearColor( 1,1,1,0 )
@@ -348,20 +437,18 @@ def display( wait=False ):
 
     glOrtho( windowLeft, windowRight, windowBottom, windowTop, 0, 1 )
 
-    # Draw triangles
+    # Draw triangles and the pointers between them
 
-    for tri in allTriangles:
-        tri.draw()
+    with profiler.phase( 'render' ):
 
-    # Draw pointers.  Do this *after* the triangles (above) so that the
-    # triangle drawing doesn't overlay the pointers.
+        drawBatches( mesh )
 
-    for tri in allTriangles:
-        tri.drawPointers()
+        if build is not None and not build.done:
+            drawProgress( build.fraction() )
 
-    # Show window
+        # Show window
 
-    glfw.swap_buffers( window )
+        glfw.swap_buffers( window )
 
     # Maybe wait until the user presses 'p' to proceed
     
@@ -372,7 +459,10 @@ def display( wait=False ):
 
         lastKey = None
         while lastKey != 80: # wait for 'p'
-            glfw.wait_events()
+            if build is not None and not build.done:
+                glfw.wait_events_timeout( 0.05 ) # keep showing strips as they're built
+            else:
+                glfw.wait_events()
             display()
 
         sys.stderr.write( '\r                     \r' )
@@ -389,10 +479,14 @@ def keyCallback( window, key, scancode, action, mods ):
     
     if action == glfw.PRESS:
     
-        if key == glfw.KEY_ESCAPE: # quit upon ESC
-            sys.exit(0)
+        if key == glfw.KEY_ESCAPE: # cancel building strips, or quit, upon ESC
+            if build is not None and not build.stopped:
+                build.cancel()
+            else:
+                sys.exit(0)
         elif key == ord('F'): # toggle forward/backward link display
             showForwardLinks = not showForwardLinks
+            invalidate( 'links' )
         else:
             lastKey = key
 
@@ -423,146 +517,56 @@ def mouseButtonCallback( window, btn, action, keyModifiers ):
         wx = (x-0)/float(windowWidth)  * (windowRight-windowLeft) + windowLeft
         wy = (windowHeight-y)/float(windowHeight) * (windowTop-windowBottom) + windowBottom
 
-        selectedTri = None
-        for tri in allTriangles:
-            if tri.containsPoint( [wx, wy] ):
-                selectedTri = tri
-                break
+        selectedTri = grid.findTriangle( [wx, wy] )
 
         # print triangle, toggle its highlight1, and toggle the highlight2s of its adjacent triangles
 
-        if selectedTri:
-            selectedTri.highlight1 = not selectedTri.highlight1
-            print( '%s with adjacent %s' % (selectedTri, repr(selectedTri.adjTris)) )
-            for t in selectedTri.adjTris:
-                t.highlight2 = not t.highlight2
-
-
-# Read triangles from a file
-
-def readTriangles( f ):
-
-    global allVerts
-    
-    errorsFound = False
-    
-    lines = f.readlines()
-
-    # Read the vertices
-    
-    numVerts = int( lines[0] )
-    allVerts = [ [float(c) for c in line.split()] for line in lines[1:numVerts+1] ]
-
-    # Check that the vertices are valid
-
-    for l,v in enumerate(allVerts):
-        if len(v) != 2:
-            print( 'Line %d: vertex does not have two coordinates.' % (l+2) )
-            errorsFound = True
-
-    # Read the triangles
-
-    numTris = int( lines[numVerts+1] )
-    triVerts =  [ [int(v) for v in line.split()] for line in lines[numVerts+2:] ]
-
-    # Check that the triangle vertices are valid
+        if selectedTri is not None:
+            mesh.highlight1[selectedTri] = not mesh.highlight1[selectedTri]
+            print( '%s with adjacent [%s]' % (mesh.triName(selectedTri),
+                                              ', '.join( mesh.triName(t) for t in mesh.adjTris(selectedTri) )) )
+            for t in mesh.adjTris(selectedTri):
+                mesh.highlight2[t] = not mesh.highlight2[t]
+            invalidate( 'fills' )
 
-    for l,tvs in enumerate(triVerts):
-        if len(tvs) != 3:
-            print( 'Line %d: triangle does not have three vertices.' % (l+2+numVerts) )
-            errorsFound = True
-        else:
-            for v in tvs:
-                if v < 0 or v >= numVerts:
-                    print( 'Line %d: Vertex index is not in range [0,%d].' % (l+2+numVerts,numVerts-1) )
-                    errorsFound = True
-
-    # Build triangles
-
-    tris = []
-
-    for tvs in triVerts:
-        theseVerts = tvs
-        if turn( allVerts[tvs[0]], allVerts[tvs[1]], allVerts[tvs[2]] ) != COLLINEAR:
-          tris.append( Triangle( tvs ) ) # (don't include degenerate triangles)
-
-    # For each triangle, find and record its adjacent triangles
-    #
-    # This would normally take O(n^2) time if done by brute force, so
-    # we'll exploit Python's hashed dictionary keys.
-
-    if False:
-
-        for tri in tris: # brute force
-            adjTris = []
-            for i in range(3):
-                v0 = tri.verts[i % 3]
-                v1 = tri.verts[(i+1) % 3]
-                for tri2 in tris:
-                    for j in range(3):
-                        if v1 == tri2.verts[j % 3] and v0 == tri2.verts[(j+1) % 3]:
-                            adjTris.append( tri2 )
-                    if len(adjTris) == 3:
-                        break
-            tri.adjTris = adjTris
-
-    else: # hashing
-      
-        edges = {}
-
-        for tri in tris:
-            for i in range(3):
-                v0 = tri.verts[i % 3]
-                v1 = tri.verts[(i+1) % 3]
-                key = '%f-%f' % (v0,v1)
-                edges[key] = tri
-
-        for tri in tris:
-            adjTris = []
-            for i in range(3):
-                v1 = tri.verts[i % 3] # find a reversed edge of an adjacent triangle
-                v0 = tri.verts[(i+1) % 3]
-                key = '%f-%f' % (v0,v1)
-                if key in edges:
-                    adjTris.append( edges[key] )
-                if len(adjTris) == 3:
-                    break
-            tri.adjTris = adjTris
-
-    print( 'Read %d points and %d triangles' % (numVerts,numTris) )
-
-    if errorsFound:
-        return []
-    else:
-        return tris
-
-        
-    
 # Initialize GLFW and run the main event loop
 
 def main():
 
-    global window, allTriangles, minX, maxX, minY, maxY, r
+    global window, mesh, grid, build, minX, maxX, minY, maxY, r
     
     # Check command-line args
 
     if len(sys.argv) < 2:
-        print( 'Usage: %s filename' % sys.argv[0] )
+        print( 'Usage: %s [-n] [-P profile] filename' % sys.argv[0] )
+        print( '       -n  ignore the binary cache and rebuild the strips' )
+        print( '       -P  write a profile of each phase to this file (.json, or .folded for flame graphs)' )
         sys.exit(1)
 
+    useCache = True
+    profile  = None
+
     args = sys.argv[1:]
     while len(args) > 1:
-        # if args[0] == '-x':
-        #     pass
+        if args[0] == '-n':
+            useCache = False
+        elif args[0] == '-P' and len(args) > 2:
+            profile = args[1]
+            args = args[1:]
         args = args[1:]
 
+    if profile is not None:
+        profiler.enable()
+
     # Set up window
+
+    loadGL()
   
     if not glfw.init():
         print( 'Error: GLFW failed to initialize' )
         sys.exit(1)
 
-    window = glfw.create_window( windowWidth, windowHeight, "Assignment 2", None, None )
+    window = glfw.create_window( windowWidth, windowHeight, windowTitle, None, None )
 
     if not window:
         glfw.terminate()
@@ -575,20 +579,19 @@ def main():
     glfw.set_window_size_callback( window, windowReshapeCallback )
     glfw.set_mouse_button_callback( window, mouseButtonCallback )
 
-    # Read the triangles.  This also fills in the global 'allVerts'.
+    # Read the triangles
 
-    with open( args[0], 'rb' ) as f:
-        allTriangles = readTriangles( f )
+    mesh = loadMesh( args[0], useCache )
 
-    if allTriangles == []:
+    if mesh is None or len(mesh) == 0:
         return
 
+    grid = TriangleGrid( mesh )
+
     # Get bounding box of points
 
-    minX = min( p[0] for p in allVerts )
-    maxX = max( p[0] for p in allVerts )
-    minY = min( p[1] for p in allVerts )
-    maxY = max( p[1] for p in allVerts )
+    minX, minY = mesh.verts.min( axis=0 ).tolist()
+    maxX, maxY = mesh.verts.max( axis=0 ).tolist()
 
     # Adjust point radius in proportion to bounding box
     
@@ -597,16 +600,30 @@ def main():
     else:
         r *= maxY-minY
 
-    # Run the code
+    # Build the strips in the background, unless they came from the
+    # cache.  They are saved in the cache for next time when done.
     
-    buildTristrips( allTriangles )
+    if not mesh.hasStrips:
+
+        if useCache:
+            build = BackgroundBuild( mesh, cachePath=args[0] + '.cache', cacheKey=fileHash( args[0] ) )
+        else:
+            build = BackgroundBuild( mesh )
+
+        invalidate( 'links' )
 
     # Show result and wait to exit
 
     display( wait=True )
+
+    if build is not None and not build.stopped:
+        build.cancel()
     
     glfw.destroy_window( window )
     glfw.terminate()
+
+    if profile is not None:
+        profiler.writeReport( profile )
     
 
 
@@ -10,28 +10,52 @@ haveGlutForFonts = False  # Set to True if you have installed OpenGL GLUT so tha
                           # This is NOT necessary for the assignment, but can help with debugging.
 
 
-import sys, os, math, enum, pprint
+import sys, os, time, math, pprint
 
-try: # PyOpenGL
-    from OpenGL.GL import *
-    from OpenGL.GLU import *
-except:
-    print( 'Error: PyOpenGL has not been installed.' )
-    sys.exit(0)
+from slicemesh import buildTriangles, buildAllTriangles, readSlices, add, scalarMult, crossProduct, normalize, rotateVector
 
-try: # GLFW
-    import glfw
-except:
-    print( 'Error: GLFW has not been installed.' )
-    sys.exit(0)
+# The slices, vertices, triangles and the min-area triangulation are
+# in slicemesh.py, which doesn't need OpenGL.  OpenGL and GLFW are
+# only loaded by loadGL() when the window is opened.
 
 
-if haveGlutForFonts:
-    try: # GLUT
-      from OpenGL.GLUT import *
+# Load OpenGL, GLU and GLFW (and GLUT if wanted).  The GL names are
+# put in this module's globals, just as 'from OpenGL.GL import *'
+# would.
+
+def loadGL():
+
+    global glfw
+
+    try: # PyOpenGL
+        import OpenGL.GL, OpenGL.GLU
+    except:
+        print( 'Error: PyOpenGL has not been installed.' )
+        sys.exit(0)
+
+    try: # GLFW
+        import glfw
     except:
-      print( 'Error: Could not import OpenGL.GLUT.  Set haveGlutForFonts = False unless you can install GLUT.' )
-      sys.exit(0)
+        print( 'Error: GLFW has not been installed.' )
+        sys.exit(0)
+
+    importStar( OpenGL.GL )
+    importStar( OpenGL.GLU )
+
+    if haveGlutForFonts:
+        try: # GLUT
+          import OpenGL.GLUT
+        except:
+          print( 'Error: Could not import OpenGL.GLUT.  Set haveGlutForFonts = False unless you can install GLUT.' )
+          sys.exit(0)
+        importStar( OpenGL.GLUT )
+
+
+def importStar( module ):
+
+    names = getattr( module, '__all__', None ) or [ name for name in dir(module) if not name.startswith('_') ]
+
+    globals().update( (name, getattr( module, name )) for name in names )
 
 
 # Globals
@@ -48,284 +72,34 @@ labelVerts       = False
 labelEdges       = False
 labelTris        = False
 currentSlice     = 0
+workers          = None # processes that triangulate the slice pairs, or None for one per core
+corridor         = None # width of the coarse-to-fine corridor, or None to fill the whole MinArea table
 
 
-# Vertex
 
-class Vertex(object):
-
-    nextID = 0
+# Draw a slice
     
-    def __init__( self, coords ):
-
-        self.coords = coords   # [x,y,z] coordinates
-        self.nextV  = None     # next vertex in order around the slice
-
-        self.id     = Vertex.nextID
-        Vertex.nextID += 1
-
-    def __repr__( self ):
-        return 'v%d' % self.id
-
-  
-# Slice
-#
-# Contains a 'verts' list, each item of which is a 3D vertex as [x,y,z]
-
-class Slice(object):
-
-    nextID = 0
-    
-    def __init__( self, verts ):
-
-        self.verts     = verts  # [ v0, v1, v2, v3, ... ] in RH order around +y axis
-
-        self.id        = Slice.nextID
-        Slice.nextID += 1
-
-    def __repr__( self ):
-        return 's%d' % self.id
-
-    # Draw this slice
-    
-    def draw(self):
-
-        glColor3f( 0, 0, 0 );
-
-        # Draw points
-        
-        # glBegin( GL_POINTS )
-        # for v in self.verts:
-        #     glVertex3fv( v.coords )
-        # glEnd()
-
-        # Draw segments that fade from dark (0,0,0) at tail to light
-        # (1,1,1) at head so that direction can been seen.
-
-        glBegin( GL_LINES )
-        for v in self.verts:
-            glColor3f( 0,0,0 )
-            glVertex3fv( v.coords )
-            glColor3f( 1,1,1 )
-            glVertex3fv( v.nextV.coords )
-        glEnd()
-
-
-
-# Triangle
-
-class Triangle(object):
-
-    nextID = 0
-    
-    def __init__( self, verts ):
-
-        self.verts = verts # [ v0, v1, v2 ] is CCW order as seen from outside the object
-        
-        self.norm  = normalize( crossProduct( subtract( verts[1].coords, verts[0].coords ), # outward-pointing normal
-                                              subtract( verts[2].coords, verts[0].coords ) ) )
-
-        self.id    = Triangle.nextID
-        Triangle.nextID += 1
-
-    def __repr__( self ):
-        return 't%d' % self.id
-
-  
-
-
-# Build the triangles between two slices
-#
-# Slice 0 is above (at a higher y) than slice 1.
-#
-# Within each slice, the vertices are ordered in the right-hand
-# direction with respect to the y axis.  That is, when looking from
-# the origin up the positive y axis, the vertices will appear in
-# CLOCKWISE order.
-#
-# When working with vectors, your code will be MUCH cleaner if you use
-# the provided vector functions: add(), subtract(), scalarMult(),
-# dotProduct(), crossProduct(), length(), normalize(), and
-# triangleArea().  USE THESE FUNCTIONS AS NECESSARY.  DO NOT WRITE
-# COMPONENT-WISE OPERATIONS IN YOUR OWN CODE WHERE THESE FUNCTIONS
-# COULD INSTEAD BE USED.  DOING SO WILL CAUSE YOU TO LOSE MARKS.
-
-
-class Dir(enum.Enum): # for storing directions of Min-area
-                      # triangulations in 'MinDir' below.
-    PREV_ROW = 1
-    PREV_COL = 2
-
-
-def buildTriangles( slice0, slice1 ): # function to build triangles
-
-    # Find the closest pair of vertices (one from each slice) to start with.
-    #
-    # This can be done with "brute force" if you wish.
-    #
-    # [1 mark] 
-    # Initializations for simpler code reading
-    S1verts = slice1.verts
-    S0verts = slice0.verts
-    # assigns the length of vertex's minimum distance to dist_Min
-    dist_Min = len((S0verts[0].coords), (S1verts[0].coords))
-    # assigns vertex_Min of slice 1, as min distance to slice 0
-    v_MinS1 = S1verts[0]
-    # assigns vertex_Min of slice 0, as min distance to slice 1
-    v_MinS0 = S0verts[0]
-
-    #for loops to identify min pair
-    for vert in S1verts: #iterate through all vert's in slice 0 classified as vert
-        for vert2 in S1verts: #iterate through all vert's in slice 1 classified as vert2
-            #uses built in fxn subtract to check if iterating length value is less than other using coordinates
-            testVar = len(subtract(vert.coords,vert2.coords))
-            # check if length value is less than other
-            if (testVar)<dist_Min:
-                # assigns to dist_Min, similar to first step, uses length and subtract fxn for coordinates
-                dist_Min = testVar
-                # assigns vert2 value for next cyclic permutation step to v_MinS1 for slice 1
-                v_MinS1 = vert2
-                # assigns vert value for next cyclic permutation step to v_MinS1 for slice 0
-                v_MinS0 = vert
-
-    # Make a cyclic permutation of the vertices of each slice,
-    # that starts at the closest vertex in each slice found above.
-    #
-    # ADD THE FIRST VERTEX TO THE END of the vertices, so that the
-    # triangulation ends up on the same edge as it started.
-    #
-    # [1 mark]
-
-    # indx fxn for S1 vertex 
-    # assigned dist_Min to S0
-    # (Determines start pos)
-    loc_V1 = S1verts.index(v_MinS1)
-    # indx fxn for S0 vertex 
-    # assigned dist_Min to S0 
-    # (Determines start pos)
-    loc_V0 = S1verts.index(v_MinS0)
-    # Constructs cyclic permutation for S1 & S0's
-    # verts = vertices
-    Cyclic_permS1 = ((S1verts[loc_V1:]) + (S1verts[:loc_V1])) #Makes a cyclic permutation of vertices of slice 1    
-    Cyclic_permS0 = ((S1verts[loc_V0:]) + (S1verts[:loc_V0])) #Makes a cyclic permutation of vertices of slice 0
-    # appends vertex for S0 to end of vertices so triangulation ends up on same edge as it started
-    Cyclic_permS0.append(v_MinS0)
-    # appends vertex for S1 to end of vertices so triangulation ends up on same edge as it started
-    Cyclic_permS1.append(v_MinS1)
-
-    # Set up the 'MinArea' array.  The first dimension (rows) of the
-    # array corresponds to vertices in slice1.  The second dimension
-    # (cols) corresponds to vertices in slice0.
-    #
-    # Also set up a 'MinDir' array, which stores Dir.PREV_ROW or
-    # Dir.PREV_COL in each entry [r][c], depending on whether the
-    # Min-area triangulation ending at [r][c] came from the previous
-    # row or previous column.
-    #
-    # [1 mark]
-
-    # Below changes code provided to assign MinArea and MinDir values, 
-    # these uses length of cyclic permutation of the slice for in 
-    # range of other slice. 
-    # 
-    # Constructs an array, establishes MinArea array creates MinArea array with:
-    # first [] corresponds to slice 1 vert, second [] is slice (row, col)
-    for _ in range(len(Cyclic_permS1)): # wont need iterator
-        MinArea = (len(Cyclic_permS0)*[[None]]) 
-    # does the same, for MinDir
-    for _ in range(len(Cyclic_permS1)):
-        MinDir = (len(Cyclic_permS0)*[[None]])
-
-    # Fill in the MinArea array
-    MinArea[0][0] = 0 # Starting edge has zero area
-
-    # Fill in row 0 of MinArea and MinDir, since it's a special case as there's no row -1
-    #
-    # [2 marks]
-
-    # assigned value
-    i = 1
-
-    # Fill in col 0 of MinArea and MinDir, since it's a special case as there's no col -1
-    #
-    # [2 marks]
-
-
-    # [YOUR CODE HERE]
-
-
-    # Fill in col 0 of minArea and minDir, since it's a special case as there's no col -1
-    #
-    # [2 marks]
-    
-
-    # [YOUR CODE HERE]
-
-
-    # Fill in the remaining entries of minArea and minDir.  This is very similar to the above, but more general.
-    #
-    # [2 marks]
-
-
-    # [YOUR CODE HERE]
-
-
-    # It's useful for debugging at this point to print out the minArea
-    # and minDir arrays together.  For example, print a table in which
-    # each element contains the integer minArea and a line (- or |) to
-    # indicate from which direction the previous min-area came from.
-    #
-    # My own code prints the following for the testSlices.dat input:
-    #
-    #   (THIS IS CORRECTED FROM THE ORIGINAL OUTPUT; SEE THE Piazza THREAD ON THIS.)
-    #
-    #               0       1       2       3       4
-    #
-    #       0       0 .    90 -   557 -  1023 -  1113 -
-    #       1      90 |   210 -   330 -   805 -  1203 |
-    #       2     549 |   330 |   480 -   630 -  1097 -
-    #       3    1008 |   796 |   630 |   750 -   870 -
-    #       4    1098 |  1188 -  1104 |   870 |   960 - 
-    #
-    # The 960 at row, column [4][4] is the minium area.  The hypen (-)
-    # at [4][4] indicates that that minimum area is arrived at from
-    # the previous column.  Then, in row, column [4][3], the vertical
-    # bar (|) indicates that that is arrived at from the previous row.
-    # This continues until reaching [0][0].
-    #
-    # This is for your debugging, if you wish.  It's not required, but
-    # is strongly recommended.
-    #
-    # [0 marks]
+def drawSlice( slice ):
 
+    glColor3f( 0, 0, 0 );
 
-    # [YOUR CODE HERE, OPTIONALLY]
-
+    # Draw points
     
-    # Walk backward through the 'minDir' array to build triangulation.
-    #
-    # Start at the maximum r,c indices and go backward, depending
-    # on whether minDir[r][c] is Dir.PREV_ROW or Dir.PREV_COL.
-    #
-    # For each step backward, construct a triangle from the three
-    # vertices: Two of the vertices are indexed by r (which comes from
-    # slice1) and c (which comes from slice0).  The remaining vertex
-    # depends on which direction (PREV_ROW or PREV_COL) you stepped
-    # backward toward.
-    #
-    # Continue going backward through the array until reaching [0][0].
-    #
-    # [3 marks]
-
-    triangles = []
-
-
-    # [YOUR CODE HERE]
+    # glBegin( GL_POINTS )
+    # for v in slice.verts:
+    #     glVertex3fv( v.coords )
+    # glEnd()
 
+    # Draw segments that fade from dark (0,0,0) at tail to light
+    # (1,1,1) at head so that direction can been seen.
 
-    # Return a list of the triangles that you constructed
-    
-    return triangles
+    glBegin( GL_LINES )
+    for v in slice.verts:
+        glColor3f( 0,0,0 )
+        glVertex3fv( v.coords )
+        glColor3f( 1,1,1 )
+        glVertex3fv( v.nextV.coords )
+    glEnd()
 
 
 
@@ -395,7 +169,7 @@ def display( wait=False ):
 
     if allTriangles == []:
         for slice in slicesToDraw:
-            slice.draw() # draws the EDGES of each slice
+            drawSlice( slice ) # draws the EDGES of each slice
 
     # Set up lighting for triangles
 
@@ -499,14 +273,14 @@ def keyCallback( window, key, scancode, action, mods ):
         elif key == ord('C'): # compute min-area triangulation
 
             if showCurrentSlice:
-                allTriangles = buildTriangles( allSlices[currentSlice], allSlices[currentSlice+1] )
+                allTriangles = buildTriangles( allSlices[currentSlice], allSlices[currentSlice+1], corridor )
             else:
-                allTriangles = []
-                for i in range(len(allSlices)-1):
-                    sys.stdout.write( '\r%d left ' % (len(allSlices)-1-i) )
-                    sys.stdout.flush();
-                    allTriangles += buildTriangles( allSlices[i], allSlices[i+1] )
-                sys.stdout.write( '\r          \n' )
+                start = time.perf_counter()
+                allTriangles, seconds = buildAllTriangles( allSlices, workers, corridor )
+                if seconds: # none if there are fewer than two slices
+                    slowest = max( range(len(seconds)), key=lambda i: seconds[i] )
+                    print( 'Triangulated %d slice pairs in %.2f s (%.3f s per pair, slowest pair %d-%d %.3f s)' %
+                           (len(seconds), time.perf_counter() - start, sum(seconds) / len(seconds), slowest, slowest+1, seconds[slowest]) )
             
         elif key == ord('S'): # show current slice
             showCurrentSlice = not showCurrentSlice
@@ -678,132 +452,33 @@ def actOnMouseMovement( window, button, x, y ):
 
 
 
-# Some vector functions (to avoid having to install NumPy)
-
-
-def add( v0, v1 ):
-
-    return [ v0[0]+v1[0], v0[1]+v1[1], v0[2]+v1[2] ]
-
-
-def subtract( v0, v1 ):
-
-    return [ v0[0]-v1[0], v0[1]-v1[1], v0[2]-v1[2] ]
-
-
-def scalarMult( k, v ):
-
-    return [ k*v[0], k*v[1], k*v[2] ]
-
-              
-def dotProduct( v0, v1 ):
-
-    return v0[0]*v1[0] + v0[1]*v1[1] + v0[2]*v1[2]
-
-
-def crossProduct( v0, v1 ):
-
-    return [ v0[1]*v1[2] - v0[2]*v1[1], v0[2]*v1[0] - v0[0]*v1[2], v0[0]*v1[1] - v0[1]*v1[0] ]
-
-
-def length( v ):
-
-    return math.sqrt( v[0]*v[0] + v[1]*v[1] + v[2]*v[2] )
-
-
-def normalize( v ):
-
-    d = length( v )
-
-    if d > 0.0001:
-        return [ v[0]/d, v[1]/d, v[2]/d ]
-    else:
-        return v
-
-
-def triangleArea( v0, v1, v2 ):
-
-    return 0.5 * length( crossProduct( subtract( v1, v0 ), subtract( v2, v0 ) ) )
-
-
-def rotateVector( v, angle, axis ): # rotate v by angle about axis (axis must be unit length)
-
-    cosAngle = math.cos(angle)
-    sinAngle = math.sin(angle)
-
-    cross = crossProduct( axis, v )
-    dot   = dotProduct( axis, v ) * (1 - cosAngle)
-
-
-    return [ v[0] * cosAngle + cross[0] * sinAngle + axis[0] * dot,
-             v[1] * cosAngle + cross[1] * sinAngle + axis[1] * dot,
-             v[2] * cosAngle + cross[2] * sinAngle + axis[2] * dot ]
-
-
-
-# Read slices from a file
-#
-# Format:   numSlices
-#           numPointsInSlice0
-#           point0-0
-#           point0-1
-#           point0-2
-#           ...
-#           numPointsInSlice1
-#           point1-0
-#           point1-1
-#           point1-2
-#           ...
-#
-# Each 'pointA-B' above is 'x y z' separated by spaces.
-
-def readSlices( f ):
-
-    lines = f.readlines()
-
-    numSlices = int(lines[0])
-    slices = []
-    lineNum = 1
-
-    for i in range(numSlices):
-
-        numPoints = int(lines[lineNum])
-        lineNum += 1
-
-        slice = Slice( [ Vertex( [ float(n) for n in line.split() ] )
-                         for line in lines[lineNum:lineNum+numPoints] ] )
-
-        for v0,v1 in zip( slice.verts, slice.verts[1:] + [slice.verts[0]] ):
-            v0.nextV = v1
-
-        slices.append( slice )
-        lineNum += numPoints
-
-    slices.reverse() # so that first slice is on top
-
-    return slices
-
-
-    
 # Initialize GLFW and run the main event loop
 
 def main():
 
-    global window, allSlices, mousePositionChanged
+    global window, allSlices, mousePositionChanged, workers, corridor
     
     # Check command-line args
 
     if len(sys.argv) < 2:
-        print( 'Usage: %s filename' % sys.argv[0] )
+        print( 'Usage: %s [-w workers] [-c width] filename' % sys.argv[0] )
+        print( '       -w  processes that triangulate the slice pairs (default: one per core)' )
+        print( '       -c  triangulate coarse to fine, within a corridor this wide, for slices that are much alike' )
         sys.exit(1)
 
     args = sys.argv[1:]
     while len(args) > 1:
-        # if args[0] == '-x':
-        #     pass
+        if args[0] == '-w' and len(args) > 2:
+            workers = int( args[1] )
+            args = args[1:]
+        elif args[0] == '-c' and len(args) > 2:
+            corridor = int( args[1] )
+            args = args[1:]
         args = args[1:]
 
     # Set up window
+
+    loadGL()
   
     if not glfw.init():
         print( 'Error: GLFW failed to initialize' )
@@ -0,0 +1,87 @@
+# Import-time budget for the core modules
+#
+# Usage: python benchimport.py [-b budget_ms] [-r runs]
+#
+# Imports each core module (tristrips, slicemesh and PyGL_1) in a
+# fresh Python process, 'runs' times, and reports the fastest import.
+# Worker processes pay this cost on every job, so it is kept within a
+# budget.  Exits with status 1 if any core module takes longer than
+# the budget (200 ms by default) or loads OpenGL or GLFW.
+
+
+import sys, os, subprocess
+
+
+coreModules = [ 'tristrips', 'slicemesh', 'PyGL_1' ]
+
+# Run in the child process.  Prints the import time in milliseconds
+# and whether any GL module got loaded along the way.
+
+timingCode = '''
+import sys, time
+start = time.perf_counter()
+import %s
+elapsed = time.perf_counter() - start
+print( elapsed * 1000.0, any( m.split('.')[0] in ('OpenGL','glfw') for m in sys.modules ) )
+'''
+
+
+# Time one import of 'module' in a fresh interpreter.  Returns
+# (milliseconds, loadedGL).
+
+def timeImport( module ):
+
+    here = os.path.dirname( os.path.abspath( __file__ ) )
+
+    out = subprocess.run( [ sys.executable, '-c', timingCode % module ],
+                          cwd=here, capture_output=True, text=True, check=True ).stdout.split()
+
+    return float( out[0] ), out[1] == 'True'
+
+
+
+def main():
+
+    budget = 200.0 # milliseconds
+    runs   = 5
+
+    args = sys.argv[1:]
+    while len(args) > 1:
+        if args[0] == '-b':
+            budget = float( args[1] )
+        elif args[0] == '-r':
+            runs = int( args[1] )
+        args = args[2:]
+
+    failed = False
+
+    for module in coreModules:
+
+        times    = []
+        loadedGL = False
+
+        for i in range(runs):
+            ms, gl = timeImport( module )
+            times.append( ms )
+            loadedGL = loadedGL or gl
+
+        best = min( times )
+
+        if best > budget:
+            status = 'OVER BUDGET'
+            failed = True
+        elif loadedGL:
+            status = 'LOADS OPENGL'
+            failed = True
+        else:
+            status = 'ok'
+
+        print( '%-10s %8.1f ms  (budget %.0f ms)  %s' % (module, best, budget, status) )
+
+    if failed:
+        sys.exit(1)
+
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+# Speedup of the parallel strip builder
+#
+# Usage: python benchparallel.py [-s regionSize] [-w workers,...] [-k maxPieces] file_of_triangles
+#
+# Builds the strips of the file with the serial builder and then with
+# the parallel builder for each number of worker processes (1, 2, 4,
+# ... up to the number of cores by default).  Reports the wall-clock
+# time and speedup over the serial build, and how many more strips
+# the parallel build makes, since strips are cut at region boundaries
+# and not all of them can be joined again.
+#
+# Also checks that the regions are compact patches of the mesh: each
+# region is split into the pieces that are connected within it, and
+# the pieces beyond one per mesh component in the region are counted.
+# Exits with status 1 if any region has more than 'maxPieces' (8 by
+# default) such extra pieces, since every piece adds seams and so
+# strips.
+
+
+import sys, os, io, time, contextlib
+
+import numpy as np
+
+import tristrips
+
+
+def timeBuild( path, build ):
+
+    mesh = tristrips.loadMesh( path, useCache=False )
+
+    with contextlib.redirect_stdout( io.StringIO() ): # the serial builder prints every strip
+        start = time.perf_counter()
+        build( mesh )
+        elapsed = time.perf_counter() - start
+
+    return elapsed, len( mesh.strips() )
+
+
+
+# Number of pieces of each region beyond one per mesh component in the
+# region, where a piece is a set of triangles connected within the
+# region
+
+def extraPieces( path, regionSize ):
+
+    mesh = tristrips.loadMesh( path, useCache=False )
+
+    order, regions = tristrips.meshRegions( mesh, regionSize )
+
+    region = np.empty( len(mesh), dtype=np.int64 )
+    for r,(start,end) in enumerate( regions ):
+        region[order[start:end]] = r
+
+    a, i = np.nonzero( mesh.adj >= 0 )
+    b    = mesh.adj[a,i].astype( np.int64 )
+    keep = (a < b) & (region[a] == region[b])
+
+    pieces     = tristrips.unionFind( len(mesh), a[keep], b[keep] )
+    components = tristrips.connectedComponents( mesh.adj )
+
+    def perRegion( labels ): # number of distinct labels in each region
+        pairs = np.unique( np.stack( (region, labels) ), axis=1 )
+        return np.bincount( pairs[0], minlength=len(regions) )
+
+    return perRegion( pieces ) - perRegion( components )
+
+
+
+def main():
+
+    regionSize = 50000
+    cores      = os.cpu_count() or 1
+    workerList = [ 1 << i for i in range( cores.bit_length() ) ] + ([cores] if cores & (cores-1) else [])
+    maxPieces  = 8
+
+    args = sys.argv[1:]
+    while len(args) > 2:
+        if args[0] == '-s':
+            regionSize = int( args[1] )
+        elif args[0] == '-w':
+            workerList = [ int(w) for w in args[1].split(',') ]
+        elif args[0] == '-k':
+            maxPieces = int( args[1] )
+        args = args[2:]
+
+    if len(args) != 1:
+        print( 'Usage: %s [-s regionSize] [-w workers,...] [-k maxPieces] file_of_triangles' % sys.argv[0] )
+        sys.exit(1)
+
+    path = args[0]
+
+    serialTime, serialStrips = timeBuild( path, tristrips.buildTristrips )
+
+    print( '%d cores, regions of up to %d triangles' % (cores, regionSize) )
+    print( 'serial       %8.3f s             %8d strips' % (serialTime, serialStrips) )
+
+    for workers in workerList:
+
+        elapsed, strips = timeBuild( path, lambda mesh: tristrips.buildTristripsParallel( mesh, workers, regionSize ) )
+
+        print( '%2d workers   %8.3f s  (x%5.2f)   %8d strips  (%+.1f%%)' %
+               (workers, elapsed, serialTime / elapsed, strips, 100.0 * (strips - serialStrips) / max( serialStrips, 1 )) )
+
+    extra = extraPieces( path, regionSize )
+
+    print( '%d regions, extra pieces per region: mean %.2f, max %d (allowed %d)' %
+           (len(extra), extra.mean() if len(extra) else 0.0, extra.max( initial=0 ), maxPieces) )
+
+    if extra.max( initial=0 ) > maxPieces:
+        print( 'Regions are not compact' )
+        sys.exit(1)
+
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,179 @@
+# Speed of the min-area triangulation between two slices
+#
+# Usage: python benchslices.py [-n points,...] [-c width] [-s seed]
+#
+# Makes pairs of slices, each a jittered ellipse with the given number
+# of points (100, 300 and 1000 by default), and finds the min-area
+# triangulation of each pair two ways:
+#
+#   python  filling the MinArea table one cell at a time with
+#           triangleArea(), as a plain dynamic program does
+#   numpy   minAreaPath() in slicemesh.py
+#
+# Reports the time of each (the best of three runs for numpy, as the
+# first pays for mapping in the memory of its tables) and the speedup,
+# and checks that both give the same minimum area and the same path back
+# through the table.
+#
+# Then finds it coarse to fine with corridorPath(), within a corridor
+# 'width' wide (16 by default), and reports its time, how much more
+# area it gives than the exact min-area path, and the fraction of the
+# cells of the table it filled.
+#
+# Also times finding the closest pair of vertices between the slices,
+# by brute force over all pairs and with closestPair() in slicemesh.py,
+# and checks that both find the same pair.
+
+
+import sys, time, math
+
+import numpy as np
+
+import slicemesh
+from slicemesh import Dir, Slice, Vertex, triangleArea, length, subtract
+
+
+# A slice of 'n' points around the y axis at height 'y', in the
+# right-hand order that readSlices() gives
+
+def ellipse( n, y, rng ):
+
+    angles = np.sort( rng.uniform( 0, 2*np.pi, n ) )
+    radius = 1.0 + rng.uniform( -0.1, 0.1, n )
+
+    return np.column_stack( (2.0 * radius * np.cos( angles ), np.full( n, y ), -radius * np.sin( angles )) )
+
+
+# The closest pair of vertices by brute force, keeping the first of
+# equally close pairs
+
+def bruteClosestPair( slice0, slice1 ):
+
+    best = (math.inf, 0, 0)
+
+    for i,v0 in enumerate( slice0.verts ):
+        for j,v1 in enumerate( slice1.verts ):
+            dist = length( subtract( v0.coords, v1.coords ) )
+            if dist < best[0]:
+                best = (dist, i, j)
+
+    return best[1], best[2]
+
+
+# The MinArea table filled one cell at a time
+
+def pythonFill( coords0, coords1 ):
+
+    coords0 = coords0.tolist()
+    coords1 = coords1.tolist()
+
+    rows = len(coords1)
+    cols = len(coords0)
+
+    minArea = [ [0.0] * cols for r in range(rows) ]
+    minDir  = [ [None] * cols for r in range(rows) ]
+
+    for c in range( 1, cols ):
+        minArea[0][c] = minArea[0][c-1] + triangleArea( coords0[c-1], coords0[c], coords1[0] )
+        minDir[0][c]  = Dir.PREV_COL
+
+    for r in range( 1, rows ):
+        minArea[r][0] = minArea[r-1][0] + triangleArea( coords1[r-1], coords1[r], coords0[0] )
+        minDir[r][0]  = Dir.PREV_ROW
+
+    for r in range( 1, rows ):
+        for c in range( 1, cols ):
+            viaRow = minArea[r-1][c] + triangleArea( coords1[r-1], coords1[r], coords0[c] )
+            viaCol = minArea[r][c-1] + triangleArea( coords0[c-1], coords0[c], coords1[r] )
+            if viaRow < viaCol:
+                minArea[r][c], minDir[r][c] = viaRow, Dir.PREV_ROW
+            else:
+                minArea[r][c], minDir[r][c] = viaCol, Dir.PREV_COL
+
+    return minArea, minDir
+
+
+# The path back through a filled MinDir table, as minAreaPath() gives it
+
+def walk( minDir ):
+
+    r     = len(minDir) - 1
+    c     = len(minDir[0]) - 1
+    steps = []
+
+    while r > 0 or c > 0:
+        steps.append( (r, c, minDir[r][c]) )
+        if minDir[r][c] == Dir.PREV_ROW:
+            r -= 1
+        else:
+            c -= 1
+
+    return steps
+
+
+
+def main():
+
+    sizes = [ 100, 300, 1000 ]
+    width = 16
+    seed  = 1
+
+    args = sys.argv[1:]
+    while len(args) > 1:
+        if args[0] == '-n':
+            sizes = [ int(n) for n in args[1].split(',') ]
+        elif args[0] == '-c':
+            width = int( args[1] )
+        elif args[0] == '-s':
+            seed = int( args[1] )
+        args = args[2:]
+
+    if args:
+        print( 'Usage: %s [-n points,...] [-c width] [-s seed]' % sys.argv[0] )
+        sys.exit(1)
+
+    rng = np.random.default_rng( seed )
+
+    print( '%8s %10s %10s %9s %10s %9s %7s %10s %10s %9s %6s' %
+           ('points', 'python', 'numpy', 'speedup', 'corridor', 'area gap', 'cells', 'pair brute', 'pair', 'speedup', 'same') )
+
+    for n in sizes:
+
+        coords0 = ellipse( n, 1.0, rng )
+        coords1 = ellipse( n, 0.0, rng )
+
+        start = time.perf_counter()
+        minArea, minDir = pythonFill( coords0, coords1 )
+        pythonTime = time.perf_counter() - start
+
+        numpyTime = math.inf
+        for run in range(3):
+            start = time.perf_counter()
+            area, steps = slicemesh.minAreaPath( coords0, coords1 )
+            numpyTime = min( numpyTime, time.perf_counter() - start )
+
+        slice0 = Slice( [ Vertex( v ) for v in coords0.tolist() ] )
+        slice1 = Slice( [ Vertex( v ) for v in coords1.tolist() ] )
+
+        start = time.perf_counter()
+        brutePair = bruteClosestPair( slice0, slice1 )
+        bruteTime = time.perf_counter() - start
+
+        start = time.perf_counter()
+        pair = slicemesh.closestPair( slice0.vertexIndex(), slice1.vertexIndex() )
+        pairTime = time.perf_counter() - start
+
+        start = time.perf_counter()
+        corridorArea, corridorSteps, filled = slicemesh.corridorPath( coords0, coords1, width )
+        corridorTime = time.perf_counter() - start
+
+        same = area == minArea[-1][-1] and steps == walk( minDir ) and pair == brutePair
+
+        print( '%8d %9.3fs %9.4fs %8.0fx %9.4fs %8.4f%% %6.1f%% %9.3fs %9.4fs %8.0fx %6s' %
+               (n, pythonTime, numpyTime, pythonTime / numpyTime, corridorTime, 100.0 * (corridorArea - area) / area, 100.0 * filled,
+                bruteTime, pairTime, bruteTime / pairTime, 'yes' if same else 'NO') )
+
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,283 @@
+# Benchmark of the tristrip pipeline on synthetic meshes
+#
+# Usage: python benchstrips.py [-m maxTriangles] [-g generator,...] [-d dir] [-o results.json]
+#
+# Writes synthetic meshes in the tristrips.py input format, with
+# 1e3, 1e4, ... up to 'maxTriangles' (1e6 by default, at most 1e7)
+# triangles, from each of these generators:
+#
+#   grid      a square grid of quads, each cut into two triangles
+#   delaunay  a grid of randomly jittered points, each quad cut along
+#             the diagonal that passes the Delaunay empty-circle test
+#   thin      a grid 1000 times longer than it is wide
+#
+# Then, for each mesh, times these stages separately:
+#
+#   read       readTriangles(), which also builds the adjacency
+#   adjacency  buildAdjacency() alone
+#   tristrips  buildTristrips() in tristrips.py
+#   PyGL_1     buildTristrips() in PyGL_1.py
+#
+# and records the peak memory allocated during each stage (measured
+# in a second run of the stage, under tracemalloc, so that tracing
+# doesn't slow down the timed run), and the strip count and mean strip
+# length of both builders.
+#
+# The results go to 'results.json' (benchstrips.json by default) along
+# with the Python and NumPy versions, so that runs can be compared
+# over time.  Meshes are written to 'dir' (a temporary directory by
+# default) and reused if they are already there.
+
+
+import sys, os, io, time, json, platform, tempfile, tracemalloc, contextlib, resource
+
+import numpy as np
+
+import tristrips, PyGL_1
+
+
+generators = [ 'grid', 'delaunay', 'thin' ]
+
+
+# ================================================================
+# Mesh generators
+# ================================================================
+#
+# Each makes the vertices and faces of a grid of nx by ny quads, with
+# about 'numTris' triangles in all.  The triangles are anticlockwise.
+# gridMesh() also returns the four corner vertices of each quad.
+
+def gridMesh( numTris, aspect=1.0, jitter=0.0, rng=None ):
+
+    ny = max( 1, int( round( np.sqrt( numTris / 2.0 / aspect ) ) ) )
+    nx = max( 1, int( round( numTris / 2.0 / ny ) ) )
+
+    x, y  = np.meshgrid( np.arange( nx+1, dtype=np.float64 ), np.arange( ny+1, dtype=np.float64 ) )
+    verts = np.column_stack( (x.ravel(), y.ravel()) )
+
+    if jitter > 0:
+        verts += rng.uniform( -jitter, jitter, verts.shape )
+
+    # Corners of each quad:  c d
+    #                        a b
+
+    a = (np.arange( ny )[:,None] * (nx+1) + np.arange( nx )[None,:]).ravel()
+    b = a + 1
+    c = a + nx + 1
+    d = c + 1
+
+    faces = np.empty( (len(a),2,3), dtype=np.int64 )
+    faces[:,0] = np.column_stack( (a, b, d) ) # cut along a-d
+    faces[:,1] = np.column_stack( (a, d, c) )
+
+    return verts, faces, (a, b, c, d)
+
+
+def delaunayMesh( numTris, rng ):
+
+    verts, faces, (a, b, c, d) = gridMesh( numTris, jitter=0.25, rng=rng )
+
+    # Cut along b-c instead where c is inside the circumcircle of a,b,d
+
+    flip = inCircle( verts[a], verts[b], verts[d], verts[c] )
+
+    faces[flip,0] = np.column_stack( (a, b, c) )[flip]
+    faces[flip,1] = np.column_stack( (b, d, c) )[flip]
+
+    return verts, faces
+
+
+# True where point p is inside the circumcircle of anticlockwise
+# triangle a,b,c
+
+def inCircle( a, b, c, p ):
+
+    rows = [ q - p for q in (a, b, c) ]
+    m    = np.stack( [ np.column_stack( (r[:,0], r[:,1], (r*r).sum( axis=1 )) ) for r in rows ], axis=1 )
+
+    return np.linalg.det( m ) > 0
+
+
+
+def generate( name, numTris, rng ):
+
+    if name == 'grid':
+        verts, faces, corners = gridMesh( numTris )
+    elif name == 'delaunay':
+        verts, faces = delaunayMesh( numTris, rng )
+    else:
+        verts, faces, corners = gridMesh( numTris, aspect=1000.0 )
+
+    return verts, faces.reshape( -1, 3 )
+
+
+# Write a mesh in the tristrips.py input format, formatting a chunk
+# of rows at a time
+
+def writeMesh( path, verts, faces, chunk=1<<16 ):
+
+    with open( path, 'w' ) as f:
+
+        f.write( '%d\n' % len(verts) )
+        for i in range( 0, len(verts), chunk ):
+            rows = verts[i:i+chunk]
+            f.write( ('%.6f %.6f\n' * len(rows)) % tuple( rows.ravel().tolist() ) )
+
+        f.write( '%d\n' % len(faces) )
+        for i in range( 0, len(faces), chunk ):
+            rows = faces[i:i+chunk]
+            f.write( ('%d %d %d\n' * len(rows)) % tuple( rows.ravel().tolist() ) )
+
+
+
+# ================================================================
+# Stages
+# ================================================================
+
+# Run a stage, with its output hidden.  Returns (seconds, result).
+
+def timeStage( stage ):
+
+    with contextlib.redirect_stdout( io.StringIO() ):
+        start  = time.perf_counter()
+        result = stage()
+        return time.perf_counter() - start, result
+
+
+# Run a stage again under tracemalloc.  Returns the peak bytes allocated.
+
+def peakMemory( stage ):
+
+    tracemalloc.start()
+    try:
+        with contextlib.redirect_stdout( io.StringIO() ):
+            stage()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def stripStats( mesh ):
+
+    lengths = [ len(s) for s in mesh.strips() ]
+
+    return { 'count': len(lengths), 'meanLength': float( np.mean( lengths ) ) if lengths else 0.0 }
+
+
+
+def benchmark( path ):
+
+    def read():
+        with open( path, 'rb' ) as f:
+            return tristrips.readTriangles( f )
+
+    readTime, mesh = timeStage( read )
+
+    stages = { 'read':      read,
+               'adjacency': lambda: tristrips.buildAdjacency( mesh.faces, len(mesh.verts) ) }
+
+    builders = { 'tristrips': tristrips.buildTristrips,
+                 'PyGL_1':    PyGL_1.buildTristrips }
+
+    result = { 'triangles': len(mesh), 'vertices': len(mesh.verts), 'fileBytes': os.path.getsize( path ),
+               'seconds': { 'read': readTime }, 'peakBytes': {}, 'strips': {} }
+
+    result['seconds']['adjacency'] = timeStage( stages['adjacency'] )[0]
+
+    links = {}
+    for name,build in builders.items():
+        result['seconds'][name] = timeStage( lambda: build( mesh ) )[0]
+        result['strips'][name]  = stripStats( mesh )
+        links[name] = mesh.nextTri.copy()
+        stages[name] = lambda build=build: build( mesh )
+
+    result['sameStrips'] = bool( (links['tristrips'] == links['PyGL_1']).all() )
+
+    for name,stage in stages.items():
+        result['peakBytes'][name] = peakMemory( stage )
+
+    return result
+
+
+
+def main():
+
+    maxTris    = 10**6
+    names      = generators
+    meshDir    = None
+    outputPath = 'benchstrips.json'
+
+    args = sys.argv[1:]
+    while len(args) > 1:
+        if args[0] == '-m':
+            maxTris = min( int( float( args[1] ) ), 10**7 )
+        elif args[0] == '-g':
+            names = args[1].split(',')
+        elif args[0] == '-d':
+            meshDir = args[1]
+        elif args[0] == '-o':
+            outputPath = args[1]
+        args = args[2:]
+
+    if args or any( name not in generators for name in names ):
+        print( 'Usage: %s [-m maxTriangles] [-g %s] [-d dir] [-o results.json]' % (sys.argv[0], ','.join( generators )) )
+        sys.exit(1)
+
+    tempDir = None
+    if meshDir is None:
+        tempDir = tempfile.TemporaryDirectory()
+        meshDir = tempDir.name
+
+    rng = np.random.default_rng( 1 )
+
+    results = []
+
+    print( '%-9s %9s %8s %8s %8s %9s %8s %9s %8s' %
+           ('mesh', 'triangles', 'write', 'read', 'adj', 'tristrips', 'PyGL_1', 'peak MB', 'strips') )
+
+    numTris = 1000
+    while numTris <= maxTris:
+
+        for name in names:
+
+            path = os.path.join( meshDir, '%s-%d.txt' % (name, numTris) )
+
+            writeTime = 0.0
+            if not os.path.exists( path ):
+                start = time.perf_counter()
+                verts, faces = generate( name, numTris, rng )
+                writeMesh( path, verts, faces )
+                writeTime = time.perf_counter() - start
+
+            result = benchmark( path )
+            result['generator'] = name
+            result['seconds']['write'] = writeTime
+            results.append( result )
+
+            s = result['seconds']
+            print( '%-9s %9d %8.3f %8.3f %8.3f %9.3f %8.3f %9.1f %8d%s' %
+                   (name, result['triangles'], s['write'], s['read'], s['adjacency'], s['tristrips'], s['PyGL_1'],
+                    max( result['peakBytes'].values() ) / 2**20, result['strips']['tristrips']['count'],
+                    '' if result['sameStrips'] else '  (PyGL_1 differs)') )
+
+        numTris *= 10
+
+    report = { 'time':     time.strftime( '%Y-%m-%dT%H:%M:%S' ),
+               'python':   platform.python_version(),
+               'numpy':    np.__version__,
+               'machine':  platform.platform(),
+               'maxRSS':   resource.getrusage( resource.RUSAGE_SELF ).ru_maxrss * 1024, # bytes, on Linux
+               'results':  results }
+
+    with open( outputPath, 'w' ) as f:
+        json.dump( report, f, indent=2 )
+
+    print( 'Wrote %s' % outputPath )
+
+    if tempDir is not None:
+        tempDir.cleanup()
+
+
+
+if __name__ == '__main__':
+    main()
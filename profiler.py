@@ -0,0 +1,149 @@
+# Opt-in profiling of the tristrip pipeline
+#
+# Code marks its phases with
+#
+#   with profiler.phase( 'adjacency' ):
+#       ...
+#
+# and when profiling is enabled (see enable()), each phase records its
+# number of calls, wall time and, if allocation tracing is on, the
+# bytes allocated and the peak allocated while it ran.  Phases nest,
+# and are recorded by their full path, e.g. 'read/parse'.  Each thread
+# has its own stack of phases, so a phase run in a worker thread is
+# recorded under its own path rather than inside whatever the main
+# thread is doing at the time.
+#
+# enable() can also wrap named functions of a module so that their
+# calls are counted.  The wrappers replace the module's globals, so
+# calls from within the module go through them too, and nothing is
+# wrapped unless profiling is enabled.
+#
+# When profiling is disabled, phase() returns a shared do-nothing
+# context manager, so marking a phase costs one function call.
+#
+# writeReport() writes the results as JSON or, for a file name ending
+# in '.folded', as collapsed stacks ("read;parse 12345" per line, in
+# microseconds of time not spent in a nested phase), which flame graph
+# tools such as flamegraph.pl and speedscope read.
+
+
+import time, json, tracemalloc, contextlib, functools, threading
+
+
+enabled = False
+
+phases   = {} # path -> { 'calls', 'seconds', 'selfSeconds', 'allocated', 'peak' }
+counters = {} # name -> count
+
+threadStacks = threading.local() # .stack: the phases now running in each thread, innermost last
+traceAllocs  = False
+
+noPhase = contextlib.nullcontext()
+
+
+# Turn profiling on.  'counted' is a list of (module, [function names])
+# whose calls are counted.
+
+def enable( trace=False, counted=() ):
+
+    global enabled, traceAllocs
+
+    enabled     = True
+    traceAllocs = trace
+
+    if trace and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+    for module,names in counted:
+        for name in names:
+            setattr( module, name, countCalls( getattr( module, name ), name ) )
+
+
+def countCalls( f, name ):
+
+    counters.setdefault( name, 0 )
+
+    @functools.wraps( f )
+    def counted( *args, **kwargs ):
+        counters[name] += 1
+        return f( *args, **kwargs )
+
+    return counted
+
+
+def count( name, k=1 ):
+
+    if enabled:
+        counters[name] = counters.get( name, 0 ) + k
+
+
+def phase( name ):
+
+    if not enabled:
+        return noPhase
+
+    return timedPhase( name )
+
+
+@contextlib.contextmanager
+def timedPhase( name ):
+
+    if not hasattr( threadStacks, 'stack' ):
+        threadStacks.stack = []
+
+    stack = threadStacks.stack
+    path  = (stack[-1]['path'] + '/' if stack else '') + name
+    frame = { 'path': path, 'childSeconds': 0.0, 'before': 0, 'peak': 0 }
+
+    record = phases.setdefault( path, { 'calls': 0, 'seconds': 0.0, 'selfSeconds': 0.0, 'allocated': 0, 'peak': 0 } )
+
+    # tracemalloc keeps a single peak, so it is folded into the outer
+    # phase's peak before being reset for this one
+
+    if traceAllocs:
+        current, peak = tracemalloc.get_traced_memory()
+        if stack:
+            stack[-1]['peak'] = max( stack[-1]['peak'], peak )
+        tracemalloc.reset_peak()
+        frame['before'] = frame['peak'] = current
+
+    stack.append( frame )
+    start = time.perf_counter()
+
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        stack.pop()
+
+        record['calls']       += 1
+        record['seconds']     += elapsed
+        record['selfSeconds'] += elapsed - frame['childSeconds']
+
+        if stack:
+            stack[-1]['childSeconds'] += elapsed
+
+        if traceAllocs:
+            current, peak = tracemalloc.get_traced_memory()
+            frame['peak'] = max( frame['peak'], peak )
+            record['allocated'] += current - frame['before']
+            record['peak']       = max( record['peak'], frame['peak'] - frame['before'] )
+            if stack:
+                stack[-1]['peak'] = max( stack[-1]['peak'], frame['peak'] )
+
+
+
+def report():
+
+    return { 'phases': phases, 'counters': counters }
+
+
+def writeReport( path ):
+
+    with open( path, 'w' ) as f:
+
+        if path.endswith( '.folded' ):
+            for p,r in sorted( phases.items() ):
+                f.write( '%s %d\n' % (p.replace( '/', ';' ), round( r['selfSeconds'] * 1e6 )) )
+        else:
+            json.dump( report(), f, indent=2 )
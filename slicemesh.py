@@ -0,0 +1,856 @@
+# Dynamic programming for mesh generation: slices, vertices and the
+# min-area triangulation between two slices
+#
+# This module doesn't use OpenGL or GLFW, so it can be imported by
+# other programs and run where there is no display.  PyGL_3.py is the
+# viewer for its results.
+
+
+import os, time, math, enum, multiprocessing
+from multiprocessing import shared_memory
+
+import numpy as np
+
+
+# Vertex
+
+class Vertex(object):
+
+    nextID = 0
+    
+    def __init__( self, coords ):
+
+        self.coords = coords   # [x,y,z] coordinates
+        self.nextV  = None     # next vertex in order around the slice
+
+        self.id     = Vertex.nextID
+        Vertex.nextID += 1
+
+    def __repr__( self ):
+        return 'v%d' % self.id
+
+  
+# Slice
+#
+# Contains a 'verts' list, each item of which is a 3D vertex as [x,y,z]
+
+class Slice(object):
+
+    nextID = 0
+    
+    def __init__( self, verts ):
+
+        self.verts     = verts  # [ v0, v1, v2, v3, ... ] in RH order around +y axis
+        self.index     = None   # VertexIndex of the vertices, once built
+
+        self.id        = Slice.nextID
+        Slice.nextID += 1
+
+    def __repr__( self ):
+        return 's%d' % self.id
+
+    # The VertexIndex of the slice, made once and kept for the
+    # triangulations with the slices above and below
+
+    def vertexIndex( self ):
+
+        if self.index is None:
+            self.index = VertexIndex( vertexCoords( self.verts ) )
+
+        return self.index
+
+
+
+# Triangle
+
+class Triangle(object):
+
+    nextID = 0
+    
+    def __init__( self, verts ):
+
+        self.verts = verts # [ v0, v1, v2 ] is CCW order as seen from outside the object
+        
+        self.norm  = normalize( crossProduct( subtract( verts[1].coords, verts[0].coords ), # outward-pointing normal
+                                              subtract( verts[2].coords, verts[0].coords ) ) )
+
+        self.id    = Triangle.nextID
+        Triangle.nextID += 1
+
+    def __repr__( self ):
+        return 't%d' % self.id
+
+  
+
+
+# Build the triangles between two slices
+#
+# Slice 0 is above (at a higher y) than slice 1.
+#
+# Within each slice, the vertices are ordered in the right-hand
+# direction with respect to the y axis.  That is, when looking from
+# the origin up the positive y axis, the vertices will appear in
+# CLOCKWISE order.
+#
+# The min-area triangulation is a path through a table whose rows are
+# the vertices of slice 1 and whose columns are the vertices of slice
+# 0, each starting at the closest pair of vertices and ending with the
+# starting vertex again.  MinArea[r][c] is the least area of a
+# triangulation from [0][0] to edge [r][c].  It is reached either from
+# the previous row, adding triangle (slice1[r-1], slice1[r], slice0[c]),
+# or from the previous column, adding triangle (slice0[c-1], slice0[c],
+# slice1[r]).  For testSlices.dat the table is
+#
+#               0       1       2       3       4
+#
+#       0       0 .    90 -   557 -  1023 -  1113 -
+#       1      90 |   210 -   330 -   805 -  1203 |
+#       2     549 |   330 |   480 -   630 -  1097 -
+#       3    1008 |   796 |   630 |   750 -   870 -
+#       4    1098 |  1188 -  1104 |   870 |   960 - 
+#
+# where '|' is Dir.PREV_ROW and '-' is Dir.PREV_COL.  Ties go to
+# Dir.PREV_COL.
+#
+# With thousands of vertices per slice, filling the table one cell at
+# a time with triangleArea() takes tens of millions of interpreted
+# calls.  Instead, the areas of all the row steps and all the column
+# steps are computed as whole arrays, and the table is filled one
+# anti-diagonal (r+c constant) at a time, since each cell depends only
+# on cells of the previous anti-diagonal.
+
+
+class Dir(enum.Enum): # for storing directions of Min-area
+                      # triangulations in 'MinDir' below.
+    PREV_ROW = 1
+    PREV_COL = 2
+
+
+def buildTriangles( slice0, slice1, corridor=None ): # function to build triangles
+
+    verts = slice0.verts + slice1.verts
+    tris  = pairTriangles( slice0.vertexIndex(), slice1.vertexIndex(), corridor )
+
+    return [ Triangle( [ verts[i] for i in tri ] ) for tri in tris.tolist() ]
+
+
+# The min-area triangulation between two slices, given the
+# VertexIndex of each.  Returns an array of triangles, each as three
+# vertex indices, in which the vertices of slice 1 are numbered after
+# those of slice 0.
+#
+# If 'corridor' is given, the triangulation is found coarse to fine by
+# corridorPath(), with that width, rather than from the whole table.
+
+def pairTriangles( index0, index1, corridor=None ):
+
+    n0 = len(index0.coords)
+    n1 = len(index1.coords)
+
+    # Make a cyclic permutation of the vertices of each slice that
+    # starts at the closest pair of vertices, with the first vertex
+    # added again at the end so that the triangulation ends on the
+    # same edge as it started
+
+    start0, start1 = closestPair( index0, index1 )
+
+    verts0 = (start0 + np.arange( n0+1 )) % n0
+    verts1 = (start1 + np.arange( n1+1 )) % n1 + n0
+
+    if corridor is None:
+        area, steps = minAreaPath( index0.coords[verts0], index1.coords[verts1-n0] )
+    else:
+        area, steps, filled = corridorPath( index0.coords[verts0], index1.coords[verts1-n0], corridor )
+
+    # Build a triangle for each step backward through the table
+
+    r, c, dirs = zip( *steps ) if steps else ((), (), ())
+
+    r       = np.array( r, dtype=np.int64 )
+    c       = np.array( c, dtype=np.int64 )
+    fromRow = np.array( [ dir == Dir.PREV_ROW for dir in dirs ], dtype=bool )
+
+    triangles = np.empty( (len(steps), 3), dtype=np.int64 )
+
+    triangles[:,0] = np.where( fromRow, verts1[r-1], verts0[c-1] )
+    triangles[:,1] = verts1[r]
+    triangles[:,2] = verts0[c]
+
+    return triangles
+
+
+
+# Build the triangles between each pair of adjacent slices, in a pool
+# of 'workers' processes (one per core by default).  Returns the
+# triangles of all the pairs, in order of slice, just as calling
+# buildTriangles() on each pair in turn does, and the seconds taken
+# by each pair.  'corridor' is as for pairTriangles().
+#
+# The vertex coordinates of all the slices go into shared memory, one
+# slice after another, and each worker triangulates a run of adjacent
+# pairs, so that it can reuse the VertexIndex of the slice between two
+# of them.  Only the triangles come back, as vertex indices, and the
+# Triangle objects are made here.
+
+def buildAllTriangles( slices, workers=None, corridor=None ):
+
+    numPairs = max( len(slices)-1, 0 )
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    coords  = np.concatenate( [ s.vertexIndex().coords for s in slices ] ) if slices else np.zeros( (0,3) )
+    offsets = np.cumsum( [0] + [ len(s.verts) for s in slices ] )
+
+    runSize = max( 1, -(-numPairs // (workers*4)) ) # a few runs per worker, to balance the load
+    runs    = [ (i, min( i+runSize, numPairs ), corridor) for i in range( 0, numPairs, runSize ) ]
+
+    if workers <= 1 or len(runs) <= 1:
+
+        indexes = [ s.vertexIndex() for s in slices ]
+        results = [ timedPairTriangles( indexes[i], indexes[i+1], corridor ) for i in range( numPairs ) ]
+
+    else:
+
+        blocks = {}
+        try:
+            names = {}
+            for name,array in [ ('coords', coords), ('offsets', offsets) ]:
+                blocks[name] = shared_memory.SharedMemory( create=True, size=max( array.nbytes, 1 ) )
+                np.ndarray( array.shape, dtype=array.dtype, buffer=blocks[name].buf )[...] = array
+                names[name] = (blocks[name].name, array.shape, array.dtype.str)
+
+            with multiprocessing.Pool( min( workers, len(runs) ), initializer=attachShared, initargs=(names,) ) as pool:
+                results = [ result for run in pool.starmap( pairTrianglesShared, runs ) for result in run ]
+
+        finally:
+            for block in blocks.values():
+                block.close()
+                block.unlink()
+
+    verts     = [ v for s in slices for v in s.verts ]
+    triangles = []
+    seconds   = []
+
+    for i,(tris,elapsed) in enumerate( results ):
+        tris += offsets[i]
+        triangles += [ Triangle( [ verts[j] for j in tri ] ) for tri in tris.tolist() ]
+        seconds.append( elapsed )
+
+    return triangles, seconds
+
+
+def timedPairTriangles( index0, index1, corridor ):
+
+    start = time.perf_counter()
+    tris  = pairTriangles( index0, index1, corridor )
+
+    return tris, time.perf_counter() - start
+
+
+# Shared-memory arrays of a pool worker, set up by attachShared()
+
+workerArrays = None
+workerBlocks = None
+
+def attachShared( arrays ):
+
+    global workerArrays, workerBlocks
+
+    workerBlocks = {}
+    workerArrays = {}
+
+    for name,(blockName,shape,dtype) in arrays.items():
+        workerBlocks[name] = shared_memory.SharedMemory( name=blockName )
+        workerArrays[name] = np.ndarray( shape, dtype=dtype, buffer=workerBlocks[name].buf )
+
+
+# Triangulate pairs first..last-1 in a pool worker
+
+def pairTrianglesShared( first, last, corridor ):
+
+    coords  = workerArrays['coords']
+    offsets = workerArrays['offsets']
+
+    indexes = [ VertexIndex( coords[offsets[i]:offsets[i+1]] ) for i in range( first, last+1 ) ]
+
+    return [ timedPairTriangles( indexes[i], indexes[i+1], corridor ) for i in range( last-first ) ]
+
+
+
+def vertexCoords( verts ):
+
+    return np.array( [ v.coords for v in verts ], dtype=np.float64 ).reshape( -1, 3 )
+
+
+# Find the closest pair of vertices, one from each slice, given the
+# VertexIndex of each.  Returns their indices.  This is the same pair
+# as a brute-force search over all pairs gives, comparing length(
+# subtract( v0, v1 ) ) and keeping the first of equally close pairs,
+# in order of the vertex in slice 0 and then the vertex in slice 1.
+#
+# The vertices of one slice are looked up in the index of the other,
+# which is sorted the first time it's used and kept that way for the
+# slice's other pair.  An index that is already sorted is used, or
+# else that of the slice with more vertices.
+
+def closestPair( index0, index1 ):
+
+    coords0 = index0.coords
+    coords1 = index1.coords
+
+    if index1.order is None and (index0.order is not None or len(coords0) >= len(coords1)):
+        i1, i0 = index0.closestPairs( coords1 )
+    else:
+        i0, i1 = index1.closestPairs( coords0 )
+
+    dx, dy, dz = (coords0[i0] - coords1[i1]).T
+    dist = np.sqrt( dx*dx + dy*dy + dz*dz ) # as length() does
+
+    best = np.lexsort( (i1, i0, dist) )[0]
+
+    return int( i0[best] ), int( i1[best] )
+
+
+# The vertices of a slice, and once sorted, the vertices sorted along
+# the x or z axis, whichever they spread further along, for finding
+# the closest vertices to those of another slice.
+
+class VertexIndex(object):
+
+    def __init__( self, coords ):
+
+        self.coords = coords
+        self.order  = None
+
+    def sort( self ):
+
+        coords = self.coords
+        spread = coords.max( axis=0 ) - coords.min( axis=0 ) if len(coords) > 0 else np.zeros( 3 )
+
+        self.axis   = 0 if spread[0] >= spread[2] else 2
+        self.order  = np.argsort( coords[:,self.axis], kind='stable' )
+        self.keys   = coords[self.order,self.axis]
+        self.yRange = (coords[:,1].min(), coords[:,1].max()) if len(coords) > 0 else (0.0, 0.0)
+
+    # Candidates for the closest pair between 'coords' and the
+    # indexed vertices.  Returns (indices in 'coords', indices of the
+    # indexed vertices), which include every pair that is as close as
+    # the closest pair.
+    #
+    # An upper bound on the closest distance comes from each vertex and
+    # its neighbours along the axis.  The vertices of a pair at most
+    # that far apart are also at most that far apart along the axis,
+    # less what the gap between the slices' heights accounts for, so
+    # only those within that window along the axis are candidates.
+
+    def closestPairs( self, coords ):
+
+        if self.order is None:
+            self.sort()
+
+        if len(coords) == 0 or len(self.keys) == 0:
+            return np.zeros( 0, dtype=np.int64 ), np.zeros( 0, dtype=np.int64 )
+
+        keys = coords[:,self.axis]
+        pos  = np.searchsorted( self.keys, keys )
+
+        near  = np.concatenate( (np.maximum( pos-1, 0 ), np.minimum( pos, len(self.keys)-1 )) )
+        diff  = coords[np.tile( np.arange( len(coords) ), 2 )] - self.coords[self.order[near]]
+        bound = (diff*diff).sum( axis=1 ).min()
+
+        gap   = max( 0.0, coords[:,1].min() - self.yRange[1], self.yRange[0] - coords[:,1].max() )
+        width = math.sqrt( max( bound - gap*gap, 0.0 ) + 1e-12 * bound ) # with some slack for rounding
+
+        lo = np.searchsorted( self.keys, keys - width, side='left' )
+        hi = np.searchsorted( self.keys, keys + width, side='right' )
+
+        counts = hi - lo
+        query  = np.repeat( np.arange( len(coords) ), counts )
+        ranks  = np.arange( counts.sum() ) - np.repeat( np.cumsum( counts ) - counts, counts ) + np.repeat( lo, counts )
+
+        return query, self.order[ranks]
+
+
+
+# The min-area path through the table for the cyclic vertex
+# coordinates 'coords0' (columns) and 'coords1' (rows).  Returns the
+# least area and the steps of the path, from the last cell back to
+# [0][0], each as (r, c, Dir) for the cell it steps back from.
+#
+# MinDir takes one bit per cell.  If that would take more than
+# 'maxTableBytes', the path is found by divide and conquer instead,
+# which takes memory in proportion to the number of vertices, and
+# about twice the time.  Both give exactly the same path.
+
+def minAreaPath( coords0, coords1, maxTableBytes=256<<20 ):
+
+    area, steps = dividedPath( coords0, coords1, 0.0, maxTableBytes )
+
+    return 0.5 * area, steps
+
+
+# The path through the table from [0][0], where MinArea is 'start', to
+# the last cell.  Returns (MinArea at the last cell, steps).  MinArea
+# is doubled, as sweepMinArea() keeps it.
+#
+# If the MinDir bits fit in 'maxTableBytes', the path is walked back
+# through them.  Otherwise, this finds the cell at which the path
+# crosses the middle anti-diagonal, and the paths on either side of it
+# are found in turn, each within the rectangle between its ends.
+#
+# The part of the path before the crossing is the same within its
+# rectangle, as the cells in it depend only on cells in it.  The part
+# after it is too: within its rectangle, the cells on the path have the
+# same MinArea as in the whole table, and the other cells have at least
+# as much, so the same step back is taken from each cell on the path.
+
+def dividedPath( coords0, coords1, start, maxTableBytes ):
+
+    rows = len(coords1)
+    cols = len(coords0)
+
+    if rows*cols <= 8*maxTableBytes or rows+cols <= 3:
+        area, minDir = fillMinArea( coords0, coords1, start )
+        return area, walkMinDir( minDir, rows, cols )
+
+    mid = (rows+cols-2) // 2
+
+    area, r, midArea = crossingCell( coords0, coords1, start, mid )
+    c = mid - r
+
+    after  = dividedPath( coords0[c:], coords1[r:], midArea, maxTableBytes )[1]
+    before = dividedPath( coords0[:c+1], coords1[:r+1], start, maxTableBytes )[1]
+
+    return area, [ (r+i, c+j, dir) for i,j,dir in after ] + before
+
+
+# The min-area path found coarse to fine, for slices that are much
+# alike, whose path stays near the diagonal of the table.  Returns
+# (area, steps) as minAreaPath() does, and the fraction of the cells
+# of the table that were filled.
+#
+# Every 'factor'th vertex of each slice is kept and the path through
+# the smaller table of those is found, in the same way, and projected
+# onto the full table.  Then only the cells within 'width' rows of it,
+# on each anti-diagonal, are filled.  If the path found touches the
+# edge of those cells, the cells around it within twice the width are
+# filled, and so on, until the path stays clear of the edge, which
+# makes it very likely, though not certain, to be the min-area path.
+
+def corridorPath( coords0, coords1, width=16, factor=4 ):
+
+    area, steps, filled = coarseToFine( coords0, coords1, width, factor )
+
+    return 0.5 * area, steps, filled / float( len(coords0) * len(coords1) )
+
+
+def coarseToFine( coords0, coords1, width, factor ):
+
+    rows = len(coords1)
+    cols = len(coords0)
+
+    width  = max( width, 1 )  # so that the cells filled join up
+    factor = max( factor, 2 ) # so that the coarser table is smaller
+
+    if min( rows, cols ) <= 2 * factor * width:
+        area, minDir = fillMinArea( coords0, coords1 )
+        return area, walkMinDir( minDir, rows, cols ), rows*cols
+
+    # Find the path between every 'factor'th vertex, always keeping the
+    # last, and the rows at which it crosses each anti-diagonal
+
+    keptRows = np.unique( np.append( np.arange( 0, rows, factor ), rows-1 ) )
+    keptCols = np.unique( np.append( np.arange( 0, cols, factor ), cols-1 ) )
+
+    area, steps, filled = coarseToFine( coords0[keptCols], coords1[keptRows], width, factor )
+
+    r, c  = np.array( [ (0, 0) ] + [ (r, c) for r,c,dir in reversed( steps ) ] ).T
+    guide = np.interp( np.arange( rows+cols-1 ), keptRows[r] + keptCols[c], keptRows[r] )
+
+    # Fill the cells around it, widening until the path is clear of the
+    # edge
+
+    fullFirst, fullLast = [ np.array( a ) for a in diagonalRows( rows, cols ) ]
+
+    while True:
+
+        firstRows = np.maximum( fullFirst, np.floor( guide - width ).astype( np.int64 ) )
+        lastRows  = np.minimum( fullLast,  np.ceil(  guide + width ).astype( np.int64 ) )
+
+        area, minDir = fillMinArea( coords0, coords1, 0.0, firstRows.tolist(), lastRows.tolist() )
+        steps   = walkMinDir( minDir, rows, cols )
+        filled += int( (lastRows - firstRows + 1).sum() )
+
+        r, c  = np.array( [ (0, 0) ] + [ (r, c) for r,c,dir in reversed( steps ) ] ).T
+        d     = r + c
+        edge  = ((r == firstRows[d]) & (r > fullFirst[d])) | ((r == lastRows[d]) & (r < fullLast[d]))
+        whole = (firstRows == fullFirst).all() and (lastRows == fullLast).all()
+
+        if not edge.any() or whole:
+            return area, steps, filled
+
+        guide  = r.astype( np.float64 ) # the path crosses each anti-diagonal once, in order
+        width *= 2
+
+
+# Walk back through the MinDir bits (see fillMinArea()) from the last
+# cell to [0][0]
+
+def walkMinDir( minDir, rows, cols ):
+
+    fromRow, starts, rowBytes, bandRows, band = minDir
+
+    r     = rows - 1
+    c     = cols - 1
+    steps = []
+
+    while r > 0 or c > 0:
+        e = r + c - 1     # anti-diagonals are counted from 1 in the bands
+        b = e // band
+        j = r - bandRows[b] # position in the band's rows
+        if (fromRow[ starts[b] + (e - b*band) * rowBytes[b] + (j>>3) ] >> (7 - (j&7))) & 1:
+            steps.append( (r, c, Dir.PREV_ROW) )
+            r -= 1
+        else:
+            steps.append( (r, c, Dir.PREV_COL) )
+            c -= 1
+
+    return steps
+
+
+# Fill the MinArea table, starting from 'start' at [0][0].  Returns
+# (MinArea at the last cell, minDir).
+#
+# Only rows firstRows[d] to lastRows[d] of each anti-diagonal d are
+# filled, and the other cells are taken to be infinite.  By default,
+# these are all of the rows.
+#
+# MinDir takes one bit per cell, set for Dir.PREV_ROW.  The bits of
+# each band of anti-diagonals that sweepMinArea() fills are packed by
+# np.packbits(), a row of the band's block at a time.  'minDir' is
+# (bits, byte at which each band starts, bytes per row of each band,
+# first row of each band, anti-diagonals per band), for walkMinDir().
+
+def fillMinArea( coords0, coords1, start=0.0, firstRows=None, lastRows=None ):
+
+    rows = len(coords1)
+
+    area     = start
+    blocks   = []
+    bandRows = []
+    band     = 1
+
+    for d0,d1,ra,minArea,fromRow in sweepMinArea( coords0, coords1, start, firstRows, lastRows ):
+        blocks.append( np.packbits( fromRow, axis=1 ) )
+        bandRows.append( ra )
+        band = max( band, d1-d0 )
+
+    if blocks:
+        area = minArea[-1,rows-ra] # the last cell
+
+    sizes  = [ b.size for b in blocks ]
+    starts = np.concatenate( ([0], np.cumsum( sizes )) ).astype( np.int64 ).tolist()
+    bits   = np.concatenate( [ b.ravel() for b in blocks ] ) if blocks else np.zeros( 0, dtype=np.uint8 )
+
+    return float( area ), (bits, starts, [ b.shape[1] for b in blocks ], bandRows, band)
+
+
+# The first and last rows of each anti-diagonal of a table
+
+def diagonalRows( rows, cols ):
+
+    return ( np.maximum( 0, np.arange( rows+cols-1 ) - (cols-1) ).tolist(),
+             np.minimum( np.arange( rows+cols-1 ), rows-1 ).tolist() )
+
+
+# Find the cell at which the min-area path crosses anti-diagonal
+# 'mid', by carrying the row at which each cell's own path crosses it
+# along from cell to cell.  Returns (MinArea at the last cell, row of
+# the crossing, MinArea at the crossing).
+
+def crossingCell( coords0, coords1, start, mid ):
+
+    rows = len(coords1)
+
+    firstRows, lastRows = diagonalRows( rows, len(coords0) )
+
+    crossing = np.zeros( rows+1, dtype=np.int64 ) # indexed by row, with an extra entry in front
+
+    for d0,d1,ra,minArea,fromRow in sweepMinArea( coords0, coords1, start ):
+
+        for d in range( max( d0, mid ), d1 ):
+
+            r0 = firstRows[d]
+            r1 = lastRows[d] + 1
+            k  = d - d0
+
+            if d == mid:
+                crossing[r0+1:r1+1] = np.arange( r0, r1 )
+                midArea = minArea[k+1,r0-ra+1:r1-ra+1].copy()
+            else:
+                crossing[r0+1:r1+1] = np.where( fromRow[k,r0-ra:r1-ra], crossing[r0:r1], crossing[r0+1:r1+1] )
+
+    r = int( crossing[rows] )
+
+    return float( minArea[-1,rows-ra] ), r, float( midArea[r - max( 0, mid-len(coords0)+1 )] )
+
+
+# Fill the MinArea table a band of anti-diagonals at a time, starting
+# from 'start' at [0][0].  Only rows firstRows[d] to lastRows[d] of
+# each anti-diagonal d are filled, as in fillMinArea().
+#
+# Yields (d0, d1, ra, minArea, fromRow) for each band of
+# anti-diagonals d0 to d1-1, after the first anti-diagonal, where:
+#
+#   minArea[k+1][r-ra+1]  is MinArea of row r of anti-diagonal d0+k,
+#                         and minArea[0] is anti-diagonal d0-1
+#   fromRow[k][r-ra]      is True for Dir.PREV_ROW
+#
+# Entries of minArea outside the rows filled are infinite, so that
+# the edges of the table, or of the rows filled, need no special case,
+# and fromRow is meaningless there.
+#
+# The step areas of a band are worked out first, as arrays of
+# (anti-diagonal, row) that stay in the cache, into buffers that are
+# reused from band to band.  Then each anti-diagonal takes just three
+# vector operations, with the sum via the column step left in place of
+# the column step areas, so that the MinDir bits of the whole band come
+# from one comparison with the minimum at the end.  The step areas are
+# doubled, which is exact, and so MinArea is too.
+
+def sweepMinArea( coords0, coords1, start, firstRows=None, lastRows=None ):
+
+    rows = len(coords1)
+    cols = len(coords0)
+
+    if firstRows is None:
+        firstRows, lastRows = diagonalRows( rows, cols )
+
+    # Anti-diagonals per band.  Along a band, the rows filled can move
+    # by as many rows as there are anti-diagonals, so a band is no
+    # longer than the rows filled are wide.
+
+    width = max( l-f+1 for f,l in zip( firstRows, lastRows ) )
+    band  = max( 1, min( (1<<14) // width, width ) )
+
+    bands = [ (d0, min( d0+band, rows+cols-1 )) for d0 in range( 1, rows+cols-1, band ) ]
+    spans = [ (min( firstRows[d0:d1] ), max( lastRows[d0:d1] ) + 1) for d0,d1 in bands ]
+
+    # The columns are padded on each side, so that the areas of cells
+    # outside the table come out finite, and are ignored
+
+    pad = rows + band # so that the windows below start within the columns
+
+    rowSteps = stepVectors( coords1, 0 )
+    colSteps = [ [ reversedWindows( a, rows ) for a in arrays ] for arrays in stepVectors( coords0, pad ) ]
+
+    buffers = np.empty( (8, band * max( [ rb-ra for ra,rb in spans ] + [0] )) )
+
+    add     = np.add
+    minimum = np.minimum
+
+    last, lastRa = np.array( [np.inf, start] ), 0 # anti-diagonal 0, indexed by row+1
+
+    for (d0,d1),(ra,rb) in zip( bands, spans ):
+
+        nb = d1 - d0
+        w  = rb - ra
+
+        # Cell (d0+k, ra+j) is in column d0+k-ra-j, which is element
+        # [i+k][j] of the column windows
+
+        i = d0 - ra + pad - rows + 1
+
+        rowArea, colArea, *tmp = [ buf[:nb*w].reshape( nb, w ) for buf in buffers ] # contiguous, for speed
+
+        rowArea = stepAreas( [ a[ra:rb] for a in rowSteps[0] + rowSteps[1] ],
+                             [ win[i:i+nb,:w] for win in colSteps[2] ], rowArea, tmp )
+        colArea = stepAreas( [ win[i:i+nb,:w] for win in colSteps[0] + colSteps[1] ],
+                             [ a[ra:rb] for a in rowSteps[2] ], colArea, tmp )
+
+        minArea = np.full( (nb+1, w+1), np.inf )
+
+        kept = last[ra-lastRa:ra-lastRa+w+1] # the rows of the last anti-diagonal that this band uses
+        minArea[0,:len(kept)] = kept
+
+        for k,f,l in zip( range( nb ), firstRows[d0:d1], lastRows[d0:d1] ):
+
+            a = f - ra
+            b = l + 1 - ra
+
+            prev = minArea[k]
+            cur  = minArea[k+1,a+1:b+1]
+            via  = colArea[k,a:b]
+
+            add( prev[a:b], rowArea[k,a:b], out=cur )
+            add( prev[a+1:b+1], via, out=via )
+            minimum( cur, via, out=cur )
+
+        last, lastRa = minArea[-1], ra
+
+        yield d0, d1, ra, minArea, minArea[1:,1:] < colArea
+
+
+# The steps between consecutive vertices, as three lists of x,y,z
+# arrays: the step, where it starts and where it ends.  Step i ends at
+# vertex i-pad, and there are 'pad' dummy steps at each end.  The
+# step to the first vertex is a dummy one of length zero.
+
+def stepVectors( coords, pad ):
+
+    ends   = np.concatenate( (np.repeat( coords[:1], pad, axis=0 ), coords, np.repeat( coords[-1:], pad, axis=0 )) )
+    starts = np.concatenate( (ends[:1], ends[:-1]) )
+
+    return [ list( np.ascontiguousarray( a.T ) ) for a in (ends - starts, starts, ends) ]
+
+
+# View of 'a' as windows of 'width' elements, each reversed, so that
+# element [i][j] is a[i+width-1-j].  Along a band of anti-diagonals,
+# the columns are such a view.  It's made from a reversed copy of 'a',
+# so that each window runs forward through memory, which NumPy's inner
+# loops are much faster at than running backward.
+
+def reversedWindows( a, width ):
+
+    return np.lib.stride_tricks.sliding_window_view( np.ascontiguousarray( a[::-1] ), width )[::-1]
+
+
+# Twice the area of each triangle formed by a step (given by the step
+# and its start) and a vertex, computed as triangleArea() does, so that
+# ties between row and column steps come out the same.  The step and
+# vertex are lists of x,y,z arrays, which are broadcast together.  The
+# areas go in 'out', and 'tmp' holds six more arrays of its shape to
+# work in.
+
+def stepAreas( step, vert, out, tmp ):
+
+    ex, ey, ez, sx, sy, sz = step
+    ox, oy, oz             = vert
+    vx, vy, vz, y, z, t    = tmp
+
+    np.subtract( ox, sx, out=vx )
+    np.subtract( oy, sy, out=vy )
+    np.subtract( oz, sz, out=vz )
+
+    x = np.multiply( ey, vz, out=out )
+    x -= np.multiply( ez, vy, out=t )
+    np.multiply( ez, vx, out=y )
+    y -= np.multiply( ex, vz, out=t )
+    np.multiply( ex, vy, out=z )
+    z -= np.multiply( ey, vx, out=t )
+
+    x *= x
+    y *= y
+    z *= z
+    x += y
+    x += z
+
+    return np.sqrt( x, out=x )
+
+
+
+# Some vector functions on [x,y,z] lists
+
+
+def add( v0, v1 ):
+
+    return [ v0[0]+v1[0], v0[1]+v1[1], v0[2]+v1[2] ]
+
+
+def subtract( v0, v1 ):
+
+    return [ v0[0]-v1[0], v0[1]-v1[1], v0[2]-v1[2] ]
+
+
+def scalarMult( k, v ):
+
+    return [ k*v[0], k*v[1], k*v[2] ]
+
+              
+def dotProduct( v0, v1 ):
+
+    return v0[0]*v1[0] + v0[1]*v1[1] + v0[2]*v1[2]
+
+
+def crossProduct( v0, v1 ):
+
+    return [ v0[1]*v1[2] - v0[2]*v1[1], v0[2]*v1[0] - v0[0]*v1[2], v0[0]*v1[1] - v0[1]*v1[0] ]
+
+
+def length( v ):
+
+    return math.sqrt( v[0]*v[0] + v[1]*v[1] + v[2]*v[2] )
+
+
+def normalize( v ):
+
+    d = length( v )
+
+    if d > 0.0001:
+        return [ v[0]/d, v[1]/d, v[2]/d ]
+    else:
+        return v
+
+
+def triangleArea( v0, v1, v2 ):
+
+    return 0.5 * length( crossProduct( subtract( v1, v0 ), subtract( v2, v0 ) ) )
+
+
+def rotateVector( v, angle, axis ): # rotate v by angle about axis (axis must be unit length)
+
+    cosAngle = math.cos(angle)
+    sinAngle = math.sin(angle)
+
+    cross = crossProduct( axis, v )
+    dot   = dotProduct( axis, v ) * (1 - cosAngle)
+
+
+    return [ v[0] * cosAngle + cross[0] * sinAngle + axis[0] * dot,
+             v[1] * cosAngle + cross[1] * sinAngle + axis[1] * dot,
+             v[2] * cosAngle + cross[2] * sinAngle + axis[2] * dot ]
+
+
+
+# Read slices from a file
+#
+# Format:   numSlices
+#           numPointsInSlice0
+#           point0-0
+#           point0-1
+#           point0-2
+#           ...
+#           numPointsInSlice1
+#           point1-0
+#           point1-1
+#           point1-2
+#           ...
+#
+# Each 'pointA-B' above is 'x y z' separated by spaces.
+
+def readSlices( f ):
+
+    lines = f.readlines()
+
+    numSlices = int(lines[0])
+    slices = []
+    lineNum = 1
+
+    for i in range(numSlices):
+
+        numPoints = int(lines[lineNum])
+        lineNum += 1
+
+        slice = Slice( [ Vertex( [ float(n) for n in line.split() ] )
+                         for line in lines[lineNum:lineNum+numPoints] ] )
+
+        for v0,v1 in zip( slice.verts, slice.verts[1:] + [slice.verts[0]] ):
+            v0.nextV = v1
+
+        slices.append( slice )
+        lineNum += numPoints
+
+    slices.reverse() # so that first slice is on top
+
+    return slices
@@ -0,0 +1,3465 @@
+# Triangle strips: the mesh, file reading and strip building
+#
+# This module doesn't use OpenGL or GLFW, so it can be imported by
+# other programs and run where there is no display.  PyGL_2.py is the
+# viewer for its results.
+#
+# Usage: python tristrips.py [-n] [-p workers] [-s strategy] [-t seconds]
+#                            [-i stitch|restart] [-c cacheSize] [-P profile [-A]]
+#                            [-m megabytes] [-w tolerance] file_of_triangles ...
+#
+# Builds the triangle strips of each file and writes them to
+# 'file_of_triangles.strips', then prints timing and strip statistics.
+# Files ending in '.ply' (binary) or '.obj' are read as such, and
+# others in the format of readTriangles().
+# With -i, also writes the GL_TRIANGLE_STRIP index stream (raw uint16
+# or uint32 values) to 'file_of_triangles.indices', with the strips
+# either stitched by degenerate triangles or separated by primitive
+# restart indices.
+# The parsed mesh and its strips are cached in 'file_of_triangles.cache'.
+# Use -n to ignore the cache.  Cached strips are only reused if they
+# were built with the same -p, -s and -t options.
+# With -p, the strips are built in 'workers' processes, each working
+# on a region of the mesh (see buildTristripsParallel).
+# -s picks the strip-building strategy ('greedy', the default, or
+# 'bidirectional') and -t spends up to that many seconds merging the
+# strips by tunneling (see tunnelStrips).
+# With -c, also orders the triangles for a post-transform vertex cache
+# of that many vertices (see vertexCacheOrder), writes the order to
+# 'file_of_triangles.order' in the same format as a single strip, and
+# prints the cache miss ratios of the original, strip and new orders.
+# With -P, writes the time spent in each phase and the number of calls
+# to the strip-building heuristics to a JSON file (or, if its name ends
+# in '.folded', a flame-graph trace), and with -A also the memory
+# allocated in each phase (see profiler.py).
+# With -m, the strips are built out of core, in about that many
+# megabytes of memory however big the file is, and only the strips
+# file is written (see buildTristripsOutOfCore).
+# With -w, vertices within that distance of each other are merged
+# before adjacency is built, so that triangle soups (which have their
+# own copy of each vertex per triangle) get strips (see weldVertices).
+#
+# Strips file format:   numStrips
+#                       t0 t1 t2 ...    (triangle indices of one strip per line)
+#
+# You'll need Python 3 and must install these packages:
+#
+#   NumPy
+
+
+import sys, os, time, struct, hashlib, multiprocessing
+from multiprocessing import shared_memory
+
+import profiler
+
+try: # NumPy
+  import numpy as np
+except:
+  print( 'Error: NumPy has not been installed.' )
+  sys.exit(0)
+
+
+
+# TriangleMesh
+#
+# A TriangleMesh stores all triangles of a mesh in flat arrays rather
+# than as one Python object per triangle.  Triangle t is row t of each
+# array:
+#
+#   verts      (numVerts,2) float64  vertex coordinates
+#   faces      (n,3) int32           indices into 'verts', CCW
+#   adj        (n,3) int32           adj[t,i] is the triangle across edge
+#                                    faces[t,i] -> faces[t,(i+1)%3], or -1
+#   nextTri    (n,)  int32           next triangle on strip, or -1
+#   prevTri    (n,)  int32           previous triangle on strip, or -1
+#
+# 'nonManifoldEdges' lists the (v0,v1) edges found to be shared by
+# more than two triangles when adjacency was built (or, if adjacency
+# is supplied, as supplied with it).
+#
+# For debugging, you can set 'highlight1[t]' and 'highlight2[t]'.
+# This will cause triangle t to be highlighted when it's drawn by the
+# viewer.
+#
+# The vertex and face arrays can come straight from a caller (no file
+# needed).  Adjacency is built from them unless it is also supplied,
+# and strip links start out empty unless they are also supplied.
+
+class TriangleMesh(object):
+
+    def __init__( self, verts, faces, adj=None, nextTri=None, prevTri=None, nonManifoldEdges=None ):
+
+      self.verts = np.ascontiguousarray( verts, dtype=np.float64 ).reshape( -1, 2 )
+      self.faces = np.ascontiguousarray( faces, dtype=np.int32 ).reshape( -1, 3 )
+
+      n = len(self.faces)
+
+      if adj is None:
+          with profiler.phase( 'adjacency' ):
+              self.adj, self.nonManifoldEdges = buildAdjacency( self.faces, len(self.verts) )
+      else:
+          self.adj = np.ascontiguousarray( adj, dtype=np.int32 ).reshape( n, 3 )
+          self.nonManifoldEdges = np.zeros( (0,2), dtype=np.int64 ) if nonManifoldEdges is None else \
+                                  np.asarray( nonManifoldEdges, dtype=np.int64 ).reshape( -1, 2 )
+
+      if len(self.nonManifoldEdges) > 0:
+          print( 'Warning: %d edges are shared by more than two triangles, e.g. %s' %
+                 (len(self.nonManifoldEdges),
+                  ', '.join( '%d-%d' % tuple(e) for e in self.nonManifoldEdges[:5].tolist() )) )
+
+      if nextTri is None:
+          self.nextTri   = np.full( n, -1, dtype=np.int32 )
+          self.prevTri   = np.full( n, -1, dtype=np.int32 )
+          self.hasStrips = False # set by buildTristrips()
+      else:
+          self.nextTri   = np.ascontiguousarray( nextTri, dtype=np.int32 )
+          self.prevTri   = np.ascontiguousarray( prevTri, dtype=np.int32 )
+          self.hasStrips = True
+
+      self.highlight1 = np.zeros( n, dtype=bool ) # to cause drawing to highlight in colour 1
+      self.highlight2 = np.zeros( n, dtype=bool ) # to cause drawing to highlight in colour 2
+
+
+    def __len__(self):
+        return len(self.faces)
+
+
+    # String representation of triangle t
+
+    def triName( self, t ):
+        return 'tri-%d' % t
+
+
+    # Adjacent triangles of triangle t, as a list of indices
+
+    def adjTris( self, t ):
+        return [ a for a in self.adj[t].tolist() if a >= 0 ]
+
+
+    # Strips, as a list of lists of triangle indices in strip order
+
+    def strips(self):
+
+        nextTri = self.nextTri.tolist()
+        strips  = []
+
+        for t in np.flatnonzero( self.prevTri < 0 ).tolist():
+            strip = [t]
+            while nextTri[t] >= 0:
+                t = nextTri[t]
+                strip.append( t )
+            strips.append( strip )
+
+        return strips
+
+
+    # Centroids of all triangles, as an (n,2) array
+
+    def centroids(self):
+        return self.verts[self.faces].mean( axis=1 )
+
+
+    # Determine whether triangle t contains a point
+
+    def containsPoint( self, t, pt ):
+
+        v0, v1, v2 = self.verts[self.faces[t]].tolist()
+
+        return (turn( v0, v1, pt ) == LEFT_TURN and
+                turn( v1, v2, pt ) == LEFT_TURN and
+                turn( v2, v0, pt ) == LEFT_TURN)
+
+
+
+# Determine whether three points make a left or right turn
+
+LEFT_TURN  = 1
+RIGHT_TURN = 2
+COLLINEAR  = 3
+
+def turn( a, b, c ):
+
+    det = (a[0]-c[0]) * (b[1]-c[1]) - (b[0]-c[0]) * (a[1]-c[1])
+
+    if det > 0:
+        return LEFT_TURN
+    elif det < 0:
+        return RIGHT_TURN
+    else:
+        return COLLINEAR
+
+
+# Same as turn(), for (k,2) arrays of points a, b and c
+
+def turns( a, b, c ):
+
+    det = (a[:,0]-c[:,0]) * (b[:,1]-c[:,1]) - (b[:,0]-c[:,0]) * (a[:,1]-c[:,1])
+
+    return np.where( det > 0, LEFT_TURN, np.where( det < 0, RIGHT_TURN, COLLINEAR ) )
+
+# TriangleGrid
+#
+# A uniform grid over the bounding boxes of a mesh's triangles, for
+# finding the triangle that contains a point without testing every
+# triangle.  Cells are about the size of an average triangle, so each
+# cell lists only a few triangles and a query takes roughly constant
+# time.
+#
+# The cell lists are stored flat: the triangles overlapping cell c are
+# cellTris[cellStart[c]:cellStart[c+1]], in increasing index order, so
+# a query finds the same (lowest-index) triangle as testing every
+# triangle in order would.
+
+class TriangleGrid(object):
+
+    def __init__( self, mesh ):
+
+        self.mesh = mesh
+
+        n       = len(mesh)
+        corners = mesh.verts[mesh.faces] # (n,3,2)
+        lo      = corners.min( axis=1 )
+        hi      = corners.max( axis=1 )
+
+        if n > 0:
+            self.origin = lo.min( axis=0 )
+            extent      = hi.max( axis=0 ) - self.origin
+            cellSize    = (hi-lo).max( axis=1 ).mean()
+        else:
+            self.origin = np.zeros( 2 )
+            extent      = np.zeros( 2 )
+            cellSize    = 1.0
+
+        # Keep the number of cells in proportion to the number of triangles
+
+        cellSize = max( cellSize, 1e-12, extent.max() / (4*n+16) )
+        while np.prod( np.floor( extent / cellSize ) + 1 ) > 4*n+16:
+            cellSize *= 1.5
+
+        self.cellSize = cellSize
+        self.numCells = (np.floor( extent / cellSize ).astype( np.int64 ) + 1) # cells in x and y
+
+        # List each triangle in every cell its bounding box overlaps
+
+        c0 = self.cellOf( lo )
+        c1 = self.cellOf( hi )
+        w  = c1[:,0] - c0[:,0] + 1
+        h  = c1[:,1] - c0[:,1] + 1
+
+        tris  = np.repeat( np.arange( n ), w*h )
+        k     = np.arange( len(tris) ) - np.repeat( np.cumsum( w*h ) - w*h, w*h ) # position within the triangle's cells
+        cells = (c0[tris,1] + k // w[tris]) * self.numCells[0] + (c0[tris,0] + k % w[tris])
+
+        order = np.argsort( cells, kind='stable' )
+
+        self.cellTris  = tris[order].astype( np.int32 )
+        self.cellStart = np.searchsorted( cells[order], np.arange( self.numCells.prod() + 1 ) )
+
+
+    # Grid cells (x,y) of a (k,2) array of points, clamped to the grid
+
+    def cellOf( self, points ):
+
+        cells = np.floor( (points - self.origin) / self.cellSize ).astype( np.int64 )
+
+        return np.clip( cells, 0, self.numCells-1 )
+
+
+    # The triangle containing point pt, or None
+
+    def findTriangle( self, pt ):
+
+        pt = np.asarray( pt, dtype=np.float64 )
+
+        if (pt < self.origin).any() or (pt > self.origin + self.cellSize * self.numCells).any():
+            return None
+
+        cx, cy = self.cellOf( pt[None] )[0].tolist()
+        c      = cy * int( self.numCells[0] ) + cx
+
+        for t in self.cellTris[self.cellStart[c]:self.cellStart[c+1]].tolist():
+            if self.mesh.containsPoint( t, pt.tolist() ):
+                return t
+
+        return None
+
+
+    # The triangles containing each of a (k,2) array of points, as an
+    # array of k triangle indices with -1 where no triangle contains
+    # the point.  All points are tested at once.
+
+    def findTriangles( self, points ):
+
+        points = np.asarray( points, dtype=np.float64 ).reshape( -1, 2 )
+        found  = np.full( len(points), -1, dtype=np.int64 )
+
+        inGrid = np.flatnonzero( ((points >= self.origin) &
+                                  (points <= self.origin + self.cellSize * self.numCells)).all( axis=1 ) )
+
+        cells  = self.cellOf( points[inGrid] )
+        cells  = cells[:,1] * self.numCells[0] + cells[:,0]
+        starts = self.cellStart[cells]
+        counts = self.cellStart[cells+1] - starts
+
+        # One (point, candidate triangle) pair per triangle in the point's cell
+
+        pts   = np.repeat( inGrid, counts )
+        k     = np.arange( len(pts) ) - np.repeat( np.cumsum( counts ) - counts, counts )
+        cands = self.cellTris[np.repeat( starts, counts ) + k]
+
+        corners = self.mesh.verts[self.mesh.faces[cands]]
+        p       = points[pts]
+
+        inside = ((turns( corners[:,0], corners[:,1], p ) == LEFT_TURN) &
+                  (turns( corners[:,1], corners[:,2], p ) == LEFT_TURN) &
+                  (turns( corners[:,2], corners[:,0], p ) == LEFT_TURN))
+
+        # Candidates of each point are in increasing order, so keep the first hit
+
+        hitPts, first = np.unique( pts[inside], return_index=True )
+        found[hitPts] = cands[inside][first]
+
+        return found
+
+
+
+# ================================================================
+
+#   BELOW ARE A SET OF FUNCTIONS TO CONSTRUCT THE LARGEST SET OF
+#   TRIANGLE STRIPS WITH EACH TRIANGLE ON A STRIP WITHIN THE MESH
+#   THIS WAS ACCOMPLISHED THROUGH DEFINING FUNCTIONS SUCH AS:
+#   1. buildTristrips
+#   2. addToStrip
+#   3. searchAdjTri
+#   4. tunnelStrips
+
+   # After no adjacent triangle can be added, start with another
+   # triangle that is not a strip yet, and build a strip from there.
+
+# ================================================================
+# buildTristrips function
+# ================================================================
+#
+# Triangles that are not yet on a strip are kept in four buckets,
+# keyed by how many of their adjacent triangles are also not on a
+# strip (0 to 3).  When a triangle joins a strip, only the counts of
+# its adjacent triangles change, and each of those is pushed into its
+# new, lower bucket.  Stale bucket entries are skipped when popped, so
+# every seed is found in constant time and the whole pass is linear
+# in the number of triangles.
+#
+# The first strip starts at triangle 0.  Every later strip starts at
+# a least-connected triangle, since triangles with fewer than three
+# free adjacent triangles are in a corner or on an edge and are likely
+# to be the end triangle of some strip.
+#
+# The walk runs on Python lists copied out of the mesh arrays (which
+# are much faster to index one element at a time) and the strip links
+# are written back into 'mesh.nextTri' and 'mesh.prevTri' at the end.
+# The walk itself is in stripLinks(), which is also what the parallel
+# builder runs on each region of the mesh.
+
+def buildTristrips(mesh, strategy='greedy', tunnelTime=0.0):  # buildTristrips function with parameter mesh
+
+    with profiler.phase( 'strips' ):
+
+        progress = stripProgress()
+
+        nextTri, prevTri = stripStrategies[strategy]( mesh.adj, progress )
+
+        mesh.nextTri[:] = nextTri
+        mesh.prevTri[:] = prevTri
+        mesh.hasStrips  = True
+
+        progress( len(mesh) - int( (mesh.nextTri >= 0).sum() ), final=True )
+
+    if tunnelTime > 0:
+        with profiler.phase( 'tunnel' ):
+            tunnelStrips( mesh, tunnelTime )
+
+
+# Progress callback for strip building, which prints the number of
+# strips so far at most once every 'interval' seconds, and always
+# when called with final=True.  (Printing every strip took a good part
+# of the time on large meshes.)
+
+def stripProgress( interval=1.0 ):
+
+    lastTime = [ time.perf_counter() ]
+
+    def progress( cnt, final=False ):
+        now = time.perf_counter()
+        if final or now - lastTime[0] >= interval:
+            lastTime[0] = now
+            print( 'Generated %d tristrips' % cnt )
+
+    return progress
+
+
+# ================================================================
+# stripLinks function
+# ================================================================
+#
+# Builds strips over an (n,3) adjacency array (-1 for no neighbour)
+# and returns the 'nextTri' and 'prevTri' links as lists.  If given,
+# 'progress' is called with the number of strips after each strip,
+# and before that 'newStrip' is called with the list of the strip's
+# triangles, in order, so that a caller can show strips as they're
+# found.
+#
+# With 'bothWays', once a strip can't be grown any further forward it
+# is grown backward from its seed, by the same rule.  A seed often
+# has two free adjacent triangles, and the greedy walk only ever uses
+# one of them.
+
+def stripLinks(adjArray, progress=None, bothWays=False, newStrip=None):
+
+    n   = len(adjArray)
+    adj = adjArray.tolist()
+
+    counts   = (adjArray >= 0).sum( axis=1 )
+    freeAdjs = counts.tolist() # number of adjacent triangles not yet on a strip
+    onStrip  = [False] * n
+    nextTri  = [-1] * n
+    prevTri  = [-1] * n
+
+    # Each bucket is a stack.  The initial entries are pushed in
+    # reverse, so the first seeds of each count are popped in index
+    # order, but a triangle pushed again when its count drops (see
+    # addToStrip) is popped before them, most recently pushed first.
+
+    buckets = [ np.flatnonzero( counts == k )[::-1].tolist() for k in range(4) ]
+
+    cnt = 0
+    seed = 0 if n > 0 else None
+
+    while seed is not None:
+
+        # Grow a strip from the seed.  At each step, move to the
+        # adjacent triangle not yet on a strip that has the fewest
+        # free adjacent triangles itself (see searchAdjTri).
+
+        triangle = seed
+        addToStrip(triangle, adj, onStrip, freeAdjs, buckets)
+
+        unused_adjTri = searchAdjTri(triangle, adj, onStrip, freeAdjs)
+
+        while unused_adjTri is not None:
+            nextTri[triangle] = unused_adjTri
+            prevTri[unused_adjTri] = triangle
+            triangle = unused_adjTri
+            addToStrip(triangle, adj, onStrip, freeAdjs, buckets)
+            unused_adjTri = searchAdjTri(triangle, adj, onStrip, freeAdjs)
+
+        if bothWays:
+
+            triangle = seed
+            unused_adjTri = searchAdjTri(triangle, adj, onStrip, freeAdjs)
+
+            while unused_adjTri is not None:
+                prevTri[triangle] = unused_adjTri
+                nextTri[unused_adjTri] = triangle
+                triangle = unused_adjTri
+                addToStrip(triangle, adj, onStrip, freeAdjs, buckets)
+                unused_adjTri = searchAdjTri(triangle, adj, onStrip, freeAdjs)
+
+        if newStrip is not None:
+            head = triangle if bothWays else seed # the backward walk ends at the first triangle
+            strip = [head]
+            while nextTri[strip[-1]] >= 0:
+                strip.append(nextTri[strip[-1]])
+            newStrip(strip)
+
+        cnt = (cnt + 1)  # increment 'cnt' every time new triStrip.
+        if progress is not None:
+            progress(cnt)
+
+        # Pop the next seed from the lowest non-empty bucket
+
+        seed = None
+        for count,bucket in enumerate(buckets):
+            while bucket:
+                t = bucket.pop()
+                if not onStrip[t] and freeAdjs[t] == count:
+                    seed = t
+                    break
+            if seed is not None:
+                break
+
+    return nextTri, prevTri
+
+
+def bidirectionalLinks(adjArray, progress=None, newStrip=None):
+
+    return stripLinks(adjArray, progress, bothWays=True, newStrip=newStrip)
+
+
+# Strip-building strategies, by name.  Each is called with the
+# adjacency array, a progress callback (or None) and optionally a
+# newStrip callback (see stripLinks), and returns the 'nextTri' and
+# 'prevTri' links as lists.
+
+stripStrategies = { 'greedy':        stripLinks,
+                    'bidirectional': bidirectionalLinks }
+
+
+# ================================================================
+# addToStrip function
+# ================================================================
+def addToStrip(t, adj, onStrip, freeAdjs, buckets): # put triangle t on a strip and update its neighbours' counts
+
+    onStrip[t] = True
+
+    for a in adj[t]:
+        if a >= 0 and not onStrip[a]:
+            freeAdjs[a] -= 1
+            buckets[freeAdjs[a]].append(a)
+
+# ================================================================
+# searchAdjTri function
+# ================================================================
+def searchAdjTri(t, adj, onStrip, freeAdjs): # adjacent triangle to continue the strip with, or None
+    best = None
+    for a in adj[t]:
+        if a >= 0 and not onStrip[a] and (best is None or freeAdjs[a] < freeAdjs[best]):
+            best = a # first of the least-connected free adjacent triangles
+    return best
+
+
+
+# ================================================================
+# Tunneling
+# ================================================================
+#
+# tunnelStrips() reduces the number of strips after they are built,
+# by the tunneling method of Stewart ("Tunneling for Triangle
+# Strips in Continuous Level-of-Detail Meshes", 2001).
+#
+# Think of the strips as a set of edges in the dual graph, where the
+# triangles are the nodes and adjacent triangles are joined by an
+# edge.  Each triangle has at most two strip edges, and a triangle
+# with fewer than two is the end of a strip.  A tunnel is a path
+# between two strip ends whose edges alternate between non-strip and
+# strip edges, starting and ending with a non-strip edge:
+#
+#      end  - - -  t1  =====  t2  - - -  t3  =====  t4  - - -  end
+#
+# Swapping the strip and non-strip edges along the path keeps every
+# triangle in between at the same number of strip edges and gives
+# each end one more, so the strip edges gain one and the strips lose
+# one, as long as the swap doesn't close a strip into a cycle.
+#
+# Tunnels are found by a breadth-first search from each strip end,
+# up to 'maxDepth' non-strip edges long, and the search repeats over
+# the remaining strip ends until it finds no more tunnels or runs out
+# of time.
+
+def tunnelStrips( mesh, timeBudget=1.0, maxDepth=6 ):
+
+    startTime = time.perf_counter()
+    deadline  = startTime + timeBudget
+
+    n   = len(mesh)
+    adj = mesh.adj.tolist()
+
+    links = [ [ t for t in pair if t >= 0 ] # the (up to two) strip edges of each triangle
+              for pair in zip( mesh.prevTri.tolist(), mesh.nextTri.tolist() ) ]
+
+    before  = len( mesh.strips() )
+    strips  = before
+    changed = True
+
+    while changed and time.perf_counter() < deadline:
+
+        changed = False
+
+        for s in range(n):
+
+            if len(links[s]) == 2:
+                continue
+
+            if time.perf_counter() > deadline:
+                break
+
+            path = findTunnel( s, adj, links, maxDepth )
+
+            if path is not None and swapTunnel( path, links ):
+                strips -= 1
+                changed = True
+
+    # Turn the strip edges back into links
+
+    nextTri = [-1] * n
+    prevTri = [-1] * n
+    visited = [False] * n
+
+    for s in range(n):
+        if len(links[s]) < 2 and not visited[s]:
+            prev, t = -1, s
+            while t >= 0:
+                visited[t] = True
+                prevTri[t] = prev
+                nxt = [ u for u in links[t] if u != prev ]
+                nextTri[t] = nxt[0] if nxt else -1
+                prev, t = t, nextTri[t]
+
+    mesh.nextTri[:] = nextTri
+    mesh.prevTri[:] = prevTri
+
+    elapsed = time.perf_counter() - startTime
+
+    print( 'Tunneling: %d -> %d strips, mean length %.2f -> %.2f (%.2fs)' %
+           (before, strips, n / max( before, 1 ), n / max( strips, 1 ), elapsed) )
+
+    return before, strips
+
+
+# Find a tunnel from strip end 's', as a list of triangles starting
+# at 's', or None.  'parent' records how each triangle was reached, so
+# no triangle appears twice on a tunnel.
+
+def findTunnel( s, adj, links, maxDepth ):
+
+    parent   = { s: -1 }
+    frontier = [s]
+
+    for depth in range(maxDepth):
+
+        nextFrontier = []
+
+        for u in frontier:
+            for v in adj[u]:
+
+                if v < 0 or v in parent or v in links[u]: # follow non-strip edges only
+                    continue
+
+                parent[v] = u
+
+                if len(links[v]) < 2: # reached another strip end
+                    path = [v]
+                    while parent[path[-1]] >= 0:
+                        path.append( parent[path[-1]] )
+                    return path[::-1]
+
+                for w in links[v]: # then a strip edge
+                    if w not in parent:
+                        parent[w] = v
+                        nextFrontier.append( w )
+
+        frontier = nextFrontier
+
+    return None
+
+
+# Swap the strip and non-strip edges along a tunnel.  If that makes a
+# cycle, swap them back and return False.
+
+def swapTunnel( path, links ):
+
+    for i in range( len(path) - 1 ):
+        a, b = path[i], path[i+1]
+        if i % 2 == 0:
+            links[a].append( b )
+            links[b].append( a )
+        else:
+            links[a].remove( b )
+            links[b].remove( a )
+
+    # Walk each strip that now runs through the tunnel.  A walk that
+    # comes back to where it started has found a cycle.
+
+    seen = set()
+    for start in path:
+        if start in seen:
+            continue
+        seen.add( start )
+        for first in links[start]:
+            prev, t = start, first
+            while t != start and t not in seen:
+                seen.add( t )
+                nxt = [ u for u in links[t] if u != prev ]
+                if not nxt:
+                    break
+                prev, t = t, nxt[0]
+            if t == start:
+                for i in range( len(path) - 1 ): # undo
+                    a, b = path[i], path[i+1]
+                    if i % 2 == 0:
+                        links[a].remove( b )
+                        links[b].remove( a )
+                    else:
+                        links[a].append( b )
+                        links[b].append( a )
+                return False
+
+    return True
+
+
+
+# ================================================================
+# Incremental strip maintenance
+# ================================================================
+#
+# A StripEditor adds triangles to and removes triangles from a mesh
+# that already has strips, and repairs the strips around each edit
+# instead of building them all again:
+#
+#   1. The adjacency is updated from a dictionary of the triangles on
+#      each edge, which is built once and kept up to date.
+#
+#   2. The triangles around the edit (the added triangles, and the
+#      triangles adjacent to any added or removed triangle) are cut
+#      out of their strips.
+#
+#   3. The strip pieces on either side are grown back over the
+#      cut-out triangles, by the same rule as stripLinks(), and new
+#      strips are grown over any left over.
+#
+#   4. Every strip end around the edit is joined to an adjacent strip
+#      end where it can be, and then short tunnels (see tunnelStrips)
+#      are looked for from the strip ends that remain.
+#
+# The mesh arrays are views of larger arrays with room to grow, and a
+# removed triangle is replaced by the last triangle, so an edit takes
+# time in proportion to its size rather than to the size of the mesh
+# (except that joining two strips walks the shorter of them, to check
+# that they aren't the same strip and perhaps to reverse it).
+#
+# Local repairs don't find strips as long as a full build does, so the
+# editor keeps count of the strips, and when there are more than
+# (1 + tolerance) times as many as after the last full build, it
+# builds them all again.
+
+class StripEditor(object):
+
+    def __init__( self, mesh, tolerance=0.1, strategy='greedy', tunnelDepth=4 ):
+
+        self.mesh        = mesh
+        self.tolerance   = tolerance
+        self.strategy    = strategy
+        self.tunnelDepth = tunnelDepth
+
+        if not mesh.hasStrips:
+            self.rebuild()
+
+        # Arrays with room to grow, of which the mesh arrays are views
+
+        self.store = {}
+        for name in [ 'verts', 'faces', 'adj', 'nextTri', 'prevTri', 'highlight1', 'highlight2' ]:
+            array = getattr( mesh, name )
+            self.store[name] = np.array( array )
+            setattr( mesh, name, self.store[name][:len(array)] )
+
+        # The triangles on each edge, keyed by (lower vertex, higher vertex)
+
+        self.edgeTris = {}
+        for t,face in enumerate( mesh.faces.tolist() ):
+            for i in range(3):
+                self.edgeTris.setdefault( edgeKey( face[i], face[(i+1)%3] ), [] ).append( t )
+
+        self.numLinks   = int( (mesh.nextTri >= 0).sum() )
+        self.fullStrips = len(mesh) - self.numLinks
+
+
+    # Number of strips
+
+    def numStrips(self):
+        return len(self.mesh) - self.numLinks
+
+
+    # Add triangles (a (k,3) array of vertex indices) and, optionally,
+    # vertices, which are numbered after the mesh's existing vertices.
+    # Degenerate triangles and triangles with a vertex index out of
+    # range are skipped.  Returns the indices of the
+    # added triangles.
+
+    def addTriangles( self, faces, verts=None ):
+
+        mesh = self.mesh
+
+        if verts is not None:
+            verts = np.asarray( verts, dtype=np.float64 ).reshape( -1, 2 )
+            self.resize( 'verts', len(mesh.verts) + len(verts) )[-len(verts):] = verts
+
+        faces = np.asarray( faces, dtype=np.int64 ).reshape( -1, 3 )
+
+        outOfRange = ((faces < 0) | (faces >= len(mesh.verts))).any( axis=1 )
+        for face in faces[outOfRange].tolist():
+            print( 'Triangle %s: Vertex index is not in range [0,%d].' % (face, len(mesh.verts)-1) )
+
+        faces = faces[~outOfRange]
+        faces = faces[turns( mesh.verts[faces[:,0]], mesh.verts[faces[:,1]], mesh.verts[faces[:,2]] ) != COLLINEAR]
+
+        n     = len(mesh)
+        added = list( range( n, n+len(faces) ) )
+
+        self.resize( 'faces', n+len(faces) )[n:] = faces
+        self.resize( 'adj', n+len(faces) )[n:] = -1
+        self.resize( 'nextTri', n+len(faces) )[n:] = -1
+        self.resize( 'prevTri', n+len(faces) )[n:] = -1
+        self.resize( 'highlight1', n+len(faces) )[n:] = False
+        self.resize( 'highlight2', n+len(faces) )[n:] = False
+
+        # Connect each new triangle to the triangle already on each of
+        # its edges, if there is just one
+
+        region = set( added )
+
+        for t,face in zip( added, faces.tolist() ):
+            for i in range(3):
+                tris = self.edgeTris.setdefault( edgeKey( face[i], face[(i+1)%3] ), [] )
+                if len(tris) == 1:
+                    a = tris[0]
+                    mesh.adj[t,i] = a
+                    mesh.adj[a,self.edgeIndex( a, face[i], face[(i+1)%3] )] = t
+                    region.add( a )
+                elif len(tris) > 1:
+                    print( 'Warning: edge %d-%d is shared by more than two triangles' % (face[i], face[(i+1)%3]) )
+                tris.append( t )
+
+        self.repair( region )
+
+        return added
+
+
+    # Remove triangles, given their indices.  The last triangles of the
+    # mesh are moved into the holes left by removed triangles.  Returns
+    # a dictionary from the old index to the new index of each moved
+    # triangle.
+
+    def removeTriangles( self, tris ):
+
+        mesh     = self.mesh
+        region   = set()
+        moved    = {}
+        original = {} # current index -> old index, of each moved triangle
+
+        for t in sorted( set( int(t) for t in tris ), reverse=True ): # so the last triangle is never one to remove
+
+            # Cut t out of its strip and away from its neighbours
+
+            for p,q in [ (mesh.prevTri[t], t), (t, mesh.nextTri[t]) ]:
+                if p >= 0 and q >= 0:
+                    self.unlink( p, q )
+                    region.update( [p, q] )
+
+            face = mesh.faces[t].tolist()
+            for i in range(3):
+                a = mesh.adj[t,i]
+                if a >= 0:
+                    mesh.adj[a,mesh.adj[a].tolist().index( t )] = -1
+                    region.add( a )
+                self.edgeTris[edgeKey( face[i], face[(i+1)%3] )].remove( t )
+
+            region.discard( t )
+
+            # Move the last triangle into t's place
+
+            last = len(mesh) - 1
+
+            if last != t:
+                self.moveTriangle( last, t )
+                if last in region:
+                    region.discard( last )
+                    region.add( t )
+                old = original.pop( last, last ) # it may have moved before
+                moved[old]  = t
+                original[t] = old
+
+            for name in [ 'faces', 'adj', 'nextTri', 'prevTri', 'highlight1', 'highlight2' ]:
+                self.resize( name, last )
+
+        self.repair( region )
+
+        return moved
+
+
+    # Move triangle 'src' to index 'dst', and update every reference to it
+
+    def moveTriangle( self, src, dst ):
+
+        mesh = self.mesh
+
+        for name in [ 'faces', 'adj', 'nextTri', 'prevTri', 'highlight1', 'highlight2' ]:
+            getattr( mesh, name )[dst] = getattr( mesh, name )[src]
+
+        for a in mesh.adj[dst].tolist():
+            if a >= 0:
+                mesh.adj[a,mesh.adj[a].tolist().index( src )] = dst
+
+        if mesh.prevTri[dst] >= 0:
+            mesh.nextTri[mesh.prevTri[dst]] = dst
+        if mesh.nextTri[dst] >= 0:
+            mesh.prevTri[mesh.nextTri[dst]] = dst
+
+        face = mesh.faces[dst].tolist()
+        for i in range(3):
+            tris = self.edgeTris[edgeKey( face[i], face[(i+1)%3] )]
+            tris[tris.index( src )] = dst
+
+
+    # Resize one of the mesh arrays to 'length' entries, growing its
+    # store if there isn't room, and return the new array
+
+    def resize( self, name, length ):
+
+        store = self.store[name]
+
+        if length > len(store):
+            grown = np.zeros( (max( length, 2*len(store) ),) + store.shape[1:], dtype=store.dtype )
+            grown[:len(store)] = store
+            self.store[name] = store = grown
+
+        view = store[:length]
+        setattr( self.mesh, name, view )
+
+        return view
+
+
+    # Which edge of triangle t runs between vertices u and v
+
+    def edgeIndex( self, t, u, v ):
+
+        face = self.mesh.faces[t].tolist()
+        for i in range(3):
+            if edgeKey( face[i], face[(i+1)%3] ) == edgeKey( u, v ):
+                return i
+
+
+    def link( self, a, b ):
+        self.mesh.nextTri[a] = b
+        self.mesh.prevTri[b] = a
+        self.numLinks += 1
+
+
+    def unlink( self, a, b ):
+        self.mesh.nextTri[a] = -1
+        self.mesh.prevTri[b] = -1
+        self.numLinks -= 1
+
+
+    # Rebuild the strips around the triangles in 'region'
+
+    def repair( self, region ):
+
+        mesh = self.mesh
+
+        # Cut the region's triangles out of their strips.  The strip
+        # pieces left on either side end next to the region.
+
+        ends = set( region )
+
+        for t in region:
+            if mesh.prevTri[t] >= 0:
+                ends.add( int( mesh.prevTri[t] ) )
+                self.unlink( mesh.prevTri[t], t )
+            if mesh.nextTri[t] >= 0:
+                ends.add( int( mesh.nextTri[t] ) )
+                self.unlink( t, mesh.nextTri[t] )
+
+        # Grow the strip pieces on either side of the region back into
+        # it, and then grow new strips over whatever is left of it,
+        # least-connected triangles first.  Growing always moves to
+        # the free adjacent triangle with the fewest free adjacent
+        # triangles, as in searchAdjTri().
+
+        adj      = { t: [ a for a in mesh.adj[t].tolist() if a >= 0 ] for t in region }
+        free     = set( region )
+        freeAdjs = { t: sum( a in free for a in adj[t] ) for t in region }
+
+        def take( t ):
+            free.discard( t )
+            for a in adj[t]:
+                if a in free:
+                    freeAdjs[a] -= 1
+
+        def grow( t, forward ):
+            while True:
+                nexts = [ a for a in mesh.adj[t].tolist() if a in free ]
+                if not nexts:
+                    return
+                a = min( nexts, key=lambda a: freeAdjs[a] )
+                take( a )
+                if forward:
+                    self.link( t, a )
+                else:
+                    self.link( a, t )
+                t = a
+
+        for t in sorted( ends - region ):
+            if mesh.nextTri[t] < 0:
+                grow( t, True )
+            if mesh.prevTri[t] < 0:
+                grow( t, False )
+
+        while free:
+
+            seed = min( free, key=lambda t: (freeAdjs[t], t) )
+            take( seed )
+
+            grow( seed, True )
+            if self.strategy == 'bidirectional':
+                grow( seed, False )
+
+        # Join the strip ends around the region to adjacent strip ends
+
+        for a in sorted( ends ):
+            for b in mesh.adj[a].tolist():
+
+                if not self.isEnd( a ):
+                    break
+                if b < 0 or not self.isEnd( b ):
+                    continue
+
+                self.join( a, b )
+
+        # Then look for tunnels (see tunnelStrips) from the strip ends
+        # that are still around the region
+
+        links = StripLinkView( mesh )
+
+        for s in sorted( ends ):
+            if self.isEnd( s ):
+                path = findTunnel( s, mesh.adj, links, self.tunnelDepth )
+                if path is not None:
+                    self.swapTunnel( [ int(t) for t in path ] )
+
+        if self.numStrips() > (1.0 + self.tolerance) * self.fullStrips:
+            self.rebuild()
+
+
+    # Swap the strip and non-strip edges along a tunnel.  The strip
+    # edges are cut first, which leaves every triangle on the tunnel
+    # at the end of a strip piece, and then the pieces are joined.  If
+    # a join would close a cycle, the swap is undone.
+
+    def swapTunnel( self, path ):
+
+        edges = list( zip( path[:-1], path[1:] ) )
+
+        for a,b in edges[1::2]:
+            self.cut( a, b )
+
+        for i,(a,b) in enumerate( edges[0::2] ):
+            if not self.join( a, b ):
+                for a,b in edges[0:2*i:2]:
+                    self.cut( a, b )
+                for a,b in edges[1::2]:
+                    self.join( a, b )
+                return
+
+
+    # Link strip ends a and b, reversing one strip if need be.
+    # Returns False, without linking them, if they're the same strip.
+
+    def join( self, a, b ):
+
+        mesh = self.mesh
+
+        shorter = shorterStrip( a, b, mesh.nextTri, mesh.prevTri )
+        if shorter is None:
+            return False
+
+        # Orient the strips so that a is the last triangle of one and
+        # b is the first of the other, as in joinStrips()
+
+        if mesh.nextTri[a] >= 0 or mesh.prevTri[b] >= 0:
+            if mesh.nextTri[b] < 0 and mesh.prevTri[a] < 0:
+                a, b = b, a
+            else:
+                reverseStrip( shorter, mesh.nextTri, mesh.prevTri )
+                if mesh.nextTri[a] >= 0:
+                    a, b = b, a
+
+        self.link( a, b )
+
+        return True
+
+
+    # Cut the strip link between a and b, whichever way it runs
+
+    def cut( self, a, b ):
+
+        if self.mesh.nextTri[a] == b:
+            self.unlink( a, b )
+        else:
+            self.unlink( b, a )
+
+
+    def isEnd( self, t ):
+        return self.mesh.nextTri[t] < 0 or self.mesh.prevTri[t] < 0
+
+
+    # Build all the strips again.  The greedy walk depends on the order
+    # of the triangles, and edits change that order, so the rebuilt
+    # strips are only kept if there are fewer of them.  Either way,
+    # the rebuilt strip count is what later edits are compared with.
+
+    def rebuild(self):
+
+        mesh = self.mesh
+
+        nextTri, prevTri = stripStrategies[self.strategy]( mesh.adj )
+
+        numLinks        = sum( t >= 0 for t in nextTri )
+        self.fullStrips = len(mesh) - numLinks
+
+        if not mesh.hasStrips or numLinks > self.numLinks:
+            mesh.nextTri[:] = nextTri
+            mesh.prevTri[:] = prevTri
+            mesh.hasStrips  = True
+            self.numLinks   = numLinks
+
+
+# The strip edges of each triangle, as findTunnel() and swapTunnel()
+# take them, read from a mesh's strip links
+
+class StripLinkView(object):
+
+    def __init__( self, mesh ):
+        self.mesh = mesh
+
+    def __getitem__( self, t ):
+        return [ int(u) for u in (self.mesh.prevTri[t], self.mesh.nextTri[t]) if u >= 0 ]
+
+
+def edgeKey( u, v ):
+    return (u, v) if u < v else (v, u)
+
+
+# Given the end triangles a and b of two strips, return None if they
+# are the same strip, or else whichever of a and b is on the shorter
+# strip.  Walks both strips at once, so it only goes as far as the
+# shorter one.
+
+def shorterStrip( a, b, nextTri, prevTri ):
+
+    walkA = walkStrip( a, nextTri, prevTri )
+    walkB = walkStrip( b, nextTri, prevTri )
+
+    while True:
+        t = next( walkA, None )
+        if t == b:
+            return None
+        if t is None:
+            return a
+        if next( walkB, None ) is None:
+            return b
+
+
+# The triangles of a strip, starting from the end triangle 'end'
+
+def walkStrip( end, nextTri, prevTri ):
+
+    links = nextTri if prevTri[end] < 0 else prevTri
+
+    t = int( end )
+    while t >= 0:
+        yield t
+        t = int( links[t] )
+
+
+
+# ================================================================
+# Parallel strip building
+# ================================================================
+#
+# buildTristripsParallel() splits the mesh into regions and builds the
+# strips of each region in a separate process:
+#
+#   1. Connected components are found by union-find over the
+#      adjacency (see connectedComponents()).
+#
+#   2. Triangles are ordered by component and, within a component, by
+#      the Morton code of their centroid, and that order is cut into
+#      regions of at most 'regionSize' triangles.  A cut that would
+#      split a component of at most 'regionSize' triangles is moved
+#      back to the start of that component, so small components stay
+#      whole, and only larger ones are cut, into spatially coherent
+#      pieces.
+#
+#   3. A process pool runs stripLinks() on each region, treating
+#      neighbours in other regions as absent.  The adjacency, region
+#      and link arrays are in shared memory, so each worker reads its
+#      region and writes its links without any copying through pipes.
+#
+#   4. Strips are joined where the last triangle of one strip is
+#      adjacent to the first triangle of another (see joinStrips()),
+#      which mostly reconnects strips cut at region boundaries.
+
+def buildTristripsParallel( mesh, workers=None, regionSize=50000, strategy='greedy', tunnelTime=0.0 ):
+
+    n = len(mesh)
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    # Order the triangles by component, then spatially, and cut into regions
+
+    with profiler.phase( 'partition' ):
+        order, regions = meshRegions( mesh, regionSize )
+
+    rank = np.empty( n, dtype=np.int32 ) # position of each triangle in 'order'
+    rank[order] = np.arange( n, dtype=np.int32 )
+
+    # Build the strips of each region, in a pool if there's more than one
+
+    arrays = { 'adj': mesh.adj, 'order': order, 'rank': rank,
+               'nextTri': mesh.nextTri, 'prevTri': mesh.prevTri }
+
+    if workers <= 1 or len(regions) <= 1:
+
+        for start,end in regions:
+            regionStrips( arrays, start, end, strategy )
+
+    else:
+
+        blocks = {}
+        try:
+            names = {}
+            for name,array in arrays.items():
+                blocks[name] = shared_memory.SharedMemory( create=True, size=max( array.nbytes, 1 ) )
+                np.ndarray( array.shape, dtype=array.dtype, buffer=blocks[name].buf )[...] = array
+                names[name] = (blocks[name].name, array.shape, array.dtype.str)
+
+            with multiprocessing.Pool( min( workers, len(regions) ), initializer=attachShared, initargs=(names,) ) as pool:
+                pool.starmap( regionStripsShared, [ (start, end, strategy) for start,end in regions ] )
+
+            for name in [ 'nextTri', 'prevTri' ]:
+                arrays[name][...] = np.ndarray( arrays[name].shape, dtype=arrays[name].dtype, buffer=blocks[name].buf )
+
+        finally:
+            for block in blocks.values():
+                block.close()
+                block.unlink()
+
+    with profiler.phase( 'join' ):
+        joinStrips( mesh )
+
+    mesh.hasStrips = True
+
+    if tunnelTime > 0:
+        with profiler.phase( 'tunnel' ):
+            tunnelStrips( mesh, tunnelTime )
+
+
+# Order the triangles of a mesh by connected component and then by
+# the Morton code of their centroid, and cut that order into regions
+# of at most 'regionSize' triangles, without splitting components
+# that fit in a region.  Returns the order and a list of (start, end)
+# positions in it, one per region.
+
+def meshRegions( mesh, regionSize ):
+
+    n          = len(mesh)
+    components = connectedComponents( mesh.adj )
+    morton     = mortonCodes( mesh.centroids() )
+
+    order  = np.lexsort( (morton, components) ).astype( np.int32 )
+    labels = components[order] # each component is a run of equal labels
+
+    regions = []
+    start   = 0
+
+    while start < n:
+
+        end = min( start + regionSize, n )
+
+        if end < n and labels[end-1] == labels[end]: # the cut splits a component
+            first = int( np.searchsorted( labels, labels[end], side='left' ) )
+            last  = int( np.searchsorted( labels, labels[end], side='right' ) )
+            if first > start and last - first <= regionSize:
+                end = first # it fits in the next region
+
+        regions.append( (start, end) )
+        start = end
+
+    return order, regions
+
+
+# Build the strips of the triangles order[start:end], which make up
+# one region, and write their links (as global triangle indices) into
+# the 'nextTri' and 'prevTri' arrays.
+
+def regionStrips( arrays, start, end, strategy ):
+
+    tris = arrays['order'][start:end].astype( np.int64 )
+    adj  = arrays['adj'][tris]
+
+    local = arrays['rank'][np.maximum( adj, 0 )].astype( np.int64 ) - start # index within the region
+    adj   = np.where( (adj >= 0) & (local >= 0) & (local < end - start), local, -1 )
+
+    nextTri, prevTri = stripStrategies[strategy]( adj )
+    nextTri = np.array( nextTri, dtype=np.int64 )
+    prevTri = np.array( prevTri, dtype=np.int64 )
+
+    arrays['nextTri'][tris] = np.where( nextTri >= 0, tris[nextTri], -1 )
+    arrays['prevTri'][tris] = np.where( prevTri >= 0, tris[prevTri], -1 )
+
+
+# Shared-memory arrays of a pool worker, set up by attachShared()
+
+workerArrays = None
+workerBlocks = None
+
+def attachShared( arrays ):
+
+    global workerArrays, workerBlocks
+
+    workerBlocks = {}
+    workerArrays = {}
+
+    for name,(blockName,shape,dtype) in arrays.items():
+        workerBlocks[name] = shared_memory.SharedMemory( name=blockName )
+        workerArrays[name] = np.ndarray( shape, dtype=dtype, buffer=workerBlocks[name].buf )
+
+
+def regionStripsShared( start, end, strategy ):
+
+    regionStrips( workerArrays, start, end, strategy )
+
+
+# Label the connected components of a mesh, given its adjacency.
+# Each triangle's label is the smallest triangle index in its
+# component.
+
+def connectedComponents( adj ):
+
+    a, i = np.nonzero( adj >= 0 )
+    b    = adj[a,i].astype( np.int64 )
+    keep = a < b
+
+    return unionFind( len(adj), a[keep], b[keep] )
+
+
+# Label the groups of 0..n-1 that are joined, directly or through
+# others, by the pairs a[k],b[k].  Each label is the smallest index in
+# its group.
+#
+# This is union-find done on whole arrays at a time: every pair hooks
+# the root of its larger-labelled index onto the root of the other,
+# then the parent pointers are jumped until every index points at its
+# root.  That repeats until no pair joins two different roots.
+
+def unionFind( n, a, b ):
+
+    parent = np.arange( n, dtype=np.int64 )
+
+    while True:
+
+        pa, pb = parent[a], parent[b]
+        differ = pa != pb
+
+        if not differ.any():
+            return parent
+
+        np.minimum.at( parent, np.maximum( pa, pb )[differ], np.minimum( pa, pb )[differ] )
+
+        while True: # pointer jumping
+            grand = parent[parent]
+            if (grand == parent).all():
+                break
+            parent = grand
+
+
+# Morton (Z-order) codes of (k,2) points, with 'bits' bits per axis
+# over the points' bounding box, or over 'box' (a pair of (2,) arrays
+# of the lowest and highest coordinates) if given.  Points that are
+# close together mostly get close codes.
+#
+# Both axes are scaled by the longer side of the box, so the Z-order
+# cells are square.  (Scaling each axis by its own side stretches the
+# cells of a long thin mesh into slivers across it, and then a run of
+# codes is scattered along the mesh instead of being one compact
+# patch.)
+
+def mortonCodes( points, bits=16, box=None ):
+
+    if len(points) == 0:
+        return np.zeros( 0, dtype=np.uint64 )
+
+    lo, hi = (points.min( axis=0 ), points.max( axis=0 )) if box is None else box
+    extent = max( float( (hi - lo).max() ), 1e-300 )
+    q      = (np.clip( (points - lo) / extent, 0.0, 1.0 ) * ((1 << bits) - 1)).astype( np.uint64 )
+
+    return spreadBits( q[:,0] ) | (spreadBits( q[:,1] ) << np.uint64(1))
+
+
+def spreadBits( x ): # put a zero bit between each of the low 32 bits of x
+
+    x = x & np.uint64(0x00000000FFFFFFFF)
+    x = (x | (x << np.uint64(16))) & np.uint64(0x0000FFFF0000FFFF)
+    x = (x | (x << np.uint64(8)))  & np.uint64(0x00FF00FF00FF00FF)
+    x = (x | (x << np.uint64(4)))  & np.uint64(0x0F0F0F0F0F0F0F0F)
+    x = (x | (x << np.uint64(2)))  & np.uint64(0x3333333333333333)
+    x = (x | (x << np.uint64(1)))  & np.uint64(0x5555555555555555)
+
+    return x
+
+
+# Join strips whose end triangles are adjacent.  Strips can be
+# followed in either direction, so when two first triangles (or two
+# last triangles) meet, the shorter strip is reversed to make the
+# join.  'otherEnd' maps each end triangle of a strip to the one at
+# its other end and is kept up to date as strips are joined, so a
+# strip is never joined onto itself.
+
+def joinStrips( mesh ):
+
+    heads = chainEnds( mesh.prevTri )
+    tails = chainEnds( mesh.nextTri )
+    first = np.flatnonzero( mesh.prevTri < 0 )
+
+    if len(first) < 2:
+        return
+
+    nextTri = mesh.nextTri.tolist()
+    prevTri = mesh.prevTri.tolist()
+
+    otherEnd = dict( zip( first.tolist(), tails[first].tolist() ) )
+    otherEnd.update( zip( tails[first].tolist(), first.tolist() ) )
+
+    lengths = np.bincount( heads, minlength=len(mesh) )
+    length  = dict( zip( first.tolist(), lengths[first].tolist() ) ) # strip length, by both ends
+    length.update( zip( tails[first].tolist(), lengths[first].tolist() ) )
+
+    ends = np.array( list( otherEnd ) )
+    adj  = dict( zip( ends.tolist(), mesh.adj[ends].tolist() ) )
+
+    for a in ends.tolist():
+        for b in adj[a]:
+
+            if a not in otherEnd: # no longer an end
+                break
+            if b < 0 or b not in otherEnd or otherEnd[a] == b or a == b:
+                continue
+
+            # Orient the strips so that a is the last triangle of one
+            # and b is the first of the other, then link them
+
+            if nextTri[a] >= 0 or prevTri[b] >= 0:
+                if nextTri[b] < 0 and prevTri[a] < 0:
+                    a, b = b, a
+                else: # both first or both last triangles
+                    reverseStrip( a if length[a] <= length[b] else b, nextTri, prevTri )
+                    if nextTri[a] >= 0:
+                        a, b = b, a
+
+            nextTri[a] = b
+            prevTri[b] = a
+
+            head, tail = otherEnd.pop( a ), otherEnd.pop( b )
+            otherEnd[head] = tail
+            otherEnd[tail] = head
+
+            length[head] = length[tail] = length.pop( a ) + length.pop( b )
+            break
+
+    mesh.nextTri[:] = nextTri
+    mesh.prevTri[:] = prevTri
+
+
+# For each triangle, the triangle at the end of its strip found by
+# following the links in 'links' (prevTri gives the first triangle of
+# the strip and nextTri the last).  Done by pointer jumping, so it
+# takes about log2(longest strip) passes over the whole array.
+
+def chainEnds( links ):
+
+    ends = np.where( links >= 0, links, np.arange( len(links) ) )
+
+    while True:
+        jumped = ends[ends]
+        if (jumped == ends).all():
+            return ends
+        ends = jumped
+
+
+# Reverse the strip that has triangle 'end' at one of its ends
+
+def reverseStrip( end, nextTri, prevTri ):
+
+    forward = prevTri[end] < 0
+
+    t = end
+    while t >= 0:
+        step = nextTri[t] if forward else prevTri[t]
+        nextTri[t], prevTri[t] = prevTri[t], nextTri[t]
+        t = step
+
+
+
+# ================================================================
+# Out-of-core strip building
+# ================================================================
+#
+# buildTristripsOutOfCore() builds the strips of a triangle file that
+# is too big to hold in memory, keeping its working set within about
+# 'memoryLimit' bytes whatever the size of the file:
+#
+#   1. The file is parsed a block at a time.  Vertices go to a file in
+#      'workDir', and each block of triangles is appended to another
+#      file, along with the Morton codes of their centroids.
+#
+#   2. The Morton codes are counted by their top 16 bits, and runs of
+#      consecutive code ranges are grouped into chunks of at most
+#      about 'memoryLimit' / OOC_BYTES_PER_TRI triangles.  Each
+#      triangle is appended to the file of its chunk.  A chunk is then
+#      a spatially coherent part of the mesh.  The last chunk that
+#      uses each vertex is recorded in a file, too.
+#
+#   3. The chunks are processed in Morton order.  Each is read and
+#      sorted by Morton code, and its strips are built by stripLinks()
+#      over its own adjacency.  Edges that no triangle on the other
+#      side has been seen for yet are kept in 'openEdges', and the end
+#      triangles of strips on those edges are kept open, so that a
+#      later chunk can join its strips onto them.  A triangle across
+#      an edge uses both of its vertices, so once the last chunk that
+#      uses either of them has been processed, the edge is dropped
+#      whether or not it was matched.  Only the edges and strip ends
+#      on the border of the chunks processed so far are held in
+#      memory, even on meshes with a long outer boundary.
+#
+#   4. The strip links, by position in the sorted order, go to files,
+#      from which the strips file is written one chunk at a time.
+#
+# All files are read and written a block at a time, or through memory
+# maps that are closed again after each use, so neither the process's
+# own memory nor its mapped file pages grow with the input.
+#
+# Strips are only joined where their ends meet across a chunk border,
+# so there are more strips than an in-memory build makes, and more
+# the smaller the chunks are.
+#
+# Returns (numTris, numStrips), or None if the file has errors.
+
+OOC_BYTES_PER_TRI = 600 # about how much building a chunk's strips takes per triangle
+OOC_MORTON_BITS   = 24
+OOC_MAX_OPEN      = 256 # chunk files open at once
+
+def buildTristripsOutOfCore( path, memoryLimit=256<<20, workDir=None, chunkSize=1<<22 ):
+
+    import tempfile # imported here, as it adds to every import of this module (see benchimport.py)
+
+    chunkTris = max( 1024, memoryLimit // OOC_BYTES_PER_TRI )
+
+    with tempfile.TemporaryDirectory( dir=workDir ) as tmp:
+
+        def tmpPath( name ):
+            return os.path.join( tmp, name )
+
+        # 1. Parse, saving the vertices, triangles and Morton codes
+
+        errors = []
+        header = None
+        verts  = None
+        numTris = 0
+
+        def makeVerts( numVerts ):
+            return MappedArray( tmpPath( 'verts' ), (numVerts,2), np.float64 )
+
+        with open( path, 'rb' ) as f, open( tmpPath( 'faces' ), 'wb' ) as facesFile, open( tmpPath( 'keys' ), 'wb' ) as keysFile, \
+             profiler.phase( 'read' ):
+
+            for kind, values in triangleBlocks( f, chunkSize, errors, makeVerts ):
+
+                if kind == 'header':
+                    header = values
+                    verts  = header['verts']
+                    box    = verts.bounds( chunkTris )
+
+                else:
+                    centroids = verts[values].mean( axis=1 )
+                    values.astype( np.int32 ).tofile( facesFile )
+                    mortonCodes( centroids, OOC_MORTON_BITS, box ).tofile( keysFile )
+                    numTris += len(values)
+
+        if header is None:
+            print( 'Error: file ends before the number of triangles.' )
+            return None
+
+        errors.sort( key=lambda e: e[0] )
+        for l,message in errors:
+            print( message )
+
+        print( 'Read %d points and %d triangles' % (len(verts),header['numTris']) )
+
+        if errors:
+            return None
+
+        # 2. Cut the Morton order into chunks, and sort the triangles
+        # into a file per chunk
+
+        with profiler.phase( 'partition' ):
+
+            shift  = np.uint64( 2*OOC_MORTON_BITS - 16 )
+            counts = np.zeros( 1<<16, dtype=np.int64 )
+
+            for start, keys in fileBlocks( tmpPath( 'keys' ), np.uint64, numTris, chunkTris ):
+                counts += np.bincount( (keys >> shift).astype( np.int64 ), minlength=1<<16 )
+
+            binChunk = np.zeros( 1<<16, dtype=np.int64 ) # chunk of each top-16-bit code range
+            chunk, size = 0, 0
+            for b in np.flatnonzero( counts ).tolist():
+                if size > 0 and size + counts[b] > chunkTris:
+                    chunk, size = chunk+1, 0
+                binChunk[b] = chunk
+                size += counts[b]
+
+            numChunks   = chunk + 1 if numTris > 0 else 0
+            chunkCounts = np.bincount( binChunk, weights=counts, minlength=numChunks ).astype( np.int64 )[:numChunks]
+            chunkStart  = np.concatenate( ([0], np.cumsum( chunkCounts )) )
+
+            record = np.dtype( [ ('index', np.int64), ('key', np.uint64), ('face', np.int32, 3) ] )
+
+            lastChunk = MappedArray( tmpPath( 'lastChunk' ), (len(verts),), np.int32, create=True ) # last chunk using each vertex
+
+            for first in range( 0, numChunks, OOC_MAX_OPEN ):
+
+                files = [ open( tmpPath( 'chunk%d' % c ), 'wb' ) for c in range( first, min( first+OOC_MAX_OPEN, numChunks ) ) ]
+
+                keyBlocks  = fileBlocks( tmpPath( 'keys' ), np.uint64, numTris, chunkTris )
+                faceBlocks = fileBlocks( tmpPath( 'faces' ), np.int32, numTris, chunkTris, 3 )
+
+                for (start, keys), (faceStart, faces) in zip( keyBlocks, faceBlocks ):
+
+                    chunks = binChunk[(keys >> shift).astype( np.int64 )] - first
+                    inPass = (chunks >= 0) & (chunks < len(files))
+
+                    if first == 0:
+                        lastChunk.setMax( faces.ravel(), np.repeat( chunks, 3 ) )
+
+                    rows = np.zeros( inPass.sum(), dtype=record )
+                    rows['index'] = np.flatnonzero( inPass ) + start
+                    rows['key']   = keys[inPass]
+                    rows['face']  = faces[inPass]
+
+                    chunks = chunks[inPass]
+                    byChunk = np.argsort( chunks, kind='stable' )
+                    bounds  = np.searchsorted( chunks[byChunk], np.arange( len(files)+1 ) )
+                    for c,out in enumerate( files ):
+                        rows[byChunk[bounds[c]:bounds[c+1]]].tofile( out )
+
+                for out in files:
+                    out.close()
+
+        # 3. Build the strips of each chunk, joining them onto the open
+        # strip ends left by earlier chunks
+
+        nextFile  = MappedArray( tmpPath( 'next' ), (numTris,), np.int64, create=True )
+        prevFile  = MappedArray( tmpPath( 'prev' ), (numTris,), np.int64, create=True )
+        indexFile = MappedArray( tmpPath( 'index' ), (numTris,), np.int64, create=True )
+
+        border = StripBorder( len(verts), nextFile, prevFile )
+
+        with profiler.phase( 'strips' ):
+            for c in range(numChunks):
+
+                rows = np.fromfile( tmpPath( 'chunk%d' % c ), dtype=record )
+                os.remove( tmpPath( 'chunk%d' % c ) )
+                rows = rows[np.argsort( rows['key'], kind='stable' )]
+
+                border.addChunk( c, int( chunkStart[c] ), rows['face'], lastChunk[rows['face']] )
+                indexFile[chunkStart[c]:chunkStart[c+1]] = rows['index']
+
+        # 4. Write the strips, in the original triangle numbering
+
+        with profiler.phase( 'write' ):
+
+            numStrips = 0
+            for start, prev in fileBlocks( tmpPath( 'prev' ), np.int64, numTris, chunkTris ):
+                numStrips += int( (prev < 0).sum() )
+
+            window = ChunkWindow( [ tmpPath( 'next' ), tmpPath( 'index' ) ], chunkStart )
+
+            with open( path + '.strips', 'w' ) as f:
+
+                f.write( '%d\n' % numStrips )
+
+                for start, prev in fileBlocks( tmpPath( 'prev' ), np.int64, numTris, chunkTris ):
+                    for t in (np.flatnonzero( prev < 0 ) + start).tolist():
+                        strip = []
+                        while t >= 0:
+                            nxt, index = window.get( t )
+                            strip.append( index )
+                            t = nxt
+                        f.write( ' '.join( map( str, strip ) ) )
+                        f.write( '\n' )
+
+    return numTris, numStrips
+
+
+# An array in a file, read and written through a memory map that is
+# opened for each access and closed again straight after
+
+class MappedArray(object):
+
+    def __init__( self, path, shape, dtype, create=True ):
+
+        self.path  = path
+        self.shape = shape
+        self.dtype = np.dtype( dtype )
+
+        if create:
+            with open( path, 'wb' ) as f:
+                f.truncate( int( np.prod( shape ) ) * self.dtype.itemsize )
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __getitem__( self, key ):
+        m = np.memmap( self.path, dtype=self.dtype, mode='r', shape=self.shape )
+        value = np.array( m[key] )
+        del m
+        return value
+
+    def __setitem__( self, key, value ):
+        m = np.memmap( self.path, dtype=self.dtype, mode='r+', shape=self.shape )
+        m[key] = value
+        m.flush()
+        del m
+
+    # Raise entries to 'values' where they're lower.  'rows' may repeat.
+
+    def setMax( self, rows, values ):
+
+        order  = np.lexsort( (-values, rows) ) # each row's highest value first
+        first  = np.ones( len(order), dtype=bool )
+        first[1:] = rows[order][1:] != rows[order][:-1]
+        rows, values = rows[order][first], values[order][first]
+
+        m = np.memmap( self.path, dtype=self.dtype, mode='r+', shape=self.shape )
+        m[rows] = np.maximum( m[rows], values )
+        m.flush()
+        del m
+
+    # Lowest and highest coordinates of an (n,2) array, 'rows' rows at a time
+
+    def bounds( self, rows ):
+
+        lo = np.full( 2, np.inf )
+        hi = np.full( 2, -np.inf )
+
+        for start in range( 0, self.shape[0], rows ):
+            block = self[start:start+rows]
+            lo = np.minimum( lo, block.min( axis=0 ) )
+            hi = np.maximum( hi, block.max( axis=0 ) )
+
+        return lo, hi
+
+
+# Read an array of 'count' rows of 'cols' values from a file, 'rows'
+# rows at a time.  Yields (first row, block).
+
+def fileBlocks( path, dtype, count, rows, cols=1 ):
+
+    with open( path, 'rb' ) as f:
+        for start in range( 0, count, rows ):
+            block = np.fromfile( f, dtype=dtype, count=min( rows, count-start ) * cols )
+            yield start, (block.reshape( -1, cols ) if cols > 1 else block)
+
+
+# Looks up entries of several arrays in files, by position, keeping
+# the few most recently used chunks of each in memory
+
+class ChunkWindow(object):
+
+    def __init__( self, paths, chunkStart, keep=4 ):
+
+        self.paths      = paths
+        self.chunkStart = chunkStart
+        self.keep       = keep
+        self.chunks     = {} # chunk -> list of arrays, least recently used first
+
+    def get( self, t ):
+
+        c = int( np.searchsorted( self.chunkStart, t, side='right' ) ) - 1
+
+        if c in self.chunks:
+            arrays = self.chunks.pop( c )
+        else:
+            if len(self.chunks) >= self.keep:
+                del self.chunks[next( iter( self.chunks ) )]
+            start, end = int( self.chunkStart[c] ), int( self.chunkStart[c+1] )
+            arrays = [ np.fromfile( p, dtype=np.int64, count=end-start, offset=start*8 ).tolist() for p in self.paths ]
+
+        self.chunks[c] = arrays
+
+        i = t - int( self.chunkStart[c] )
+
+        return [ a[i] for a in arrays ]
+
+
+# The border between the chunks that have been added and those that
+# haven't, and the strip-link files that are written as chunks are
+# added.  Triangles are numbered by their position in Morton order.
+#
+#   openEdges  directed edge key v0*numVerts+v1 -> the triangle with that
+#              edge, for edges with no triangle across them yet
+#   openCount  triangle -> how many of its edges are in openEdges
+#   expiring   chunk -> keys of the open edges that no chunk after it
+#              can match, to be dropped once it has been added
+#   free       strip end on the border -> [next is free, prev is free]
+#   otherEnd   strip end on the border -> triangle at the other end of
+#              its strip, so that a strip is never joined onto itself
+
+class StripBorder(object):
+
+    def __init__( self, numVerts, nextFile, prevFile ):
+
+        self.numVerts  = numVerts
+        self.nextFile  = nextFile
+        self.prevFile  = prevFile
+        self.openEdges = {}
+        self.openCount = {}
+        self.expiring  = {}
+        self.free      = {}
+        self.otherEnd  = {}
+
+
+    # Add chunk number 'chunk', of the triangles that are at positions
+    # offset, offset+1, ... in Morton order.  'lastChunk' is the last
+    # chunk that uses each vertex of 'faces'.  Builds the chunk's
+    # strips and joins them onto the border's open strip ends where
+    # they meet.
+
+    def addChunk( self, chunk, offset, faces, lastChunk ):
+
+        m = len(faces)
+        n = self.numVerts
+
+        adj, nonManifold = buildAdjacency( faces, n )
+
+        # Match the chunk's unmatched edges against the open edges
+
+        t, i = np.nonzero( adj < 0 )
+        v0   = faces[t,i].astype( np.int64 )
+        v1   = faces[t,(i+1) % 3].astype( np.int64 )
+        last = np.minimum( lastChunk[t,i], lastChunk[t,(i+1) % 3] ) # last chunk that can match the edge
+
+        across  = {} # chunk triangle -> earlier triangles across its edges
+        newOpen = [] # (edge key, chunk triangle, last chunk) of edges still unmatched
+
+        for t,key,reverseKey,l in zip( t.tolist(), (v0*n + v1).tolist(), (v1*n + v0).tolist(), last.tolist() ):
+            g = self.openEdges.pop( reverseKey, None )
+            if g is not None:
+                across.setdefault( t, [] ).append( g )
+                self.openCount[g] -= 1
+            elif l > chunk:
+                newOpen.append( (key, t, l) )
+
+        onBorder = set( t for key,t,l in newOpen )
+
+        # Build the chunk's strips.  Links within the chunk are in
+        # chunk numbering, and links to earlier triangles go in
+        # nextOut and prevOut.
+
+        nextTri, prevTri = stripLinks( adj )
+        nextOut = {}
+        prevOut = {}
+
+        for head in [ t for t in range(m) if prevTri[t] < 0 ]:
+
+            tail = head
+            while nextTri[tail] >= 0:
+                tail = nextTri[tail]
+
+            far    = { head: tail + offset, tail: head + offset } # this strip's ends -> other end of the joined strip
+            joined = False
+
+            for e in dict.fromkeys( (tail, head) ):
+                for g in across.get( e, [] ):
+
+                    if g not in self.free or far[e] == g:
+                        continue
+
+                    # Reverse this strip if that's the only way to join
+                    # them, which is only allowed before it's joined
+
+                    if not self.canJoin( e, g, nextTri, prevTri, nextOut, prevOut ):
+                        if joined:
+                            continue
+                        reverseStrip( e, nextTri, prevTri )
+
+                    if nextTri[e] < 0 and e not in nextOut and self.free[g][1]:
+                        nextOut[e] = g
+                        self.prevFile[g] = e + offset
+                        self.free[g][1] = False
+                    else:
+                        prevOut[e] = g
+                        self.nextFile[g] = e + offset
+                        self.free[g][0] = False
+
+                    joined = True
+
+                    # The joined strip's ends are the other ends of
+                    # this strip and of g's
+
+                    a, b = far[e], self.otherEnd[g]
+                    for x,y in ((a, b), (b, a)):
+                        if x - offset in far:
+                            far[x - offset] = y
+                        if x in self.otherEnd:
+                            self.otherEnd[x] = y
+
+                    if not any( self.free[g] ):
+                        del self.free[g], self.otherEnd[g]
+                    break
+
+            # Keep this strip's ends open if they're on the border
+
+            for e in dict.fromkeys( (head, tail) ):
+                nextFree = nextTri[e] < 0 and e not in nextOut
+                prevFree = prevTri[e] < 0 and e not in prevOut
+                if e in onBorder and (nextFree or prevFree):
+                    self.free[e + offset]     = [ nextFree, prevFree ]
+                    self.otherEnd[e + offset] = far[e]
+
+        # Open the chunk's unmatched edges, drop the edges that no
+        # later chunk can match, and close the earlier triangles that
+        # have no open edges left
+
+        for key,t,l in newOpen:
+            self.openEdges[key] = t + offset
+            self.openCount[t + offset] = self.openCount.get( t + offset, 0 ) + 1
+            self.expiring.setdefault( l, [] ).append( key )
+
+        closing = set( g for gs in across.values() for g in gs )
+
+        for key in self.expiring.pop( chunk, [] ):
+            g = self.openEdges.pop( key, None )
+            if g is not None:
+                self.openCount[g] -= 1
+                closing.add( g )
+
+        for g in closing:
+            if self.openCount[g] == 0:
+                del self.openCount[g]
+                self.free.pop( g, None )
+                self.otherEnd.pop( g, None )
+
+        nextTri = np.array( nextTri, dtype=np.int64 )
+        prevTri = np.array( prevTri, dtype=np.int64 )
+        nextTri = np.where( nextTri >= 0, nextTri + offset, -1 )
+        prevTri = np.where( prevTri >= 0, prevTri + offset, -1 )
+
+        for t,g in nextOut.items():
+            nextTri[t] = g
+        for t,g in prevOut.items():
+            prevTri[t] = g
+
+        self.nextFile[offset:offset+m] = nextTri
+        self.prevFile[offset:offset+m] = prevTri
+
+
+    # Whether end triangle e of a chunk strip can be linked to the open
+    # strip end g, as it is
+
+    def canJoin( self, e, g, nextTri, prevTri, nextOut, prevOut ):
+
+        nextFree, prevFree = self.free[g]
+
+        return ((nextTri[e] < 0 and e not in nextOut and prevFree) or
+                (prevTri[e] < 0 and e not in prevOut and nextFree))
+
+
+# For each triangle, find and record its adjacent triangles
+#
+# Returns the (n,3) 'adj' array of a TriangleMesh: adj[t,i] is the
+# triangle that has the reversed edge faces[t,(i+1)%3] -> faces[t,i],
+# or -1 if there is none.  Also returns a (k,2) array of the
+# non-manifold edges (those shared by more than two triangles).
+#
+# Each directed edge v0->v1 is packed into the int64 key
+# v0*numVerts+v1.  The keys are sorted once and every edge looks up
+# its reversed key with a binary search, so the whole pass is a few
+# NumPy sorts and searches instead of a Python loop.  If several
+# triangles have the same directed edge, the one with the highest
+# index is used.
+
+def buildAdjacency( faces, numVerts=None ):
+
+    faces = np.asarray( faces, dtype=np.int64 ).reshape( -1, 3 )
+
+    if numVerts is None:
+        numVerts = int( faces.max() ) + 1 if len(faces) > 0 else 0
+
+    v0 = faces.ravel()                    # edge i of triangle t is at 3*t+i
+    v1 = faces[:,[1,2,0]].ravel()
+
+    keys    = v0 * numVerts + v1
+    revKeys = v1 * numVerts + v0
+
+    order      = np.argsort( keys, kind='stable' )
+    sortedKeys = keys[order]
+
+    # Last edge with the reversed key (highest triangle index on ties)
+
+    pos   = np.searchsorted( sortedKeys, revKeys, side='right' ) - 1
+    found = (pos >= 0) & (sortedKeys[np.maximum( pos, 0 )] == revKeys)
+
+    adj = np.full( len(keys), -1, dtype=np.int32 )
+    adj[found] = order[pos[found]] // 3
+
+    # Non-manifold edges, ignoring direction
+
+    undirected = np.minimum( v0, v1 ) * numVerts + np.maximum( v0, v1 )
+    uniqueKeys, counts = np.unique( undirected, return_counts=True )
+    badKeys = uniqueKeys[counts > 2]
+
+    nonManifold = np.stack( [ badKeys // max( numVerts, 1 ), badKeys % max( numVerts, 1 ) ], axis=1 )
+
+    return adj.reshape( -1, 3 ), nonManifold
+
+
+
+# Read triangles from a file
+#
+# Format:   numVerts
+#           x y          (one line per vertex)
+#           numTris
+#           v0 v1 v2     (one line per triangle, to the end of the file)
+#
+# The file is read 'chunkSize' bytes at a time and each run of
+# complete lines is parsed straight into preallocated NumPy arrays, so
+# memory use is bounded by the chunk size rather than by the file
+# size.  Coordinate counts, vertex index ranges and degenerate
+# triangles are checked on whole chunks at once.
+#
+# If 'weldTolerance' is given, vertices within that distance of each
+# other are merged (see weldVertices) before adjacency is built, and
+# triangles that lose a vertex to the merge are dropped.
+#
+# Returns a TriangleMesh, or None if the file has errors.
+
+def readTriangles( f, chunkSize=1<<22, weldTolerance=None ):
+
+    errors = [] # (line number, message), printed in line order at the end
+    header = None
+    faces  = None
+
+    for kind, values in triangleBlocks( f, chunkSize, errors ):
+
+        if kind == 'header':
+            header   = values
+            verts    = header['verts']
+            faces    = np.zeros( (header['numTris'],3), dtype=np.int32 )
+            numFaces = 0 # non-degenerate triangles kept so far
+
+        else:
+            if numFaces+len(values) > len(faces): # more triangle lines than 'numTris' said
+                faces = np.resize( faces, (max( 2*len(faces), numFaces+len(values) ), 3) )
+
+            faces[numFaces:numFaces+len(values)] = values
+            numFaces += len(values)
+
+    if header is None:
+        print( 'Error: file ends before the number of triangles.' )
+        return None
+
+    errors.sort( key=lambda e: e[0] )
+    for l,message in errors:
+        print( message )
+
+    print( 'Read %d points and %d triangles' % (len(verts),header['numTris']) )
+
+    if errors:
+        return None
+
+    return makeMesh( verts, faces[:numFaces], weldTolerance )
+
+
+# Weld vertices that are within 'tolerance' of each other, so that
+# triangle soups (where each triangle has its own copies of its
+# vertices, as in STL files) share vertices and get adjacency.
+#
+# Vertices are put in a grid of cells a hair over 'tolerance' wide,
+# so that rounding in the cell numbers can't put two vertices exactly
+# 'tolerance' apart two cells apart (or wider, if the mesh is over
+# 2^30 tolerances across, so that cell numbers fit in 64 bits).  Each vertex's cell is numbered row by row and the cell
+# numbers are sorted, so the vertices of a cell are one run of the
+# sorted order.  Vertices can only be within 'tolerance' of vertices
+# in the same cell or the eight around it, so candidate pairs are:
+#
+#   - each vertex and the first vertex of its cell, and every pair in
+#     the few cells where that doesn't merge the whole cell
+#
+#   - every pair between a cell and the four cells after it (right,
+#     and the three above), which are found by binary searches over
+#     the occupied cells only
+#
+# and the candidates that are within 'tolerance' are merged by
+# unionFind().  A 'tolerance' of 0 merges only identical vertices.
+#
+# Merging is transitive, so a chain of close vertices becomes one
+# vertex even if its ends are further apart than 'tolerance'.  Each
+# group of merged vertices keeps the coordinates of its first vertex.
+#
+# Returns the welded vertices and, for each original vertex, the index
+# of the welded vertex it became.
+
+WELD_OFFSETS = [ (1,-1), (1,0), (1,1), (0,1) ]
+
+def weldVertices( verts, tolerance ):
+
+    n = len(verts)
+
+    if n == 0:
+        return verts, np.zeros( 0, dtype=np.int64 )
+
+    if tolerance <= 0:
+        unique, first, inverse = np.unique( verts, axis=0, return_index=True, return_inverse=True )
+        labels = first[inverse.ravel()]
+
+    else:
+        lo    = verts.min( axis=0 )
+        size  = max( tolerance * (1 + 1e-9), (verts.max( axis=0 ) - lo).max() / 2**30 )
+        cells = np.floor( (verts - lo) / size ).astype( np.int64 ) + 1 # so that every neighbour is >= 0
+        width = int( cells[:,1].max() ) + 2
+
+        keys  = cells[:,0] * width + cells[:,1]
+        order = np.argsort( keys, kind='stable' )
+
+        keys        = keys[order]
+        sortedVerts = verts[order]
+
+        # Runs of the sorted order that are one cell each
+
+        newRun = np.concatenate( ([True], keys[1:] != keys[:-1]) )
+        starts = np.flatnonzero( newRun )
+        ends   = np.append( starts[1:], n )
+        runOf  = np.cumsum( newRun ) - 1
+
+        def close( p, q ): # which sorted positions p[k],q[k] are within 'tolerance'
+            return ((sortedVerts[p] - sortedVerts[q])**2).sum( axis=1 ) <= tolerance * tolerance
+
+        # Pairs within each cell
+
+        p = np.arange( n )
+        q = starts[runOf]
+        nearFirst = close( p, q )
+        a, b = [ p[nearFirst] ], [ q[nearFirst] ]
+
+        loose = np.zeros( len(starts), dtype=bool )
+        loose[runOf[~nearFirst]] = True
+
+        p = np.flatnonzero( loose[runOf] )
+        k, q = expandRanges( p+1, ends[runOf[p]] )
+        a.append( p[k] )
+        b.append( q )
+
+        # Pairs between neighbouring cells
+
+        runKeys  = keys[starts]
+        runCells = cells[order[starts]]
+
+        for dx,dy in WELD_OFFSETS:
+            neighbour = (runCells[:,0] + dx) * width + runCells[:,1] + dy
+            w   = np.minimum( np.searchsorted( runKeys, neighbour ), len(runKeys)-1 )
+            hit = np.flatnonzero( runKeys[w] == neighbour )
+
+            k, p = expandRanges( starts[hit], ends[hit] )
+            w    = w[hit][k]
+            k, q = expandRanges( starts[w], ends[w] )
+            a.append( p[k] )
+            b.append( q )
+
+        a = np.concatenate( a )
+        b = np.concatenate( b )
+        near = close( a, b )
+
+        labels = unionFind( n, order[a[near]], order[b[near]] )
+
+    keep  = np.flatnonzero( labels == np.arange( n ) )
+    index = np.zeros( n, dtype=np.int64 )
+    index[keep] = np.arange( len(keep) )
+
+    return verts[keep], index[labels]
+
+
+# For the ranges lo[k] .. hi[k]-1, returns the range number k and the
+# value of each of their elements, in order
+
+def expandRanges( lo, hi ):
+
+    count = np.maximum( hi - lo, 0 )
+    which = np.repeat( np.arange( len(lo) ), count )
+
+    return which, np.repeat( lo - np.cumsum( count ) + count, count ) + np.arange( count.sum() )
+
+
+# Parse a triangle file, a block at a time.  Yields
+#
+#   ('header', { 'verts': array of all vertices, 'numTris': n })
+#
+# once the vertices and the number of triangles have been read, and
+# then ('faces', array) for each block of valid, non-degenerate
+# triangles.  Errors are added to the 'errors' list as (line number,
+# message).
+#
+# The vertex array comes from makeVerts( numVerts ) and is filled one
+# block at a time, so the caller can supply a memory-mapped array.
+
+def triangleBlocks( f, chunkSize, errors, makeVerts=None ):
+
+    numVerts = None
+    numTris  = None
+    vertLine = 0 # vertex and triangle lines read so far
+    triLine  = 0
+
+    for block in readLineBlocks( f, chunkSize ):
+
+        while block:
+
+            if numVerts is None: # Read the number of vertices
+
+                line, block = splitLines( block, 1 )
+                numVerts = int( line )
+                verts = np.zeros( (numVerts,2), dtype=np.float64 ) if makeVerts is None else makeVerts( numVerts )
+
+            elif vertLine < numVerts: # Read the vertices
+
+                with profiler.phase( 'parse' ):
+                    lines, block = splitLines( block, numVerts-vertLine )
+                    values, counts = parseLines( lines, 2, np.float64 )
+
+                # Check that the vertices are valid
+
+                with profiler.phase( 'validate' ):
+                    for l in np.flatnonzero( counts != 2 ).tolist():
+                        errors.append( (vertLine+l+2, 'Line %d: vertex does not have two coordinates.' % (vertLine+l+2)) )
+
+                verts[vertLine:vertLine+len(values)] = values
+                vertLine += len(values)
+
+            elif numTris is None: # Read the number of triangles
+
+                line, block = splitLines( block, 1 )
+                numTris = int( line )
+
+                yield 'header', { 'verts': verts, 'numTris': numTris }
+
+            else: # Read the triangles
+
+                with profiler.phase( 'parse' ):
+                    lines, block = splitLines( block, None )
+                    values, counts = parseLines( lines, 3, np.int64 )
+
+                with profiler.phase( 'validate' ):
+
+                    # Check that the triangle vertices are valid
+
+                    valid      = counts == 3
+                    outOfRange = valid[:,None] & ((values < 0) | (values >= numVerts))
+
+                    for l in np.flatnonzero( ~valid ).tolist():
+                        errors.append( (l+2+numVerts+triLine, 'Line %d: triangle does not have three vertices.' % (l+2+numVerts+triLine)) )
+
+                    for l in np.nonzero( outOfRange )[0].tolist(): # once per bad index, as a line may have several
+                        errors.append( (l+2+numVerts+triLine, 'Line %d: Vertex index is not in range [0,%d].' % (l+2+numVerts+triLine,numVerts-1)) )
+
+                    # Keep the valid triangles that aren't degenerate
+
+                    values = values[valid & ~outOfRange.any( axis=1 )]
+                    values = nonDegenerate( verts, values )
+
+                triLine += len(counts)
+
+                yield 'faces', values
+
+
+# Read a file in chunks of about 'chunkSize' bytes, each of which is
+# cut at a line boundary.  Every yielded block ends with a newline.
+
+def readLineBlocks( f, chunkSize ):
+
+    carry = b''
+
+    while True:
+
+        chunk = f.read( chunkSize )
+
+        if not chunk:
+            if carry:
+                yield carry + b'\n'
+            return
+
+        data = carry + chunk
+        cut  = data.rfind( b'\n' ) + 1
+
+        if cut > 0:
+            yield data[:cut]
+
+        carry = data[cut:]
+
+
+# Split a block of lines after its first k lines (or after all of
+# them if k is None).  Returns the two parts.
+
+def splitLines( block, k ):
+
+    if k is None or block.count( b'\n' ) <= k:
+        return block, b''
+
+    if k == 1:
+        cut = block.index( b'\n' ) + 1
+    else:
+        cut = np.flatnonzero( np.frombuffer( block, dtype=np.uint8 ) == ord('\n') )[k-1] + 1
+
+    return block[:cut], block[cut:]
+
+
+# Parse a block of lines that should each hold 'numCols' numbers.
+#
+# Returns a (numLines,numCols) array of the numbers and the number of
+# values found on each line.  Rows of lines that don't have exactly
+# 'numCols' values are left as zeros.
+
+WHITESPACE = np.zeros( 256, dtype=bool )
+WHITESPACE[[ord(c) for c in ' \t\n\r\v\f']] = True
+
+def parseLines( block, numCols, dtype ):
+
+    counts = lineValueCounts( np.frombuffer( block, dtype=np.uint8 ) )
+    values = np.zeros( (len(counts),numCols), dtype=dtype )
+
+    if (counts == numCols).all():
+        flat = np.fromstring( block, dtype=dtype, sep=' ' )
+        if len(flat) == counts.sum():
+            values[:] = flat.reshape( -1, numCols )
+            return values, counts
+
+    # Some lines are bad: parse them one at a time (this also raises
+    # the usual ValueError for anything that isn't a number)
+
+    convert = int if np.issubdtype( dtype, np.integer ) else float
+
+    for l,line in enumerate( block.split( b'\n' )[:-1] ):
+        if counts[l] == numCols:
+            values[l] = [ convert(v) for v in line.split() ]
+
+    return values, counts
+
+
+# Number of whitespace-separated values on each line of a block of
+# bytes that ends with a newline
+
+def lineValueCounts( buf ):
+
+    space = WHITESPACE[buf]
+
+    ends   = np.flatnonzero( buf == ord('\n') ) # one per line
+    starts = np.flatnonzero( ~space & np.concatenate( ([True], space[:-1]) ) ) # first byte of each value
+
+    return np.bincount( np.searchsorted( ends, starts ), minlength=len(ends) )
+
+
+# ================================================================
+# Binary PLY and OBJ files
+# ================================================================
+#
+# readPLY() and readOBJ() read meshes exported by other tools, and
+# readMeshFile() picks the reader by file extension.  The meshes here
+# are 2D, so only the x and y coordinates of the vertices are kept.
+# Polygons are cut into triangles as fans around their first vertex,
+# and the same degenerate-triangle filter as readTriangles() is
+# applied, along with welding if 'weldTolerance' is given.
+#
+# A binary PLY file's elements are fixed-size records when its faces
+# all have the same number of vertices, so the vertex and face
+# elements are memory-mapped as NumPy record arrays and no parsing is
+# needed.  The only copy of the vertices is the one into the float64
+# array of the mesh, and triangles are only copied when degenerate
+# ones are filtered out.  Faces of mixed sizes are read one at a time.
+# ASCII PLY files aren't supported.
+#
+# An OBJ file is read in chunks of lines.  In each chunk, the vertex
+# and face lines are gathered and each is parsed with a single
+# np.fromstring() call, after the texture and normal indices
+# ('v/vt/vn') are blanked out.  Negative (relative) indices are
+# supported, and other kinds of line are ignored.
+
+PLY_TYPES = { 'char': 'i1', 'int8': 'i1', 'uchar': 'u1', 'uint8': 'u1',
+              'short': 'i2', 'int16': 'i2', 'ushort': 'u2', 'uint16': 'u2',
+              'int': 'i4', 'int32': 'i4', 'uint': 'u4', 'uint32': 'u4',
+              'float': 'f4', 'float32': 'f4', 'double': 'f8', 'float64': 'f8' }
+
+
+# Read a mesh file, by its extension: '.ply', '.obj', or otherwise the
+# format of readTriangles().  Returns a TriangleMesh, or None if the
+# file has errors.
+
+def readMeshFile( path, weldTolerance=None ):
+
+    ext = os.path.splitext( path )[1].lower()
+
+    if ext == '.ply':
+        return readPLY( path, weldTolerance )
+
+    with open( path, 'rb' ) as f:
+        if ext == '.obj':
+            return readOBJ( f, weldTolerance=weldTolerance )
+        return readTriangles( f, weldTolerance=weldTolerance )
+
+
+def readPLY( path, weldTolerance=None ):
+
+    with open( path, 'rb' ) as f:
+        header = readPLYHeader( f )
+
+    if isinstance( header, str ):
+        print( 'Error: %s' % header )
+        return None
+
+    byteOrder, elements, offset = header
+
+    verts = None
+    faces = None
+
+    with profiler.phase( 'parse' ):
+
+        for name,count,props in elements:
+
+            if all( not isinstance( t, tuple ) for p,t in props ): # fixed-size records
+
+                dtype = np.dtype( [ (p, byteOrder + PLY_TYPES[t]) for p,t in props ] )
+
+                if name == 'vertex':
+                    if 'x' not in dtype.names or 'y' not in dtype.names:
+                        print( 'Error: PLY vertices have no x and y properties.' )
+                        return None
+                    records = mapRecords( path, dtype, offset, count )
+                    if records is None:
+                        print( 'Error: PLY file ends in the middle of the vertices.' )
+                        return None
+
+                    # x and y are interleaved with the other properties,
+                    # maybe as float32, so they're copied once, straight
+                    # into the (n,2) float64 layout of a TriangleMesh
+
+                    verts = np.empty( (count,2), dtype=np.float64 )
+                    verts[:,0] = records['x']
+                    verts[:,1] = records['y']
+
+                offset += count * dtype.itemsize
+
+            elif name == 'face':
+                faces, offset = readPLYFaces( path, offset, count, props, byteOrder )
+                if faces is None:
+                    print( 'Error: PLY file ends in the middle of the faces.' )
+                    return None
+
+            else:
+                break # can't skip an element of lists of unknown length, and the rest isn't needed
+
+    if verts is None or faces is None:
+        print( 'Error: PLY file has no vertex or face element.' )
+        return None
+
+    # Check that the triangle vertices are valid, and keep those that
+    # aren't degenerate
+
+    with profiler.phase( 'validate' ):
+        outOfRange = ((faces < 0) | (faces >= len(verts))).any( axis=1 )
+        for t in np.flatnonzero( outOfRange )[:10].tolist():
+            print( 'Face %d: Vertex index is not in range [0,%d].' % (t, len(verts)-1) )
+
+        if outOfRange.any():
+            return None
+
+        faces = nonDegenerate( verts, faces )
+
+    print( 'Read %d points and %d triangles' % (len(verts),len(faces)) )
+
+    return makeMesh( verts, faces, weldTolerance )
+
+
+# Read the header of a PLY file.  Returns (byte order, elements, size
+# of the header), where each element is (name, count, properties) and
+# each property is (name, type) or, for a list, (name, (count type,
+# item type)).  Returns an error message if the header isn't one of a
+# binary PLY file.
+
+def readPLYHeader( f ):
+
+    if f.readline().strip() != b'ply':
+        return 'not a PLY file.'
+
+    byteOrder = None
+    elements  = []
+
+    while True:
+
+        line = f.readline()
+        if not line:
+            return 'PLY header has no end_header.'
+
+        words = line.decode( 'ascii', 'replace' ).split()
+
+        if not words or words[0] in ('comment', 'obj_info'):
+            continue
+
+        if words[0] == 'end_header':
+            break
+
+        if words[0] == 'format':
+            if words[1:2] == ['binary_little_endian']:
+                byteOrder = '<'
+            elif words[1:2] == ['binary_big_endian']:
+                byteOrder = '>'
+            else:
+                return 'only binary PLY files are supported, not %s.' % ' '.join( words[1:2] )
+
+        elif words[0] == 'element' and len(words) == 3:
+            elements.append( (words[1], int( words[2] ), []) )
+
+        elif words[0] == 'property' and elements:
+            if words[1] == 'list' and len(words) == 5 and words[2] in PLY_TYPES and words[3] in PLY_TYPES:
+                elements[-1][2].append( (words[4], (words[2], words[3])) )
+            elif len(words) == 3 and words[1] in PLY_TYPES:
+                elements[-1][2].append( (words[2], words[1]) )
+            else:
+                return 'bad PLY property: %s' % line.decode( 'ascii', 'replace' ).strip()
+
+        else:
+            return 'bad PLY header line: %s' % line.decode( 'ascii', 'replace' ).strip()
+
+    if byteOrder is None:
+        return 'PLY header has no format.'
+
+    return byteOrder, elements, f.tell()
+
+
+# Memory-map 'count' records of 'dtype' at 'offset' in a file.
+# Returns None if the file is too short.
+
+def mapRecords( path, dtype, offset, count ):
+
+    if offset + count * dtype.itemsize > os.path.getsize( path ):
+        return None
+
+    if count == 0:
+        return np.zeros( 0, dtype=dtype ) # can't map an empty range
+
+    return np.memmap( path, dtype=dtype, mode='r', offset=offset, shape=(count,) )
+
+
+# Read the face element of a binary PLY file, which starts at 'offset'.
+# Returns the faces cut into triangles and the offset of the end of the
+# element, or (None, None) if the file ends too soon.
+#
+# The faces are mapped as records whose lists all have as many items
+# as the first face's vertex list, and that's used if every list of
+# every face does have that many.  Triangles are then returned as a
+# view of the mapped file, in its index type, and larger polygons are
+# cut into triangles.  Otherwise the faces are read one at a time.
+
+def readPLYFaces( path, offset, count, props, byteOrder ):
+
+    lists    = [ p for p,t in props if isinstance( t, tuple ) ]
+    listName = next( (p for p in lists if p in ('vertex_indices', 'vertex_index')), None )
+
+    if listName is None or count == 0:
+        return np.zeros( (0,3), dtype=np.int64 ), offset
+
+    # All faces the same size as the first?
+
+    first = mapRecords( path, plyFaceType( props, byteOrder, 0 ), offset, 1 )
+    if first is None:
+        return None, None
+
+    k       = int( first[listName + '.count'][0] )
+    dtype   = plyFaceType( props, byteOrder, k )
+    records = mapRecords( path, dtype, offset, count )
+
+    if records is not None and all( (records[p + '.count'] == k).all() for p in lists ):
+        polys = records[listName] # mapped, in the file's index type
+        if k != 3:
+            polys, which = fanTriangles( polys.ravel(), np.arange( count ) * k, np.full( count, k ) )
+        return polys, offset + count * dtype.itemsize
+
+    # No: read them one at a time
+
+    flat   = []
+    counts = []
+
+    with open( path, 'rb' ) as f:
+
+        f.seek( offset )
+
+        for i in range(count):
+            for p,t in props:
+
+                if isinstance( t, tuple ):
+                    countType = np.dtype( byteOrder + PLY_TYPES[t[0]] )
+                    itemType  = np.dtype( byteOrder + PLY_TYPES[t[1]] )
+                    data = f.read( countType.itemsize )
+                    if len(data) < countType.itemsize:
+                        return None, None
+                    n    = int( np.frombuffer( data, dtype=countType )[0] )
+                    data = f.read( n * itemType.itemsize )
+                    if len(data) < n * itemType.itemsize:
+                        return None, None
+                    if p == listName:
+                        flat.append( np.frombuffer( data, dtype=itemType ) )
+                        counts.append( n )
+
+                else:
+                    f.read( np.dtype( PLY_TYPES[t] ).itemsize )
+
+        end = f.tell()
+
+    counts = np.array( counts, dtype=np.int64 )
+    flat   = np.concatenate( flat ).astype( np.int64 )
+
+    tris, which = fanTriangles( flat, np.cumsum( counts ) - counts, counts )
+
+    return tris, end
+
+
+# Record type of a PLY face whose lists all have k items
+
+def plyFaceType( props, byteOrder, k ):
+
+    fields = []
+
+    for p,t in props:
+        if isinstance( t, tuple ):
+            fields += [ (p + '.count', byteOrder + PLY_TYPES[t[0]]), (p, byteOrder + PLY_TYPES[t[1]], (k,)) ]
+        else:
+            fields.append( (p, byteOrder + PLY_TYPES[t]) )
+
+    return np.dtype( fields )
+
+
+def readOBJ( f, chunkSize=1<<22, weldTolerance=None ):
+
+    errors   = [] # (line number, message), printed in line order at the end
+    verts    = [] # blocks of vertices
+    faces    = [] # blocks of triangles
+    numVerts = 0
+    numLines = 0
+
+    for block in readLineBlocks( f, chunkSize ):
+
+        with profiler.phase( 'parse' ):
+
+            # Gather the vertex and face lines (with their 'v' and 'f'
+            # blanked out), and for each face line, the number of
+            # vertices before it
+
+            buf    = np.frombuffer( block, dtype=np.uint8 ).copy()
+            starts = np.flatnonzero( np.concatenate( ([True], buf[:-1] == ord('\n')) ) )
+            second = buf[np.minimum( starts+1, len(buf)-1 )]
+
+            isVert = (buf[starts] == ord('v')) & WHITESPACE[second] & (second != ord('\n'))
+            isFace = (buf[starts] == ord('f')) & WHITESPACE[second] & (second != ord('\n'))
+
+            buf[starts[isVert | isFace]] = ord(' ')
+            lengths = np.diff( np.append( starts, len(buf) ) )
+
+            vertBlock = buf[np.repeat( isVert, lengths )].tobytes()
+            faceBlock = buf[np.repeat( isFace, lengths )].tobytes()
+            vertLine  = np.flatnonzero( isVert ) + numLines + 1
+            faceLine  = np.flatnonzero( isFace ) + numLines + 1
+            faceBase  = (numVerts + np.cumsum( isVert ))[isFace]
+
+            numLines += len(starts)
+
+            # Vertices: the first two numbers of each line
+
+            if len(vertLine) > 0:
+                values, counts = parseValues( vertBlock, np.float64 )
+                bad = counts < 2
+
+                for l in vertLine[bad].tolist():
+                    errors.append( (l, 'Line %d: vertex does not have two coordinates.' % l) )
+
+                if bad.any():
+                    verts.append( np.zeros( (len(vertLine),2) ) )
+                else:
+                    start = np.cumsum( counts ) - counts
+                    verts.append( np.column_stack( (values[start], values[start+1]) ) )
+
+                numVerts += len(vertLine)
+
+            # Faces: fans of the vertex indices, which count from 1 or,
+            # if negative, back from the last vertex read
+
+            if len(faceLine) > 0:
+                values, counts = parseValues( blankSlashes( faceBlock ), np.int64 )
+                base    = np.repeat( faceBase, counts )
+                indices = np.where( values > 0, values - 1, np.where( values < 0, base + values, -1 ) )
+                indices[indices >= base] = -1 # not read yet
+
+                for l in faceLine[counts < 3].tolist():
+                    errors.append( (l, 'Line %d: face does not have three vertices.' % l) )
+
+                tris, which = fanTriangles( indices, np.cumsum( counts ) - counts, counts )
+                bad = np.unique( which[(tris < 0).any( axis=1 )] )
+
+                for l,n in zip( faceLine[bad].tolist(), faceBase[bad].tolist() ):
+                    errors.append( (l, 'Line %d: Vertex index is not in range [1,%d].' % (l, n)) )
+
+                faces.append( tris )
+
+    with profiler.phase( 'validate' ):
+
+        verts = np.concatenate( verts ) if verts else np.zeros( (0,2), dtype=np.float64 )
+        faces = np.concatenate( faces ) if faces else np.zeros( (0,3), dtype=np.int64 )
+
+        errors.sort( key=lambda e: e[0] )
+        for l,message in errors:
+            print( message )
+
+        if errors:
+            return None
+
+        faces = nonDegenerate( verts, faces )
+
+    print( 'Read %d points and %d triangles' % (len(verts),len(faces)) )
+
+    return makeMesh( verts, faces, weldTolerance )
+
+
+# Parse all the numbers in a block of lines.  Returns a flat array of
+# them and the number on each line.
+
+def parseValues( block, dtype ):
+
+    counts = lineValueCounts( np.frombuffer( block, dtype=np.uint8 ) )
+    values = np.fromstring( block, dtype=dtype, sep=' ' )
+
+    if len(values) != counts.sum(): # something that isn't a number: parse line by line for the error
+        convert = int if np.issubdtype( dtype, np.integer ) else float
+        values  = np.array( [ convert(v) for line in block.split( b'\n' ) for v in line.split() ], dtype=dtype )
+
+    return values, counts
+
+
+# Replace the texture and normal indices of OBJ face vertices
+# ('v/vt/vn', 'v//vn') with spaces: each word is blanked from its
+# first '/' to its end
+
+def blankSlashes( block ):
+
+    buf   = np.frombuffer( block, dtype=np.uint8 ).copy()
+    slash = np.flatnonzero( buf == ord('/') )
+
+    if len(slash) == 0:
+        return block
+
+    space = np.flatnonzero( WHITESPACE[buf] )
+    end   = space[np.searchsorted( space, slash )] # blocks end with a newline, so every word has an end
+    first = np.concatenate( ([True], end[1:] != end[:-1]) )
+
+    blank = np.zeros( len(buf)+1, dtype=np.int8 )
+    blank[slash[first]] = 1
+    blank[end[first]]   = -1
+
+    buf[np.cumsum( blank[:-1], dtype=np.int8 ) > 0] = ord(' ')
+
+    return buf.tobytes()
+
+
+# Cut polygons into fans of triangles around their first vertex.
+# Polygon i is flat[starts[i]:starts[i]+counts[i]].  Returns the (m,3)
+# triangles and the polygon each came from.
+
+def fanTriangles( flat, starts, counts ):
+
+    which, j = expandRanges( starts+1, starts+counts-1 )
+
+    return np.column_stack( (flat[starts[which]], flat[j], flat[j+1]) ), which
+
+
+# The triangles of 'faces' that aren't degenerate
+
+def nonDegenerate( verts, faces ):
+
+    return faces[turns( verts[faces[:,0]], verts[faces[:,1]], verts[faces[:,2]] ) != COLLINEAR]
+
+
+# Make a TriangleMesh, welding its vertices first if 'weldTolerance'
+# is given (see weldVertices).  Triangles that lose a vertex to the
+# weld are dropped.
+
+def makeMesh( verts, faces, weldTolerance=None ):
+
+    if weldTolerance is not None:
+
+        with profiler.phase( 'weld' ):
+            welded, index = weldVertices( verts, weldTolerance )
+            kept  = index[faces]
+            kept  = kept[(kept[:,0] != kept[:,1]) & (kept[:,1] != kept[:,2]) & (kept[:,2] != kept[:,0])]
+
+        print( 'Welded %d points into %d (%d merged), dropping %d collapsed triangles' %
+               (len(verts), len(welded), len(verts)-len(welded), len(faces)-len(kept)) )
+
+        verts, faces = welded, kept
+
+    return TriangleMesh( verts, faces )
+
+
+
+# Binary mesh cache
+#
+# Parsing a large text file and building its adjacency is slow, so
+# loadMesh() writes the result to a binary cache file next to the
+# source ('<file>.cache') and memory-maps it on later runs.  The cache
+# is keyed by a hash of the source file's contents, so an edited
+# source is never paired with a stale cache.
+#
+# Layout (little-endian):
+#
+#   header            magic, version, flags, source hash, numVerts,
+#                     numTris, numNonManifold
+#   verts             (numVerts,2)       float64
+#   faces             (numTris,3)        int32
+#   adj               (numTris,3)        int32
+#   nextTri           (numTris,)         int32   } only if flags & CACHE_HAS_STRIPS
+#   prevTri           (numTris,)         int32   }
+#   nonManifoldEdges  (numNonManifold,2) int64
+#
+# The non-manifold edges are kept so that loading a bad mesh from its
+# cache warns about them just as reading it from the text file does.
+#
+# Each array starts on a CACHE_ALIGN byte boundary.  Arrays are mapped
+# copy-on-write, so nothing is copied on load and changes made to the
+# mesh (e.g. by buildTristrips) never reach the file.
+
+CACHE_MAGIC      = b'TRISTRIP'
+CACHE_VERSION    = 2
+CACHE_HAS_STRIPS = 1
+CACHE_ALIGN      = 64
+
+cacheHeader = struct.Struct( '<8sII16sQQQ' )
+
+
+# Hash of a file's contents, read in chunks
+
+def fileHash( path, chunkSize=1<<22 ):
+
+    h = hashlib.blake2b( digest_size=16 )
+
+    with open( path, 'rb' ) as f:
+        for chunk in iter( lambda: f.read( chunkSize ), b'' ):
+            h.update( chunk )
+
+    return h.digest()
+
+
+# Key of the cache of a triangle file, which is the file's hash, mixed
+# with the weld tolerance if the mesh is welded, and with the options
+# the strips were built with if they aren't the defaults (see
+# stripCacheOptions()), so that strips built one way are never reused
+# when they were asked for another way
+
+def meshCacheKey( path, weldTolerance=None, stripOptions=() ):
+
+    key = fileHash( path )
+
+    if weldTolerance is not None:
+        key = hashlib.blake2b( key + struct.pack( '<d', weldTolerance ), digest_size=16 ).digest()
+
+    if stripOptions:
+        key = hashlib.blake2b( key + repr( tuple( stripOptions ) ).encode(), digest_size=16 ).digest()
+
+    return key
+
+
+# The strip-building options that go into a cache key: empty for the
+# defaults (the greedy strategy, no tunneling, serial build), which
+# the viewer uses too, or else all of them
+
+def stripCacheOptions( strategy='greedy', tunnelTime=0.0, workers=None ):
+
+    if strategy == 'greedy' and tunnelTime <= 0 and workers is None:
+        return ()
+
+    return (strategy, float( tunnelTime ), workers)
+
+
+# Array layout of a cache file, as a list of (name, dtype, shape, offset)
+
+def cacheLayout( numVerts, numTris, flags, numNonManifold=0 ):
+
+    arrays = [ ('verts', '<f8', (numVerts,2)),
+               ('faces', '<i4', (numTris,3)),
+               ('adj',   '<i4', (numTris,3)) ]
+
+    if flags & CACHE_HAS_STRIPS:
+        arrays += [ ('nextTri', '<i4', (numTris,)),
+                    ('prevTri', '<i4', (numTris,)) ]
+
+    arrays += [ ('nonManifoldEdges', '<i8', (numNonManifold,2)) ]
+
+    layout = []
+    offset = cacheHeader.size
+
+    for name,dtype,shape in arrays:
+        offset = -(-offset // CACHE_ALIGN) * CACHE_ALIGN
+        layout.append( (name, dtype, shape, offset) )
+        offset += np.dtype(dtype).itemsize * int( np.prod( shape ) )
+
+    return layout
+
+
+# Write a mesh to a cache file.  The file is written under a temporary
+# name and then renamed, so a reader never sees a partial cache.
+
+def writeMeshCache( mesh, cachePath, key ):
+
+    flags  = CACHE_HAS_STRIPS if mesh.hasStrips else 0
+    layout = cacheLayout( len(mesh.verts), len(mesh), flags, len(mesh.nonManifoldEdges) )
+    tmpPath = '%s.%d.tmp' % (cachePath, os.getpid())
+
+    with open( tmpPath, 'wb' ) as f:
+
+        f.write( cacheHeader.pack( CACHE_MAGIC, CACHE_VERSION, flags, key, len(mesh.verts), len(mesh), len(mesh.nonManifoldEdges) ) )
+
+        for name,dtype,shape,offset in layout:
+            f.write( b'\0' * (offset - f.tell()) )
+            f.write( np.ascontiguousarray( getattr( mesh, name ), dtype=dtype ).tobytes() )
+
+    os.replace( tmpPath, cachePath )
+
+
+# Memory-map a mesh from a cache file.  Returns None if there is no
+# usable cache for the given source hash.
+
+def readMeshCache( cachePath, key ):
+
+    try:
+        with open( cachePath, 'rb' ) as f:
+            header = f.read( cacheHeader.size )
+    except OSError:
+        return None
+
+    if len(header) < cacheHeader.size:
+        return None
+
+    magic, version, flags, cacheKey, numVerts, numTris, numNonManifold = cacheHeader.unpack( header )
+
+    if magic != CACHE_MAGIC or version != CACHE_VERSION or cacheKey != key:
+        return None
+
+    layout = cacheLayout( numVerts, numTris, flags, numNonManifold )
+    name, dtype, shape, offset = layout[-1]
+
+    if os.path.getsize( cachePath ) < offset + np.dtype(dtype).itemsize * int( np.prod( shape ) ):
+        return None # truncated
+
+    arrays = {}
+    for name,dtype,shape,offset in layout:
+        if np.prod( shape ) == 0:
+            arrays[name] = np.zeros( shape, dtype=dtype ) # can't map an empty range
+        else:
+            arrays[name] = np.memmap( cachePath, dtype=dtype, mode='c', offset=offset, shape=shape )
+
+    return TriangleMesh( **arrays )
+
+
+# Read a mesh from a triangle file, using its cache if there's a valid
+# one and writing the cache if not.  The cache of a welded mesh is
+# keyed by the weld tolerance as well as the file, and 'stripOptions'
+# (from stripCacheOptions()) are the options its strips are to be
+# built with.  Returns a TriangleMesh, or None if the file has errors.
+
+def loadMesh( path, useCache=True, weldTolerance=None, stripOptions=() ):
+
+    if not useCache:
+        with profiler.phase( 'read' ):
+            return readMeshFile( path, weldTolerance )
+
+    with profiler.phase( 'cache' ):
+        key       = meshCacheKey( path, weldTolerance, stripOptions )
+        cachePath = path + '.cache'
+
+        mesh = readMeshCache( cachePath, key )
+
+    if mesh is not None:
+        print( 'Read %d points and %d triangles from cache' % (len(mesh.verts),len(mesh)) )
+        return mesh
+
+    with profiler.phase( 'read' ):
+        mesh = readMeshFile( path, weldTolerance )
+
+    if mesh is not None:
+        try:
+            writeMeshCache( mesh, cachePath, key )
+        except OSError as e:
+            print( 'Warning: could not write cache %s: %s' % (cachePath, e) )
+
+    return mesh
+
+
+
+# GL_TRIANGLE_STRIP index streams
+#
+# encodeStrips() turns the strips of a mesh into the vertex index
+# sequence that glDrawElements( GL_TRIANGLE_STRIP, ... ) consumes.
+#
+# In a GL strip, triangle k is made of indices k, k+1 and k+2, and
+# every odd triangle has its first two vertices swapped so that all
+# triangles keep the same winding.  Each strip starts with its first
+# triangle rotated so that the edge it shares with the second triangle
+# comes last.  After that, each next triangle normally shares the last
+# two indices and adds its third vertex.  When the strip turns the
+# other way (the next triangle shares the edge made of the last index
+# and the one two before it), a swap is inserted: the last index is
+# repeated and the one two back is emitted again.  That costs two
+# degenerate triangles but keeps the winding of the rest of the strip
+# correct.
+#
+# Strips are then joined in one of two ways:
+#
+#   stitched   the last index of a strip and the first of the next are
+#              repeated, which makes degenerate triangles that draw
+#              nothing (plus one more repeat when needed so that the
+#              next strip starts on an even triangle)
+#
+#   restart    a primitive-restart index (the largest value of the
+#              index type) separates the strips, for use with
+#              GL_PRIMITIVE_RESTART
+#
+# Indices are uint16 when every vertex index (and the restart index)
+# fits, and uint32 otherwise.
+
+def encodeStrips( mesh, restart=False ):
+
+    faces = mesh.faces.tolist()
+
+    if len(mesh.verts) < 0xFFFF:
+        dtype = np.uint16
+    else:
+        dtype = np.uint32
+
+    restartIndex = int( np.iinfo( dtype ).max )
+
+    indices = []
+
+    for strip in mesh.strips():
+        for run in stripRuns( faces, strip ):
+
+            if indices:
+                if restart:
+                    indices.append( restartIndex )
+                else:
+                    if len(indices) % 2 == 1:
+                        indices.append( indices[-1] )
+                    indices.append( indices[-1] )
+                    indices.append( run[0] )
+
+            indices.extend( run )
+
+    return np.array( indices, dtype=dtype ), (restartIndex if restart else None)
+
+
+# Vertex index sequences for the triangles of one strip, in order.
+#
+# Usually this is a single run.  A strip is only cut into several runs
+# if two consecutive triangles don't share an edge that a swap can
+# reach, which doesn't happen for strips from buildTristrips() on a
+# manifold mesh.
+
+def stripRuns( faces, strip ):
+
+    runs = []
+    run  = None
+
+    for i,t in enumerate(strip):
+
+        f = faces[t]
+
+        if run is not None:
+
+            x, p, q = run[-3:]
+
+            if p in f and q in f: # shares the last two indices
+                run.append( thirdVertex( f, p, q ) )
+                continue
+
+            if x in f and q in f: # strip turns the other way: swap
+                run += [ q, x, thirdVertex( f, x, q ) ]
+                continue
+
+            runs.append( run )
+
+        # Start a new run, with the edge shared with the next triangle last
+
+        k = 0
+        if i+1 < len(strip):
+            shared = [ v for v in f if v in faces[strip[i+1]] ]
+            if len(shared) == 2:
+                k = next( k for k in range(3) if f[k] not in shared )
+
+        run = [ f[k], f[(k+1) % 3], f[(k+2) % 3] ]
+
+    if run is not None:
+        runs.append( run )
+
+    return runs
+
+
+def thirdVertex( f, v0, v1 ):
+
+    return next( v for v in f if v != v0 and v != v1 )
+
+
+# Print how many indices an index stream uses per triangle, compared
+# with drawing the same triangles as GL_TRIANGLES
+
+def printIndexStats( mesh, indices, restartIndex ):
+
+    n = len(mesh)
+
+    if n == 0:
+        return
+
+    itemsize = indices.dtype.itemsize
+    restarts = int( (indices == restartIndex).sum() ) if restartIndex is not None else 0
+
+    print( '  indices: %d %s (%d restarts), %.3f per triangle vs 3.000 for GL_TRIANGLES' %
+           (len(indices), indices.dtype.name, restarts, len(indices) / float(n)) )
+    print( '  index bytes: %d vs %d (%.1f%% saved)' %
+           (len(indices) * itemsize, 3 * n * itemsize, 100.0 * (1.0 - len(indices) / (3.0 * n))) )
+
+
+
+# ================================================================
+# Vertex cache ordering
+# ================================================================
+#
+# GPUs keep the last few transformed vertices in a post-transform
+# cache, so a triangle order that reuses recent vertices transforms
+# fewer of them.  vertexCacheOrder() orders the triangles for a cache
+# of 'cacheSize' vertices by Forsyth's method ("Linear-Speed Vertex
+# Cache Optimisation", 2006):
+#
+#   Each vertex has a score, higher for vertices near the front of a
+#   simulated LRU cache and for vertices with few triangles left to
+#   draw (so that isolated triangles aren't left until last).  Each
+#   triangle's score is the sum of its vertices' scores.  Repeatedly
+#   draw the highest-scoring triangle among those using a vertex in
+#   the cache, and update the cache and the scores of its vertices'
+#   triangles.
+#
+# When no triangle in the cache is left, the next triangle in index
+# order that hasn't been drawn is taken, so the whole ordering takes
+# time in proportion to the number of triangles times 'cacheSize'.
+#
+# cacheMissRatio() simulates a FIFO or LRU cache over a triangle order
+# and returns the ACMR (average cache miss ratio): the number of
+# vertices transformed per triangle, between 0.5 for an ideal mesh and
+# 3.0 for no reuse at all.
+
+CACHE_DECAY_POWER   = 1.5
+LAST_TRI_SCORE      = 0.75
+VALENCE_BOOST_SCALE = 2.0
+VALENCE_BOOST_POWER = 0.5
+
+def vertexCacheOrder( mesh, cacheSize=32 ):
+
+    n = len(mesh)
+
+    if n == 0:
+        return np.zeros( 0, dtype=np.int32 )
+
+    faces = mesh.faces.tolist()
+
+    # Triangles of each vertex, from the faces sorted by vertex
+
+    flat     = mesh.faces.ravel()
+    byVertex = np.argsort( flat, kind='stable' )
+    bounds   = np.searchsorted( flat[byVertex], np.arange( len(mesh.verts)+1 ) ).tolist()
+    tris     = (byVertex // 3).tolist()
+    vertTris = [ tris[bounds[v]:bounds[v+1]] for v in range( len(mesh.verts) ) ]
+
+    # Score tables, by cache position and by number of triangles left
+
+    cacheScores   = [ LAST_TRI_SCORE ] * 3 + [ (1.0 - (i-3) / float( max( cacheSize-3, 1 ) )) ** CACHE_DECAY_POWER
+                                               for i in range( 3, cacheSize ) ]
+    valenceScores = [ 0.0 ] + [ VALENCE_BOOST_SCALE * k ** -VALENCE_BOOST_POWER
+                                for k in range( 1, max( map( len, vertTris ) ) + 1 ) ]
+
+    vertScore = [ valenceScores[len(ts)] for ts in vertTris ]
+    triScore  = [ vertScore[a] + vertScore[b] + vertScore[c] for a,b,c in faces ]
+
+    drawn = [False] * n
+    order = []
+    cache = [] # vertices, most recently used first
+    scan  = 0  # every triangle before this has been drawn
+
+    best = max( range(n), key=triScore.__getitem__ )
+
+    while best is not None:
+
+        drawn[best] = True
+        order.append( best )
+
+        face = faces[best]
+        for v in face:
+            vertTris[v].remove( best )
+
+        # Move the triangle's vertices to the front of the cache
+
+        cache   = face + [ v for v in cache if v not in face ]
+        evicted = cache[cacheSize:]
+        cache   = cache[:cacheSize]
+
+        for i,v in enumerate( cache + evicted ):
+            score = valenceScores[len(vertTris[v])]
+            if i < cacheSize and vertTris[v]:
+                score += cacheScores[i]
+            delta = score - vertScore[v]
+            if delta != 0.0:
+                vertScore[v] = score
+                for t in vertTris[v]:
+                    triScore[t] += delta
+
+        # Draw the best triangle left in the cache next, or else the
+        # next one not yet drawn
+
+        best = None
+        for v in cache:
+            for t in vertTris[v]:
+                if best is None or triScore[t] > triScore[best]:
+                    best = t
+
+        if best is None:
+            while scan < n and drawn[scan]:
+                scan += 1
+            if scan < n:
+                best = scan
+
+    return np.array( order, dtype=np.int32 )
+
+
+def cacheMissRatio( faces, order, cacheSize=32, lru=False ):
+
+    if len(order) == 0:
+        return 0.0
+
+    misses = 0
+
+    if lru:
+        cache = {} # dicts keep insertion order, so the first key is least recent
+        for a,b,c in faces[order].tolist():
+            for v in (a, b, c):
+                if v in cache:
+                    del cache[v]
+                else:
+                    misses += 1
+                    if len(cache) == cacheSize:
+                        del cache[next( iter( cache ) )]
+                cache[v] = True
+    else:
+        cache  = set()
+        queue  = [None] * cacheSize # ring buffer of cached vertices
+        oldest = 0
+        for a,b,c in faces[order].tolist():
+            for v in (a, b, c):
+                if v not in cache:
+                    misses += 1
+                    cache.discard( queue[oldest] )
+                    queue[oldest] = v
+                    cache.add( v )
+                    oldest = (oldest + 1) % cacheSize
+
+    return misses / float( len(order) )
+
+
+# Triangle order of the strips, one strip after another
+
+def stripOrder( mesh ):
+
+    return np.array( [ t for strip in mesh.strips() for t in strip ], dtype=np.int32 )
+
+
+# Print the ACMR of the original, strip and cache-optimized orders
+
+def printCacheStats( mesh, order, cacheSize ):
+
+    orders = [ ('original', np.arange( len(mesh) )), ('strips', stripOrder( mesh )), ('optimized', order) ]
+
+    print( '  ACMR, %d-vertex cache:' % cacheSize )
+    for name,o in orders:
+        print( '    %-10s FIFO %.3f  LRU %.3f' %
+               (name, cacheMissRatio( mesh.faces, o, cacheSize ), cacheMissRatio( mesh.faces, o, cacheSize, lru=True )) )
+
+
+
+# Write strips to a file, one line of triangle indices per strip
+
+def writeStrips( f, strips ):
+
+    f.write( '%d\n' % len(strips) )
+
+    for strip in strips:
+        f.write( ' '.join( map( str, strip ) ) )
+        f.write( '\n' )
+
+
+
+# Build and write the strips of each file given on the command line
+
+def main():
+
+    # Check command-line args
+
+    if len(sys.argv) < 2:
+        print( 'Usage: %s [-n] [-p workers] [-s strategy] [-t seconds] [-i stitch|restart] [-c cacheSize] [-P profile [-A]] [-m megabytes] [-w tolerance] file_of_triangles ...' % sys.argv[0] )
+        print( '       -n  ignore the binary cache and rebuild the strips' )
+        print( '       -p  build the strips in parallel, in this many processes' )
+        print( '       -s  strip-building strategy: %s' % ', '.join( stripStrategies ) )
+        print( '       -t  seconds to spend merging strips by tunneling' )
+        print( '       -i  also write the GL_TRIANGLE_STRIP index stream' )
+        print( '       -c  also write a triangle order for a vertex cache of this size' )
+        print( '       -P  write a profile of each phase to this file (.json, or .folded for flame graphs)' )
+        print( '       -A  also record memory allocated in each phase, in the profile' )
+        print( '       -m  build the strips out of core, in about this many megabytes' )
+        print( '       -w  weld vertices within this distance of each other before building adjacency' )
+        sys.exit(1)
+
+    useCache   = True
+    indexMode  = None
+    workers    = None
+    strategy   = 'greedy'
+    tunnelTime = 0.0
+    cacheSize  = None
+    profile    = None
+    traceAlloc = False
+    memLimit   = None
+    weld       = None
+
+    args = sys.argv[1:]
+    while len(args) > 0 and args[0].startswith('-'):
+        if args[0] == '-n':
+            useCache = False
+        elif args[0] == '-p' and len(args) > 1 and args[1].isdigit():
+            workers = int( args[1] )
+            args = args[1:]
+        elif args[0] == '-s' and len(args) > 1 and args[1] in stripStrategies:
+            strategy = args[1]
+            args = args[1:]
+        elif args[0] == '-t' and len(args) > 1:
+            tunnelTime = float( args[1] )
+            args = args[1:]
+        elif args[0] == '-c' and len(args) > 1 and args[1].isdigit() and int( args[1] ) >= 3:
+            cacheSize = int( args[1] )
+            args = args[1:]
+        elif args[0] == '-P' and len(args) > 1:
+            profile = args[1]
+            args = args[1:]
+        elif args[0] == '-A':
+            traceAlloc = True
+        elif args[0] == '-w' and len(args) > 1:
+            weld = float( args[1] )
+            args = args[1:]
+        elif args[0] == '-m' and len(args) > 1 and args[1].isdigit():
+            memLimit = int( args[1] ) << 20
+            args = args[1:]
+        elif args[0] == '-i' and len(args) > 1 and args[1] in ('stitch','restart'):
+            indexMode = args[1]
+            args = args[1:]
+        else:
+            print( 'Unknown option %s' % args[0] )
+            sys.exit(1)
+        args = args[1:]
+
+    if profile is not None:
+        profiler.enable( traceAlloc, [ (sys.modules[__name__], [ 'addToStrip', 'searchAdjTri', 'findTunnel' ]) ] )
+
+    failed = 0
+
+    for path in args:
+
+        # Read the triangles
+
+        startTime = time.perf_counter()
+
+        if memLimit is not None:
+            result = buildTristripsOutOfCore( path, memLimit )
+            if result is None:
+                failed += 1
+            else:
+                print( '%s: %d triangles in %d strips (out of core)' % (path, result[0], result[1]) )
+                print( '  time: %.3fs' % (time.perf_counter()-startTime) )
+            continue
+
+        stripOptions = stripCacheOptions( strategy, tunnelTime, workers )
+
+        mesh = loadMesh( path, useCache, weld, stripOptions )
+
+        if mesh is None:
+            failed += 1
+            continue
+
+        readTime = time.perf_counter()
+
+        # Build the strips, unless they came from a cache written with
+        # the same strip options
+
+        cached = mesh.hasStrips
+
+        if not cached:
+            if workers is None:
+                buildTristrips( mesh, strategy, tunnelTime )
+            else:
+                with profiler.phase( 'strips' ):
+                    buildTristripsParallel( mesh, workers, strategy=strategy, tunnelTime=tunnelTime )
+            if useCache:
+                try:
+                    writeMeshCache( mesh, path + '.cache', meshCacheKey( path, weld, stripOptions ) )
+                except OSError as e:
+                    print( 'Warning: could not write cache: %s' % e )
+
+        buildTime = time.perf_counter()
+
+        # Write the strips
+
+        with profiler.phase( 'write' ):
+            strips = mesh.strips()
+
+            with open( path + '.strips', 'w' ) as f:
+                writeStrips( f, strips )
+
+        if indexMode is not None:
+            with profiler.phase( 'indices' ):
+                indices, restartIndex = encodeStrips( mesh, indexMode == 'restart' )
+                indices.tofile( path + '.indices' )
+
+        if cacheSize is not None:
+            with profiler.phase( 'cacheOrder' ):
+                order = vertexCacheOrder( mesh, cacheSize )
+                with open( path + '.order', 'w' ) as f:
+                    writeStrips( f, [ order.tolist() ] )
+
+        writeTime = time.perf_counter()
+
+        # Report
+
+        lengths = np.array( [ len(s) for s in strips ] )
+
+        print( '%s: %d triangles in %d strips%s' % (path, len(mesh), len(strips), ' (cached)' if cached else '') )
+        if len(strips) > 0:
+            print( '  strip length: mean %.2f, max %d, single triangles %d' %
+                   (lengths.mean(), lengths.max(), (lengths == 1).sum()) )
+        if indexMode is not None:
+            printIndexStats( mesh, indices, restartIndex )
+        if cacheSize is not None:
+            printCacheStats( mesh, order, cacheSize )
+        print( '  time: read %.3fs, strips %.3fs, write %.3fs' %
+               (readTime-startTime, buildTime-readTime, writeTime-buildTime) )
+
+    if profile is not None:
+        profiler.writeReport( profile )
+
+    if failed > 0:
+        sys.exit(1)
+
+
+
+if __name__ == '__main__':
+    main()